@@ -0,0 +1,40 @@
+"""CorporateActions
+
+Revision ID: 3f7c2a91d0e4
+Revises: 22205aaa5668
+Create Date: 2026-10-18 10:12:41.205318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f7c2a91d0e4"
+down_revision: Union[str, None] = "22205aaa5668"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "corporate_actions",
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("ex_date", sa.DateTime(), nullable=False),
+        sa.Column("action_type", sa.String(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.Column("adjustment_factor", sa.Float(), nullable=False),
+        sa.Column("applied_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["assets.id"],
+        ),
+        sa.PrimaryKeyConstraint("asset_id", "ex_date", "action_type"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("corporate_actions")
@@ -0,0 +1,45 @@
+"""PortfolioValuations
+
+Revision ID: 5e2b9d7c4f18
+Revises: 8d41e6b5c2a7
+Create Date: 2026-10-18 14:26:40.913027
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2b9d7c4f18"
+down_revision: Union[str, None] = "8d41e6b5c2a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled lazily by the portfolio endpoints and after each price refresh
+    op.create_table(
+        "portfolio_valuations",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("value", sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column("cash_flow", sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column(
+            "daily_return_val", sa.Numeric(precision=20, scale=8), nullable=False
+        ),
+        sa.Column(
+            "daily_return_pct", sa.Numeric(precision=20, scale=8), nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id", "date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("portfolio_valuations")
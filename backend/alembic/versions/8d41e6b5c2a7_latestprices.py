@@ -0,0 +1,74 @@
+"""LatestPrices
+
+Revision ID: 8d41e6b5c2a7
+Revises: 3f7c2a91d0e4
+Create Date: 2026-10-18 11:02:17.548203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d41e6b5c2a7"
+down_revision: Union[str, None] = "3f7c2a91d0e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "latest_prices",
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("latest_price", sa.Float(), nullable=False),
+        sa.Column("previous_close", sa.Float(), nullable=True),
+        sa.Column("price_change", sa.Float(), nullable=True),
+        sa.Column("percentage_change", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["assets.id"],
+        ),
+        sa.PrimaryKeyConstraint("asset_id"),
+    )
+    # Backfill from existing prices; ingestion keeps it up to date afterwards
+    op.execute(
+        """
+        INSERT INTO latest_prices (
+            asset_id, timestamp, latest_price, previous_close,
+            price_change, percentage_change, updated_at
+        )
+        SELECT
+            latest.asset_id,
+            latest.timestamp,
+            latest.close,
+            previous.close,
+            latest.close - previous.close,
+            (latest.close - previous.close) / previous.close * 100,
+            now()
+        FROM (
+            SELECT asset_id, timestamp, close,
+                row_number() OVER (
+                    PARTITION BY asset_id ORDER BY timestamp DESC
+                ) AS rank
+            FROM timeseries
+        ) AS latest
+        LEFT JOIN (
+            SELECT asset_id, close,
+                row_number() OVER (
+                    PARTITION BY asset_id ORDER BY timestamp DESC
+                ) AS rank
+            FROM timeseries
+        ) AS previous
+            ON previous.asset_id = latest.asset_id AND previous.rank = 2
+        WHERE latest.rank = 1
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("latest_prices")
@@ -0,0 +1,84 @@
+"""Positions
+
+Revision ID: b3e80f61a9d2
+Revises: 5e2b9d7c4f18
+Create Date: 2026-10-18 16:08:51.337402
+
+"""
+
+from decimal import Decimal
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3e80f61a9d2"
+down_revision: Union[str, None] = "5e2b9d7c4f18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    positions = op.create_table(
+        "positions",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("net_quantity", sa.Numeric(precision=15, scale=8), nullable=False),
+        sa.Column("total_cost", sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column(
+            "average_cost_basis", sa.Numeric(precision=20, scale=8), nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["assets.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id", "asset_id"),
+    )
+
+    # Backfill by replaying transactions with the running-average cost basis
+    transactions = op.get_bind().execute(
+        sa.text(
+            "SELECT user_id, asset_id, type, quantity, price FROM transactions "
+            "ORDER BY id"
+        )
+    )
+    state: dict[tuple[str, int], list[Decimal]] = {}
+    for user_id, asset_id, type, quantity, price in transactions:
+        quantity, price = Decimal(quantity), Decimal(price)
+        net, total, average = state.setdefault(
+            (user_id, asset_id), [Decimal("0"), Decimal("0"), Decimal("0")]
+        )
+        if type == "buy":
+            total += quantity * price
+            net += quantity
+            if net > 0:
+                average = total / net
+        elif type == "sell":
+            total -= average * quantity
+            net -= quantity
+        state[(user_id, asset_id)] = [net, total, average]
+
+    if state:
+        op.bulk_insert(
+            positions,
+            [
+                {
+                    "user_id": user_id,
+                    "asset_id": asset_id,
+                    "net_quantity": net,
+                    "total_cost": total,
+                    "average_cost_basis": average,
+                }
+                for (user_id, asset_id), (net, total, average) in state.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("positions")
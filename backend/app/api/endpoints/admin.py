@@ -1,3 +1,5 @@
+from dataclasses import asdict
+
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.core.auth.dependencies import require_admin
@@ -35,13 +37,44 @@ def trigger_timeseries_update(
     logger.info(
         f"Admin endpoint triggered: timeseries updated triggered by {current_user}"
     )
-    try:
-        from app.core.data_ingestion.update_timeseries import main
+    from app.core.data_ingestion.refresh_scheduler import (
+        RefreshOutcome,
+        price_refresh_scheduler,
+    )
 
-        result = main()
-        if result == 0:
-            return {"status": "success", "message": "Timeseries updated successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Timeseries update failed")
+    try:
+        outcome = price_refresh_scheduler.refresh(force=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    if outcome == RefreshOutcome.IN_PROGRESS:
+        raise HTTPException(
+            status_code=409, detail="A timeseries update is already running"
+        )
+    if outcome == RefreshOutcome.PARTIAL:
+        logger.warning("Manual timeseries update had failed downloads")
+        raise HTTPException(
+            status_code=502,
+            detail="Some price downloads failed; the rest were stored",
+        )
+    return {"status": "success", "message": "Timeseries updated successfully"}
+
+
+@router.get("/price-cache")
+def get_price_cache_stats(
+    current_user: str = Depends(require_admin),
+):
+    """Hit/miss/eviction counters and size of the shared price cache"""
+    from app.services.price_cache import price_cache
+
+    return asdict(price_cache.stats())
+
+
+@router.get("/return-model-cache")
+def get_return_model_cache_stats(
+    current_user: str = Depends(require_admin),
+):
+    """Hit/miss/eviction counters and size of the Monte Carlo return model cache"""
+    from app.monte_carlo.model_cache import return_model_cache
+
+    return asdict(return_model_cache.stats())
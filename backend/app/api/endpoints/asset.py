@@ -1,6 +1,5 @@
 from datetime import date
 
-import polars as pl
 from app import crud
 from app.crud import update_watchlist_item_alert_percentage
 from app.database import get_db
@@ -36,16 +35,14 @@ def get_asset_by_ticker(ticker: str, db: Session = Depends(get_db)):
         logger.warning(f"Asset not found: ticker={ticker}")
         raise HTTPException(status_code=404, detail=f"Asset {ticker} not found")
 
-    latest_timeseries = crud.timeseries.get_latest_price_and_changes(db)
-    filtered = latest_timeseries.filter(pl.col("asset_id") == asset["id"])
+    latest_prices = crud.timeseries.get_latest_prices(db, [asset["id"]])
 
-    if len(filtered) == 0:
+    if asset["id"] not in latest_prices:
         logger.warning(
             f"No price data available: ticker={ticker}, asset_id={asset['id']}"
         )
 
-    ts_data = filtered.to_dicts()[0] if len(filtered) > 0 else {}
-    asset.update(ts_data)
+    asset.update(latest_prices.get(asset["id"], {}))
 
     return asset
 
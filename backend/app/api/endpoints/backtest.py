@@ -4,9 +4,20 @@ from app import crud
 from app.core.auth.dependencies import get_current_user
 from app.database import get_db
 from app.logger import logger
-from app.schemas import BacktestRequest, BacktestResponse
+from app.schemas import (
+    BacktestRequest,
+    BacktestResponse,
+    BatchBacktestRequest,
+    BatchBacktestResponse,
+)
 from app.schemas.backtest import PreviousBacktest
 from app.services.backtest_service import BacktestService
+from app.utils.columnar_response import (
+    ColumnarPayload,
+    ResponseFormat,
+    columnar_response,
+    get_response_format,
+)
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm.session import Session
 
@@ -17,8 +28,14 @@ router = APIRouter(prefix="/backtest", tags=["backtest"])
 def run_backtest(
     request: BacktestRequest,
     current_user: str = Depends(get_current_user),
+    response_format: ResponseFormat = Depends(get_response_format),
     db: Session = Depends(get_db),
 ):
+    """
+    Run and save a backtest. ``?format=columns`` or ``?format=arrow`` (or the
+    matching Accept header) returns the daily history as columns instead of
+    one snapshot object per day.
+    """
     backtest_service = BacktestService(db)
 
     try:
@@ -27,7 +44,13 @@ def run_backtest(
         logger.warning(f"Backtest validation failed: {e.detail}")
         raise
 
-    backtest_result = backtest_service.run_backtest(request, current_user)
+    if response_format == ResponseFormat.JSON:
+        backtest_result = backtest_service.run_backtest(request, current_user)
+        history_columns = None
+    else:
+        backtest_result, history_columns = backtest_service.run_backtest_columnar(
+            request, current_user
+        )
 
     parameters = request.model_dump(exclude={"strategy"})
 
@@ -38,9 +61,46 @@ def run_backtest(
         data=backtest_result,
     )
 
+    if history_columns is not None:
+        return columnar_response(
+            ColumnarPayload(
+                table=history_columns,
+                metadata=backtest_response.model_dump(
+                    mode="json", exclude={"data": {"history"}}
+                ),
+            ),
+            response_format,
+        )
     return backtest_response
 
 
+@router.post("/batch", response_model=BatchBacktestResponse)
+def run_backtest_batch(
+    request: BatchBacktestRequest,
+    current_user: str = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Run one strategy over a grid of parameters, e.g. DCA amount x frequency.
+    Returns a summary per configuration; batch runs are not saved to history.
+    """
+    backtest_service = BacktestService(db)
+
+    try:
+        backtest_service.validate_batch_request(request, db)
+    except HTTPException as e:
+        logger.warning(f"Batch backtest validation failed: {e.detail}")
+        raise
+
+    results = backtest_service.run_many(request)
+
+    return BatchBacktestResponse(
+        batch_id=uuid.uuid4(),
+        strategy=request.strategy,
+        results=results,
+    )
+
+
 @router.get("/backtest_history", response_model=list[PreviousBacktest])
 def get_backtest_history(
     current_user: str = Depends(get_current_user),
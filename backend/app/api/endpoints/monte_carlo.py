@@ -1,36 +1,81 @@
-import polars as pl
+from decimal import Decimal
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from app.crud import get_latest_timeseries_for_asset
+from app import crud
+from app.backtesting.strategies.buy_hold import BuyAndHoldStrategy
 from app.database import get_db
-from app.monte_carlo.monte_carlo_engine import MonteCarloEngine
+from app.logger import logger
+from app.monte_carlo.model_cache import return_model_cache
+from app.monte_carlo.monte_carlo_engine import MonteCarloEngine, ReturnModel
 from app.schemas.monte_carlo import (
     MonteCarloConfig,
     MonteCarloSimulationMethods,
+    PortfolioMonteCarloRequest,
+    SimulationResolution,
+    SimulationResults,
+)
+from app.utils.columnar_response import (
+    ResponseFormat,
+    columnar_response,
+    get_response_format,
 )
 
 router = APIRouter(prefix="/monte_carlo", tags=["monte_carlo"])
 
+# Requests simulate in their own worker thread. A process pool per request
+# would be forked from the threaded server with nothing bounding pools across
+# requests, so the engine's pool is left to scripts and benchmarks
+REQUEST_MAX_WORKERS = 1
+
+
+def get_return_model(asset_id: int, db: Session) -> ReturnModel:
+    """
+    Fitted return model of an asset, rebuilt from its prices only when the
+    asset has a newer latest price than the cached model.
+    """
+    latest = crud.timeseries.get_latest_prices(db, [asset_id]).get(asset_id)
+    latest_price_date = latest["timestamp"] if latest else None
+
+    if latest_price_date is not None:
+        model = return_model_cache.get(asset_id, latest_price_date)
+        if model is not None:
+            return model
+
+    timeseries_df = crud.timeseries.get_latest_timeseries_for_asset(asset_id, db)
+    model = ReturnModel.from_timeseries(timeseries_df)
+    if latest_price_date is not None:
+        return_model_cache.put(asset_id, latest_price_date, model)
+    return model
+
 
 def run_monte_carlo_analysis(
-    timeseries_df: pl.DataFrame,
+    model: ReturnModel,
     monthly_investment: float,
     investment_months: int,
     simulation_method: MonteCarloSimulationMethods,
+    seed: int | None = None,
+    resolution: SimulationResolution = SimulationResolution.MONTHLY,
 ):
-    engine = MonteCarloEngine(timeseries_df)
+    engine = MonteCarloEngine(model=model)
 
     config = MonteCarloConfig(
         monthly_investment=monthly_investment,
         investment_months=investment_months,
         num_simulations=10_000,
         simulation_method=simulation_method,
+        seed=seed,
+        resolution=resolution,
     )
 
-    results = engine.simulate_dca_strategy(config)
+    return engine.simulate_dca_strategy(config, max_workers=REQUEST_MAX_WORKERS)
+
 
-    return results.to_dict()
+def simulation_response(results: SimulationResults, response_format: ResponseFormat):
+    if response_format == ResponseFormat.JSON:
+        return results.to_dict()
+    return columnar_response(results.to_columnar(), response_format)
 
 
 @router.get("/")
@@ -41,6 +86,9 @@ def monte_carlo(
     simulation_method: MonteCarloSimulationMethods = Query(
         MonteCarloSimulationMethods.BOOTSTRAP
     ),
+    seed: int | None = Query(None, ge=0),
+    resolution: SimulationResolution = Query(SimulationResolution.MONTHLY),
+    response_format: ResponseFormat = Depends(get_response_format),
     db: Session = Depends(get_db),
 ):
     if monthly_investment <= 0:
@@ -52,11 +100,53 @@ def monte_carlo(
             status_code=422, detail="investment_months must be greater than 0"
         )
 
-    timeseries_df = get_latest_timeseries_for_asset(ticker_id, db)
+    model = get_return_model(ticker_id, db)
     results = run_monte_carlo_analysis(
-        timeseries_df,
+        model,
         monthly_investment,
         investment_months,
         simulation_method,
+        seed,
+        resolution,
+    )
+    return simulation_response(results, response_format)
+
+
+@router.post("/portfolio")
+def monte_carlo_portfolio(
+    request: PortfolioMonteCarloRequest,
+    response_format: ResponseFormat = Depends(get_response_format),
+    db: Session = Depends(get_db),
+):
+    """
+    Simulate a buy-and-hold allocation over several assets, drawing their
+    monthly returns jointly so the correlation between them is kept.
+    """
+    weights = request.allocation.values()
+    if not weights or any(w <= 0 for w in weights) or abs(sum(weights) - 1) > 1e-6:
+        raise HTTPException(
+            status_code=422, detail="allocation weights must be positive and sum to 1"
+        )
+
+    models = {
+        asset_id: get_return_model(asset_id, db) for asset_id in request.allocation
+    }
+    config = MonteCarloConfig(
+        investment_months=request.investment_months,
+        num_simulations=10_000,
+        simulation_method=request.simulation_method,
+        seed=request.seed,
+        block_length=request.block_length,
+        resolution=request.resolution,
     )
-    return results
+    strategy = BuyAndHoldStrategy(
+        request.allocation, Decimal(str(request.initial_investment))
+    )
+    try:
+        results = MonteCarloEngine(models=models).simulate_strategy(
+            strategy, config, max_workers=REQUEST_MAX_WORKERS
+        )
+    except ValueError as e:
+        logger.error(f"Portfolio Monte Carlo simulation failed: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    return simulation_response(results, response_format)
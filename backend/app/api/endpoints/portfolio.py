@@ -7,11 +7,8 @@ from app import crud, models, schemas
 from app.core.auth.dependencies import get_current_user
 from app.database import get_db
 from app.logger import logger
-from app.services.portfolio_engine import (
-    calculate_holdings,
-    calculate_metrics,
-    get_portfolio_data_for_user,
-)
+from app.services.portfolio_engine import calculate_holdings, calculate_metrics
+from app.services.portfolio_valuation import get_portfolio_history
 
 router = APIRouter(prefix="/portfolio", tags=["portfolio"])
 
@@ -72,17 +69,17 @@ def get_portfolio_holdings(
     db: Session = Depends(get_db),
 ) -> list[schemas.PortfolioHoldings]:
     user_id = current_user
-    transactions = (
-        db.query(models.Transaction).filter(models.Transaction.user_id == user_id).all()
-    )
+    positions = crud.position.get_positions(db, user_id)
 
-    if not transactions:
+    if not positions:
         logger.info(f"No transactions found for user {user_id[-8:]}")
         return []
 
-    latest_prices = crud.timeseries.get_latest_price_and_changes(db)
+    latest_prices = crud.timeseries.get_latest_prices(
+        db, {p.asset_id for p in positions}
+    )
 
-    holdings = calculate_holdings(transactions, latest_prices, db)
+    holdings = calculate_holdings(positions, latest_prices, db)
 
     logger.info(
         f"Calculated holdings for user {user_id[-8:]}: {len(holdings)} positions"
@@ -96,13 +93,14 @@ def get_portfolio_over_time(
     db: Session = Depends(get_db),
 ) -> list[schemas.PortfolioValueHistory]:
     """
-    Calculate daily portfolio values for a user based on their transaction history.
+    Daily portfolio values for a user, read from the stored valuations. Any
+    trading days not valued yet are valued and stored first.
     Returns up to 1 year of history; holdings from earlier transactions are included.
     """
     user_id = current_user
-    start_date = datetime.now() - timedelta(days=365)
+    start_date = (datetime.now() - timedelta(days=365)).date()
     try:
-        _, history = get_portfolio_data_for_user(user_id, db, start_date=start_date)
+        history = get_portfolio_history(db, user_id, start_date=start_date)
         logger.info(f"Fetched portfolio timeseries data for user {user_id[-8:]}")
         return history
     except ValueError as e:
@@ -117,15 +115,15 @@ def get_portfolio_metrics(
 ) -> schemas.PortfolioMetrics:
     """
     Calculate performance metrics for a user's portfolio.
-    Sharpe, volatility and drawdown are computed over the last year.
+    Sharpe, volatility and drawdown are computed over the last year of stored
+    valuations, the same series ``portfolio_over_time`` returns.
     Total return uses all-time transactions vs current value.
     """
     user_id = current_user
-    start_date = datetime.now() - timedelta(days=365)
+    start_date = (datetime.now() - timedelta(days=365)).date()
     try:
-        transactions, history = get_portfolio_data_for_user(
-            user_id, db, start_date=start_date
-        )
+        history = get_portfolio_history(db, user_id, start_date=start_date)
+        transactions = crud.transaction.get_transactions_by_user(db, user_id)
         metrics = calculate_metrics(transactions, history)
 
         if metrics is None:
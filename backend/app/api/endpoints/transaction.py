@@ -9,7 +9,7 @@ from app.core.auth.dependencies import get_current_user
 from app.crud.asset import get_asset_by_id
 from app.database import get_db
 from app.logger import logger
-from app.services.portfolio_engine import get_current_holdings
+from app.models.transaction import PRICE_QUANTUM, QUANTITY_QUANTUM, as_stored
 from app.utils.convert_to_utc import convert_to_utc
 
 router = APIRouter(prefix="/transaction", tags=["transaction"])
@@ -51,13 +51,16 @@ def create_transaction(
             detail=f"Purchase date {utc_date} cannot be in the future or today",
         )
 
+    # Apply the values the transaction row will store, so the position
+    # matches a replay of stored transactions by rebuild_position
+    stored_quantity = as_stored(quantity, QUANTITY_QUANTUM)
+    stored_price = as_stored(price, PRICE_QUANTUM)
+
     if type == models.transaction.TransactionType.sell:
-        existing_transactions = crud.transaction.get_transactions_by_user_and_asset(
-            db, user_id=user_id, asset_id=asset_id
-        )
-        holdings = get_current_holdings(existing_transactions)
-        owned = holdings.get(asset_id, 0)
-        if quantity > owned:
+        # Lock the position before checking it; the lock is held until commit
+        position = crud.position.get_position(db, user_id, asset_id, for_update=True)
+        owned = position.net_quantity if position is not None else 0
+        if stored_quantity > owned:
             logger.warning(
                 f"Sell rejected: user owns {owned} shares of asset {asset_id}, attempted to sell {quantity}"
             )
@@ -71,11 +74,17 @@ def create_transaction(
         portfolio_name=portfolio_name,
         asset_id=asset_id,
         type=type,
-        quantity=quantity,
-        price=price,
+        quantity=stored_quantity,
+        price=stored_price,
         timestamp=utc_date,
     )
     db.add(transaction)
+    crud.position.apply_transaction_to_position(
+        db, user_id, asset_id, type, stored_quantity, stored_price
+    )
+    crud.portfolio_valuation.delete_portfolio_valuations(
+        db, user_id, from_date=utc_date.date()
+    )
     db.commit()
     db.refresh(transaction)
 
@@ -153,6 +162,9 @@ def delete_transaction(
             detail=f"User {user_id[-8:]} not authorised to delete this transactions",
         )
 
+    crud.portfolio_valuation.delete_portfolio_valuations(
+        db, user_id, from_date=transaction.timestamp.date()
+    )
     crud.transaction.delete_transaction(db, transaction_id=transaction_id)
     logger.info(
         f"Transaction {transaction_id} successfully deleted for user {user_id[-8:]}"
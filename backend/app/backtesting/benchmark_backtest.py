@@ -0,0 +1,108 @@
+"""
+Backtest engine benchmark: per-day cost as the backtest length grows.
+Run from the backend directory: uv run python -m app.backtesting.benchmark_backtest
+
+Time per day should stay flat as the number of days doubles (linear scaling).
+"""
+
+import os
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import Mock
+
+import numpy as np
+
+# The engine imports the ORM models, which need a (never connected) database URL
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+
+from app.backtesting.engine import BacktestEngine  # noqa: E402
+from app.backtesting.strategies.dca import DCAStrategy  # noqa: E402
+
+# ---------------------------------------------------------------------------
+# Shared config
+# ---------------------------------------------------------------------------
+
+DAY_COUNTS = [625, 1_250, 2_500, 5_000]
+ASSET_ID = 1
+SEED = 42
+REPEATS = 5
+
+
+def make_trading_days(n_days: int) -> list[date]:
+    days = []
+    current = date(2005, 1, 3)
+    while len(days) < n_days:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def make_engine(n_days: int) -> BacktestEngine:
+    trading_days = make_trading_days(n_days)
+    rng = np.random.default_rng(SEED)
+    prices = 100.0 * np.cumprod(1 + rng.normal(0.0004, 0.012, n_days))
+    price_lookup = {
+        (ASSET_ID, day): float(price) for day, price in zip(trading_days, prices)
+    }
+
+    engine = BacktestEngine(Mock(), autorun_prices=False)
+    engine.price_service.get_trading_days = Mock(return_value=trading_days)
+    engine.price_service.get_price_lookup = Mock(return_value=price_lookup)
+    return engine
+
+
+def make_strategy() -> DCAStrategy:
+    return DCAStrategy(
+        asset_id=ASSET_ID,
+        initial_investment=Decimal("1000"),
+        amount_per_period=Decimal("100"),
+        frequency="daily",
+    )
+
+
+def time_run(engine: BacktestEngine, method: str) -> float:
+    """Best of REPEATS runs, to keep scheduler noise out of the scaling ratio."""
+    run = getattr(engine, method)
+    timings = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        run(make_strategy(), date(2005, 1, 1), date(2030, 1, 1), Decimal("1000"))
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+def run_benchmark():
+    print(
+        f"\n{'Days':>8}  {'run (s)':>9}  {'us/day':>8}  {'x prev':>7}"
+        f"  {'columnar (s)':>13}  {'us/day':>8}  {'x prev':>7}"
+    )
+    print("-" * 72)
+
+    previous: dict[str, float] = {}
+
+    for n_days in DAY_COUNTS:
+        engine = make_engine(n_days)
+        row = f"{n_days:>8,}"
+
+        for method, width in (("run", 9), ("run_columnar", 13)):
+            elapsed = time_run(engine, method)
+            growth = elapsed / previous[method] if method in previous else 1.0
+            previous[method] = elapsed
+            row += f"  {elapsed:>{width}.3f}  {elapsed / n_days * 1e6:>8.1f}"
+            row += f"  {growth:>6.2f}x"
+
+        print(row)
+
+    print()
+    print("Each row doubles the number of days: ~2.0x per row means linear scaling.")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,12 +1,63 @@
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
 from datetime import date
+from decimal import Decimal
+from types import MappingProxyType
 
 from app.schemas.backtest import DailySnapshot
 
+EMPTY_HOLDINGS: Mapping[int, Decimal] = MappingProxyType({})
+
+
+class HistoryBuffer:
+    """
+    Append-only store of daily snapshots.
+
+    Because entries are never removed or reordered, a view over the first n
+    entries stays valid as the buffer grows, so strategies can be handed the
+    history each day without copying it.
+    """
+
+    def __init__(self):
+        self._snapshots: list[DailySnapshot] = []
+
+    def append(self, snapshot: DailySnapshot):
+        self._snapshots.append(snapshot)
+
+    def view(self) -> "HistoryView":
+        return HistoryView(self._snapshots, len(self._snapshots))
+
+    def to_list(self) -> list[DailySnapshot]:
+        return self._snapshots
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
+class HistoryView(Sequence):
+    """Read-only, fixed-length view over a HistoryBuffer."""
+
+    def __init__(self, snapshots: list[DailySnapshot], length: int):
+        self._snapshots = snapshots
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._snapshots[: self._length][index]
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history index out of range")
+        return self._snapshots[index]
+
 
 @dataclass
 class BacktestContext:
     current_date: date
-    holdings: dict[int, float]
+    holdings: Mapping[int, Decimal]
     price_lookup: dict[tuple[int, date], float]
-    history: list[DailySnapshot]
+    history: Sequence[DailySnapshot]
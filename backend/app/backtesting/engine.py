@@ -1,23 +1,39 @@
 from datetime import date
 from decimal import Decimal
+from types import MappingProxyType
 
+import numpy as np
 from sqlalchemy.orm.session import Session
 
 from app import schemas
 from app.backtesting.actions import Action, BuyAction, SellAction
-from app.backtesting.context import BacktestContext
+from app.backtesting.columnar import (
+    ColumnarHistory,
+    ColumnarHistoryView,
+    HoldingsView,
+    PriceMatrix,
+    execute_plan,
+    held_since_first_trade,
+    portfolio_values,
+    to_decimal,
+)
+from app.backtesting.context import EMPTY_HOLDINGS, BacktestContext, HistoryBuffer
 from app.backtesting.metrics import (
     calculate_max_drawdown,
+    calculate_max_drawdown_array,
     calculate_sharpe,
+    calculate_sharpe_array,
     calculate_volatility,
+    calculate_volatility_array,
 )
 from app.backtesting.strategies.base import BacktestStrategy
+from app.backtesting.trading_calendar import TradingCalendar
 from app.schemas.backtest import BacktestMetrics, DailySnapshot
 from app.services.price_service import PriceService
 
 
 class BacktestEngine:
-    def __init__(self, db: Session, autorun_prices=True):
+    def __init__(self, db: Session, autorun_prices=False):
         self.price_service = PriceService(db, autorun_prices)
 
     def run(
@@ -33,18 +49,24 @@ class BacktestEngine:
             asset_ids, start_date, end_date
         )
         holdings = {}
-        history = []
+        history = HistoryBuffer()
         all_actions = []
 
         for trading_day in trading_days:
+            # Yesterday's snapshot holds an immutable copy of today's opening
+            # positions, so it can be exposed to the strategy without copying.
             context = BacktestContext(
                 current_date=trading_day,
-                holdings=holdings.copy(),
+                holdings=(
+                    MappingProxyType(history.to_list()[-1].holdings)
+                    if len(history)
+                    else EMPTY_HOLDINGS
+                ),
                 price_lookup=price_lookup,
-                history=history.copy(),
+                history=history.view(),
             )
             actions_list = strategy.on_day(context)
-            all_actions = all_actions + actions_list
+            all_actions.extend(actions_list)
             cash_flow = self._execute_actions(
                 actions_list, trading_day, holdings, price_lookup
             )
@@ -59,6 +81,7 @@ class BacktestEngine:
             )
             history.append(daily_snapshot)
 
+        history = history.to_list()
         history = self._calculate_daily_returns(history)
         metrics = self._calculate_metrics(history, all_actions)
 
@@ -93,6 +116,251 @@ class BacktestEngine:
 
         return result
 
+    def run_columnar(
+        self,
+        strategy: BacktestStrategy,
+        start_date: date,
+        end_date: date,
+        initial_cash: Decimal,
+    ) -> schemas.BacktestResult:
+        """
+        Vectorised equivalent of ``run``.
+
+        Prices are loaded into a dense (days x assets) float64 matrix, holdings
+        are tracked as an array and the history is kept column-wise. Decimal and
+        pydantic objects are only created when the result is built. Output
+        matches ``run`` to within ``COLUMNAR_RTOL`` relative tolerance.
+        """
+        trading_days = self.price_service.get_trading_days(start_date, end_date)
+        asset_ids = strategy.get_asset_ids()
+        price_lookup = self.price_service.get_price_lookup(
+            asset_ids, start_date, end_date
+        )
+        return self.simulate_columnar(
+            strategy, trading_days, price_lookup, start_date, end_date, initial_cash
+        )
+
+    @classmethod
+    def simulate_columnar(
+        cls,
+        strategy: BacktestStrategy,
+        trading_days: TradingCalendar | list[date],
+        price_lookup: dict[tuple[int, date], float],
+        start_date: date,
+        end_date: date,
+        initial_cash: Decimal,
+        include_history: bool = True,
+        use_plan: bool = True,
+    ) -> schemas.BacktestResult:
+        """
+        Run the columnar engine on price data that has already been loaded.
+
+        Needs no database access, so it can be called from worker processes.
+        Strategies that implement ``plan`` are applied in one vectorised pass
+        unless ``use_plan`` is False; others are driven day by day through
+        ``on_day``. With ``include_history=False`` the daily history is left
+        empty.
+        """
+        result, _ = cls.simulate_columnar_history(
+            strategy,
+            trading_days,
+            price_lookup,
+            start_date,
+            end_date,
+            initial_cash,
+            include_history,
+            use_plan,
+        )
+        return result
+
+    @classmethod
+    def simulate_columnar_history(
+        cls,
+        strategy: BacktestStrategy,
+        trading_days: TradingCalendar | list[date],
+        price_lookup: dict[tuple[int, date], float],
+        start_date: date,
+        end_date: date,
+        initial_cash: Decimal,
+        include_history: bool = True,
+        use_plan: bool = True,
+    ) -> tuple[schemas.BacktestResult, ColumnarHistory]:
+        """
+        ``simulate_columnar`` that also returns the column-wise history, for
+        callers that serialise it without building snapshots.
+        """
+        calendar = (
+            trading_days
+            if isinstance(trading_days, TradingCalendar)
+            else TradingCalendar(trading_days)
+        )
+        asset_ids = strategy.get_asset_ids()
+        price_matrix = PriceMatrix.from_lookup(price_lookup, calendar.days, asset_ids)
+        history = ColumnarHistory.allocate(calendar.days, asset_ids)
+
+        cash_flow_plan = (
+            strategy.plan(calendar, price_matrix.prices) if use_plan else None
+        )
+        if cash_flow_plan is not None:
+            investments_made = cls._execute_plan(
+                cash_flow_plan, price_matrix.prices, history
+            )
+        else:
+            investments_made = cls._run_days(
+                strategy, price_matrix, price_lookup, history
+            )
+
+        result = cls._build_columnar_result(
+            history,
+            start_date,
+            end_date,
+            initial_cash,
+            investments_made,
+            include_history,
+        )
+        return result, history
+
+    @staticmethod
+    def _execute_plan(
+        cash_flow_plan: np.ndarray, prices: np.ndarray, history: ColumnarHistory
+    ) -> int:
+        """Apply a strategy's cash-flow plan to the whole history at once."""
+        holdings, cash_flows, values, investments_made = execute_plan(
+            cash_flow_plan, prices
+        )
+        history.holdings[:] = holdings
+        history.held[:] = held_since_first_trade(holdings)
+        history.cash_flows += cash_flows
+        history.values[:] = values
+        return investments_made
+
+    @classmethod
+    def _run_days(
+        cls,
+        strategy: BacktestStrategy,
+        price_matrix: PriceMatrix,
+        price_lookup: dict[tuple[int, date], float],
+        history: ColumnarHistory,
+    ) -> int:
+        asset_ids = price_matrix.asset_ids
+        asset_index = price_matrix.asset_index()
+        holdings = np.zeros(len(asset_ids))
+        holdings_view = HoldingsView(asset_ids, holdings)
+        investments_made = 0
+
+        for i, trading_day in enumerate(history.dates):
+            context = BacktestContext(
+                current_date=trading_day,
+                holdings=holdings_view,
+                price_lookup=price_lookup,
+                history=ColumnarHistoryView(history, i),
+            )
+            actions_list = strategy.on_day(context)
+            investments_made += len(actions_list)
+            history.cash_flows[i] = cls._execute_actions_columnar(
+                actions_list, price_matrix.prices[i], asset_index, holdings
+            )
+            history.holdings[i] = holdings
+            history.held[i] = holdings != 0
+            if i > 0:
+                history.held[i] |= history.held[i - 1]
+            history.values[i] = portfolio_values(
+                history.holdings[i : i + 1], price_matrix.prices[i : i + 1]
+            )[0]
+
+        return investments_made
+
+    @staticmethod
+    def _execute_actions_columnar(
+        actions: list[Action],
+        prices: np.ndarray,
+        asset_index: dict[int, int],
+        holdings: np.ndarray,
+    ) -> float:
+        cash_flow = 0.0
+        for action in actions:
+            j = asset_index.get(action.asset_id)
+            if j is None or np.isnan(prices[j]):
+                continue
+
+            if isinstance(action, BuyAction):
+                dollar_amount = float(action.dollar_amount)
+                holdings[j] += dollar_amount / prices[j]
+                cash_flow += dollar_amount
+
+            elif isinstance(action, SellAction):
+                quantity = float(action.quantity)
+                if quantity > holdings[j]:
+                    raise ValueError(
+                        f"Cannot sell {action.quantity} shares, only {holdings[j]} available"
+                    )
+                holdings[j] -= quantity
+                cash_flow -= quantity * prices[j]
+
+        return cash_flow
+
+    @staticmethod
+    def _build_columnar_result(
+        history: ColumnarHistory,
+        start_date: date,
+        end_date: date,
+        initial_cash: Decimal,
+        investments_made: int,
+        include_history: bool = True,
+    ) -> schemas.BacktestResult:
+        num_days = len(history.values)
+        total_invested = float(history.cash_flows.sum())
+        if total_invested == 0:
+            total_invested = float(initial_cash)
+
+        if num_days:
+            final_value = float(history.values[-1])
+            total_return_abs = final_value - total_invested
+            total_return_pct = total_return_abs / total_invested
+            avg_daily_return = total_return_pct / num_days
+        else:
+            final_value = total_return_abs = total_return_pct = 0.0
+            avg_daily_return = 0.0
+
+        if num_days < 2:
+            metrics = BacktestMetrics(
+                sharpe=Decimal("0"),
+                max_drawdown=Decimal("0"),
+                max_drawdown_duration=0,
+                volatility=Decimal("0"),
+                days_analysed=num_days,
+                investments_made=investments_made,
+                peak_value=Decimal("0"),
+                trough_value=Decimal("0"),
+            )
+        else:
+            _, returns_pct = history.daily_returns()
+            max_drawdown, max_drawdown_duration = calculate_max_drawdown_array(
+                history.dates, history.values
+            )
+            metrics = BacktestMetrics(
+                sharpe=to_decimal(calculate_sharpe_array(returns_pct[1:])),
+                max_drawdown=to_decimal(max_drawdown),
+                max_drawdown_duration=max_drawdown_duration,
+                volatility=to_decimal(calculate_volatility_array(returns_pct[1:])),
+                days_analysed=num_days,
+                investments_made=investments_made,
+                peak_value=to_decimal(history.values.max()),
+                trough_value=to_decimal(history.values.min()),
+            )
+
+        return schemas.BacktestResult(
+            start_date=start_date,
+            end_date=end_date,
+            total_invested=to_decimal(total_invested),
+            final_value=to_decimal(final_value),
+            total_return_pct=to_decimal(total_return_pct),
+            total_return_abs=to_decimal(total_return_abs),
+            avg_daily_return=to_decimal(avg_daily_return),
+            metrics=metrics,
+            history=history.to_snapshots() if include_history else [],
+        )
+
     @staticmethod
     def _execute_actions(
         actions: list[Action],
@@ -1,8 +1,11 @@
-import statistics
+from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
 from typing import Protocol
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
 from app.schemas.backtest import MaxDrawdownResponse
 
 
@@ -19,16 +22,9 @@ def calculate_sharpe(
     returns: list[Decimal], risk_free_rate: Decimal = Decimal("0.04") / Decimal("252")
 ) -> Decimal:
     """Calculate annualised Sharpe ratio."""
-    if len(returns) < 2:
-        return Decimal("0")
-
-    mean_return = Decimal(statistics.mean(returns))
-    std_dev = Decimal(statistics.stdev(returns))
-
-    if std_dev == 0:
-        return Decimal("0")
-
-    return (mean_return - Decimal(risk_free_rate)) / std_dev * Decimal(252**0.5)
+    return Decimal(
+        str(calculate_sharpe_array(_to_array(returns), float(risk_free_rate)))
+    )
 
 
 def calculate_max_drawdown(history: list[HistoryEntry]) -> MaxDrawdownResponse:
@@ -37,35 +33,214 @@ def calculate_max_drawdown(history: list[HistoryEntry]) -> MaxDrawdownResponse:
     Uses actual portfolio values rather than compounded returns to show
     the drawdown a user would actually experience looking at their portfolio.
     """
-    if not history:
-        return MaxDrawdownResponse(max_drawdown=Decimal("0"), max_drawdown_duration=0)
+    max_drawdown, max_drawdown_duration = calculate_max_drawdown_array(
+        [day.date for day in history], _to_array([day.value for day in history])
+    )
+    return MaxDrawdownResponse(
+        max_drawdown=Decimal(str(max_drawdown)),
+        max_drawdown_duration=max_drawdown_duration,
+    )
 
-    max_drawdown = Decimal("0")
-    max_drawdown_duration = 0
-    running_max = Decimal("0")
-    running_max_date = None
 
-    for day in history:
-        value = day.value
+def calculate_volatility(returns: list[Decimal]) -> Decimal:
+    """Calculate annualized volatility."""
+    return Decimal(str(calculate_volatility_array(_to_array(returns))))
 
-        if value > running_max:
-            running_max = value
-            running_max_date = day.date
 
-        if running_max > 0 and running_max_date is not None:
-            current_drawdown = (value - running_max) / running_max
-            if current_drawdown < max_drawdown:
-                max_drawdown = current_drawdown
-                max_drawdown_duration = (day.date - running_max_date).days
+def _to_array(values: list[Decimal]) -> np.ndarray:
+    return np.fromiter((float(v) for v in values), dtype=np.float64, count=len(values))
 
-    return MaxDrawdownResponse(
-        max_drawdown=Decimal(max_drawdown), max_drawdown_duration=max_drawdown_duration
+
+def calculate_sharpe_array(
+    returns: np.ndarray, risk_free_rate: float = 0.04 / 252
+) -> float:
+    """Annualised Sharpe ratio of a float64 return array."""
+    if len(returns) < 2 or np.ptp(returns) == 0:
+        return 0.0
+
+    std_dev = float(np.std(returns, ddof=1))
+    if std_dev == 0:
+        return 0.0
+
+    return (float(np.mean(returns)) - risk_free_rate) / std_dev * 252**0.5
+
+
+def calculate_volatility_array(returns: np.ndarray) -> float:
+    """Annualised volatility of a float64 return array."""
+    if len(returns) < 2 or np.ptp(returns) == 0:
+        return 0.0
+
+    return float(np.std(returns, ddof=1)) * 252**0.5
+
+
+def calculate_max_drawdown_array(
+    dates: list[date], values: np.ndarray
+) -> tuple[float, int]:
+    """Vectorised calculate_max_drawdown. Returns (max_drawdown, duration_days)."""
+    if len(values) == 0:
+        return 0.0, 0
+
+    index = np.arange(len(values))
+    running_max = np.maximum.accumulate(np.maximum(values, 0.0))
+    previous_max = np.concatenate(([0.0], running_max[:-1]))
+    peak_index = np.maximum.accumulate(np.where(values > previous_max, index, 0))
+
+    drawdowns = np.zeros(len(values))
+    np.divide(values - running_max, running_max, out=drawdowns, where=running_max > 0)
+
+    trough = int(np.argmin(drawdowns))
+    if drawdowns[trough] >= 0:
+        return 0.0, 0
+
+    return float(drawdowns[trough]), (dates[trough] - dates[peak_index[trough]]).days
+
+
+# ---------------------------------------------------------------------------
+# Rolling metrics
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class RollingMetrics:
+    """
+    Metrics over the trailing ``window`` days, aligned with the input arrays.
+    The first ``window - 1`` entries are NaN.
+    """
+
+    sharpe: np.ndarray
+    volatility: np.ndarray
+    drawdown: np.ndarray
+
+
+def calculate_rolling_metrics(
+    returns: np.ndarray,
+    values: np.ndarray,
+    window: int,
+    risk_free_rate: float = 0.04 / 252,
+) -> RollingMetrics:
+    """
+    Rolling Sharpe, volatility and drawdown from one set of sliding windows.
+
+    Each window gives the same result as the scalar ``*_array`` function on
+    that slice; drawdown is the latest value against the peak of its window.
+    """
+    return RollingMetrics(
+        sharpe=calculate_rolling_sharpe(returns, window, risk_free_rate),
+        volatility=calculate_rolling_volatility(returns, window),
+        drawdown=calculate_rolling_drawdown(values, window),
     )
 
 
-def calculate_volatility(returns: list[Decimal]) -> Decimal:
-    """Calculate annualized volatility."""
-    if len(returns) < 2:
-        return Decimal("0")
+def calculate_rolling_sharpe(
+    returns: np.ndarray, window: int, risk_free_rate: float = 0.04 / 252
+) -> np.ndarray:
+    mean, std_dev = _rolling_mean_std(returns, window)
+    sharpe = np.zeros_like(std_dev)
+    np.divide(mean - risk_free_rate, std_dev, out=sharpe, where=std_dev > 0)
+    return _pad(sharpe * 252**0.5, len(returns))
+
+
+def calculate_rolling_volatility(returns: np.ndarray, window: int) -> np.ndarray:
+    _, std_dev = _rolling_mean_std(returns, window)
+    return _pad(std_dev * 252**0.5, len(returns))
+
+
+def calculate_rolling_drawdown(values: np.ndarray, window: int) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+
+    peaks = np.maximum(sliding_window_view(values, window).max(axis=1), 0.0)
+    drawdowns = np.zeros(len(peaks))
+    np.divide(values[window - 1 :] - peaks, peaks, out=drawdowns, where=peaks > 0)
+    return _pad(drawdowns, len(values))
+
+
+def _rolling_mean_std(
+    returns: np.ndarray, window: int
+) -> tuple[np.ndarray, np.ndarray]:
+    if window < 2:
+        raise ValueError("Rolling window must be at least 2 days")
+
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < window:
+        return np.empty(0), np.empty(0)
+
+    windows = sliding_window_view(returns, window)
+    std_dev = windows.std(axis=1, ddof=1)
+    # Constant windows can come out as tiny non-zero floats
+    std_dev[np.ptp(windows, axis=1) == 0] = 0.0
+    return windows.mean(axis=1), std_dev
+
+
+def _pad(rolling: np.ndarray, length: int) -> np.ndarray:
+    padded = np.full(length, np.nan)
+    if len(rolling):
+        padded[length - len(rolling) :] = rolling
+    return padded
+
+
+# ---------------------------------------------------------------------------
+# Streaming metrics
+# ---------------------------------------------------------------------------
+
+
+class StreamingMetrics:
+    """
+    Sharpe, volatility and max drawdown updated one day at a time.
+
+    Returns are accumulated with Welford's algorithm and drawdown with a
+    running peak, so each ``update`` is O(1) and the properties always match
+    the ``*_array`` functions on everything seen so far.
+    """
 
-    return Decimal(statistics.stdev(returns)) * (252 ** Decimal("0.5"))
+    def __init__(self, risk_free_rate: float = 0.04 / 252):
+        self.risk_free_rate = risk_free_rate
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min_return = np.inf
+        self._max_return = -np.inf
+        self._peak = 0.0
+        self._peak_date: date | None = None
+        self.max_drawdown = 0.0
+        self.max_drawdown_duration = 0
+
+    def update(self, day: date, value: float, daily_return: float | None = None):
+        """
+        Add one day. Pass ``daily_return=None`` for the first day of a series,
+        which has a value but no return.
+        """
+        if daily_return is not None:
+            self.count += 1
+            delta = daily_return - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (daily_return - self._mean)
+            self._min_return = min(self._min_return, daily_return)
+            self._max_return = max(self._max_return, daily_return)
+
+        if value > self._peak:
+            self._peak = value
+            self._peak_date = day
+        if self._peak > 0 and self._peak_date is not None:
+            drawdown = (value - self._peak) / self._peak
+            if drawdown < self.max_drawdown:
+                self.max_drawdown = drawdown
+                self.max_drawdown_duration = (day - self._peak_date).days
+
+    @property
+    def std_dev(self) -> float:
+        if self.count < 2 or self._min_return == self._max_return:
+            return 0.0
+        return (self._m2 / (self.count - 1)) ** 0.5
+
+    @property
+    def volatility(self) -> float:
+        return self.std_dev * 252**0.5
+
+    @property
+    def sharpe(self) -> float:
+        std_dev = self.std_dev
+        if std_dev == 0:
+            return 0.0
+        return (self._mean - self.risk_free_rate) / std_dev * 252**0.5
@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from app.backtesting.actions import Action
 from app.backtesting.context import BacktestContext
+from app.backtesting.trading_calendar import TradingCalendar
 
 
 class BacktestStrategy(ABC):
@@ -18,3 +21,29 @@ class BacktestStrategy(ABC):
     @abstractmethod
     def get_asset_ids(self) -> list[int]:
         pass
+
+    def plan(self, calendar: TradingCalendar, prices: np.ndarray) -> np.ndarray | None:
+        """
+        Optional vectorised alternative to ``on_day``.
+
+        Given the trading calendar and the matching (days x assets) price matrix
+        (columns in ``get_asset_ids()`` order, NaN where a price is missing),
+        return a float array of the same shape holding the dollar amount bought
+        on each day, with NaN where the strategy takes no action. The engine
+        applies the plan in one pass and must get exactly the same result as
+        calling ``on_day`` each day. Return None to be driven day by day.
+        """
+        return None
+
+    def plan_paths(
+        self, calendar: TradingCalendar, prices: np.ndarray
+    ) -> np.ndarray | None:
+        """
+        ``plan`` for a batch of price paths, used by the Monte Carlo simulator.
+
+        ``prices`` is a (paths x days x assets) array and the returned plan
+        has the same shape. Path-dependent strategies evaluate their
+        recurrence for every path at once, looping over days at most. Return
+        None if the strategy cannot be simulated in a batch.
+        """
+        return None
@@ -1,8 +1,11 @@
 from decimal import Decimal
 
+import numpy as np
+
 from app.backtesting.actions import Action, BuyAction
 from app.backtesting.context import BacktestContext
 from app.backtesting.strategies.base import BacktestStrategy
+from app.backtesting.trading_calendar import TradingCalendar
 
 
 class BuyAndHoldStrategy(BacktestStrategy):
@@ -24,6 +27,19 @@ class BuyAndHoldStrategy(BacktestStrategy):
 
         return actions
 
+    def plan(self, calendar: TradingCalendar, prices: np.ndarray) -> np.ndarray:
+        cash_flows = np.full(prices.shape, np.nan)
+        if len(calendar):
+            cash_flows[..., 0, :] = [
+                float(self.initial_investment * Decimal(str(weight)))
+                for weight in self.allocation.values()
+            ]
+        return cash_flows
+
+    def plan_paths(self, calendar: TradingCalendar, prices: np.ndarray) -> np.ndarray:
+        # The plan only depends on the calendar, so it broadcasts over paths
+        return self.plan(calendar, prices)
+
     def get_parameters(self) -> dict:
         return {
             "strategy": "buy_and_hold",
@@ -1,10 +1,12 @@
 from datetime import date
 
+import numpy as np
 from polars import Decimal
 
 from app.backtesting.actions import Action, BuyAction
 from app.backtesting.context import BacktestContext
 from app.backtesting.strategies.base import BacktestStrategy
+from app.backtesting.trading_calendar import CalendarPeriod, TradingCalendar
 
 
 class DCAStrategy(BacktestStrategy):
@@ -38,27 +40,57 @@ class DCAStrategy(BacktestStrategy):
         return []
 
     def _should_invest_today(self, current_date: date) -> bool:
-        if self.last_investment_date is None:
+        should_invest = self._is_investment_day(
+            self.frequency, current_date, self.last_investment_date
+        )
+        if should_invest:
             self.last_investment_date = current_date
+
+        return should_invest
+
+    @staticmethod
+    def _is_investment_day(
+        frequency: str, current_date: date, last_investment_date: date | None
+    ) -> bool:
+        if last_investment_date is None:
             return True
 
+        if frequency == "daily":
+            return True
+        elif frequency == "weekly":
+            days_passed = (current_date - last_investment_date).days
+            return days_passed >= 7
+        elif frequency == "monthly":
+            return (
+                current_date.month != last_investment_date.month
+                or current_date.year != last_investment_date.year
+            )
+
+        return False
+
+    def plan(self, calendar: TradingCalendar, prices: np.ndarray) -> np.ndarray:
         if self.frequency == "daily":
-            should_invest = True
+            investment_days = np.arange(len(calendar))
         elif self.frequency == "weekly":
-            days_passed = (current_date - self.last_investment_date).days
-            should_invest = days_passed >= 7
+            investment_days = np.array(calendar.every_n_days(7), dtype=int)
         elif self.frequency == "monthly":
-            should_invest = (
-                current_date.month != self.last_investment_date.month
-                or current_date.year != self.last_investment_date.year
+            # The first calendar day always starts a month, so it gets the
+            # initial investment and each later month start gets a top-up
+            investment_days = np.flatnonzero(
+                calendar.period_start_mask(CalendarPeriod.MONTH)
             )
         else:
-            should_invest = False
+            investment_days = np.arange(min(len(calendar), 1))
 
-        if should_invest:
-            self.last_investment_date = current_date
+        cash_flows = np.full(prices.shape, np.nan)
+        if len(investment_days):
+            cash_flows[..., investment_days[0], 0] = float(self.initial_investment)
+            cash_flows[..., investment_days[1:], 0] = float(self.amount_per_period)
+        return cash_flows
 
-        return should_invest
+    def plan_paths(self, calendar: TradingCalendar, prices: np.ndarray) -> np.ndarray:
+        # The plan only depends on the calendar, so it broadcasts over paths
+        return self.plan(calendar, prices)
 
     def get_parameters(self) -> dict:
         return {
@@ -1,10 +1,14 @@
+from collections.abc import Sequence
 from datetime import date
 from decimal import Decimal
 
+import numpy as np
+
 from app.backtesting.actions import Action, BuyAction
+from app.backtesting.columnar import to_decimal
 from app.backtesting.context import BacktestContext
 from app.backtesting.strategies.base import BacktestStrategy
-from app.services.price_service import PriceService
+from app.backtesting.trading_calendar import CalendarPeriod, TradingCalendar
 
 
 class VAStrategy(BacktestStrategy):
@@ -13,14 +17,16 @@ class VAStrategy(BacktestStrategy):
         asset_id: int,
         initial_investment: Decimal,
         target_increment_amount: Decimal,
-        trading_days=list[date],
-        price_service=PriceService,
+        trading_days: TradingCalendar | Sequence[date] | None = None,
     ):
         self.asset_id = asset_id
         self.initial_investment = initial_investment
         self.target_increment_amount = target_increment_amount
-        self.trading_days = trading_days or []
-        self.price_service = price_service
+        self.calendar = (
+            trading_days
+            if isinstance(trading_days, TradingCalendar)
+            else TradingCalendar(trading_days or [])
+        )
         self.period_number = 0
 
     def on_day(self, context: BacktestContext) -> list[Action]:
@@ -40,9 +46,75 @@ class VAStrategy(BacktestStrategy):
         return []
 
     def _should_invest_today(self, current_date: date) -> bool:
-        return self.price_service.is_first_trading_day_of_month(
-            current_date, self.trading_days
+        return self.calendar.is_first_trading_day_of_month(current_date)
+
+    def plan(self, calendar: TradingCalendar, prices: np.ndarray) -> np.ndarray:
+        """
+        Value averaging is path dependent: each top-up depends on the value
+        reached by earlier ones. Holdings only change on investment days, so
+        the recurrence is evaluated once per month rather than once per day.
+        """
+        cash_flows = np.full(prices.shape, np.nan)
+        price = prices[:, 0]
+        shares = 0.0
+        period_number = 0
+
+        investment_days = np.flatnonzero(
+            calendar.period_start_mask(CalendarPeriod.MONTH)
         )
+        for i in investment_days:
+            target_value = self.initial_investment + (
+                self.target_increment_amount * period_number
+            )
+            current_value = 0
+            if i > 0:
+                # Matches the engine's valuation: a missing price counts as zero
+                previous_price = np.nan_to_num(price[i - 1])
+                current_value = to_decimal(max(shares, 0.0) * previous_price)
+            shortfall = target_value - current_value
+
+            if shortfall > 0:
+                period_number += 1
+                cash_flows[i, 0] = float(shortfall)
+                if not np.isnan(price[i]):
+                    shares += float(shortfall) / price[i]
+
+        return cash_flows
+
+    def plan_paths(self, calendar: TradingCalendar, prices: np.ndarray) -> np.ndarray:
+        """
+        The ``plan`` recurrence evaluated for every path at once: each path
+        keeps its own shares and period number, and the loop only runs over
+        the investment days of ``calendar``. Uses float arithmetic, so it
+        agrees with ``plan`` to rounding rather than bit for bit.
+        """
+        cash_flows = np.full(prices.shape, np.nan)
+        price = prices[..., 0]
+        shares = np.zeros(price.shape[:-1])
+        period_number = np.zeros(price.shape[:-1])
+        initial_investment = float(self.initial_investment)
+        target_increment_amount = float(self.target_increment_amount)
+
+        investment_days = np.flatnonzero(
+            calendar.period_start_mask(CalendarPeriod.MONTH)
+        )
+        for i in investment_days:
+            target_value = initial_investment + target_increment_amount * period_number
+            current_value = 0.0
+            if i > 0:
+                previous_price = np.nan_to_num(price[..., i - 1])
+                current_value = np.maximum(shares, 0.0) * previous_price
+            shortfall = target_value - current_value
+
+            invest = shortfall > 0
+            period_number += invest
+            cash_flows[..., i, 0] = np.where(invest, shortfall, np.nan)
+            bought = invest & ~np.isnan(price[..., i])
+            shares += np.divide(
+                shortfall, price[..., i], out=np.zeros_like(shares), where=bought
+            )
+
+        return cash_flows
 
     def get_parameters(self) -> dict:
         return {
@@ -0,0 +1,115 @@
+from collections.abc import Iterable, Sequence
+from datetime import date, timedelta
+from enum import Enum
+
+import numpy as np
+
+
+class CalendarPeriod(str, Enum):
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+
+
+PERIOD_KEYS = {
+    CalendarPeriod.WEEK: lambda d: d.isocalendar()[:2],
+    CalendarPeriod.MONTH: lambda d: (d.year, d.month),
+    CalendarPeriod.QUARTER: lambda d: (d.year, (d.month - 1) // 3),
+}
+
+
+class TradingCalendar(Sequence):
+    """
+    Sorted trading days with precomputed period boundaries.
+
+    The first and last trading day of every week, month and quarter are worked
+    out once on construction, so schedule checks are O(1) set lookups instead
+    of scans over the whole trading-day list.
+    """
+
+    def __init__(self, trading_days: Iterable[date]):
+        self.days: list[date] = sorted(set(trading_days))
+        self.ordinals = np.array([d.toordinal() for d in self.days], dtype=np.int64)
+        self._positions = {day: i for i, day in enumerate(self.days)}
+        self._period_starts: dict[CalendarPeriod, frozenset[date]] = {}
+        self._period_ends: dict[CalendarPeriod, frozenset[date]] = {}
+
+        for period, key in PERIOD_KEYS.items():
+            firsts: dict[tuple, date] = {}
+            lasts: dict[tuple, date] = {}
+            for day in self.days:
+                period_key = key(day)
+                firsts.setdefault(period_key, day)
+                lasts[period_key] = day
+            self._period_starts[period] = frozenset(firsts.values())
+            self._period_ends[period] = frozenset(lasts.values())
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __getitem__(self, index):
+        return self.days[index]
+
+    def __contains__(self, day) -> bool:
+        return day in self._positions
+
+    def index(self, day, start: int = 0, stop: int | None = None) -> int:
+        position = self._positions.get(day)
+        if (
+            position is None
+            or position < start
+            or (stop is not None and position >= stop)
+        ):
+            raise ValueError(f"{day} is not a trading day")
+        return position
+
+    def index_on_or_after(self, day: date) -> int:
+        """Position of the first trading day on or after ``day`` (len if none)."""
+        return int(np.searchsorted(self.ordinals, day.toordinal(), side="left"))
+
+    def is_period_start(self, day: date, period: CalendarPeriod) -> bool:
+        return day in self._period_starts[period]
+
+    def is_period_end(self, day: date, period: CalendarPeriod) -> bool:
+        return day in self._period_ends[period]
+
+    def period_start_mask(self, period: CalendarPeriod) -> np.ndarray:
+        """Boolean array marking the first trading day of each period."""
+        starts = self._period_starts[period]
+        return np.array([day in starts for day in self.days], dtype=bool)
+
+    def period_end_mask(self, period: CalendarPeriod) -> np.ndarray:
+        """Boolean array marking the last trading day of each period."""
+        ends = self._period_ends[period]
+        return np.array([day in ends for day in self.days], dtype=bool)
+
+    def is_first_trading_day_of_week(self, day: date) -> bool:
+        return self.is_period_start(day, CalendarPeriod.WEEK)
+
+    def is_first_trading_day_of_month(self, day: date) -> bool:
+        return self.is_period_start(day, CalendarPeriod.MONTH)
+
+    def is_first_trading_day_of_quarter(self, day: date) -> bool:
+        return self.is_period_start(day, CalendarPeriod.QUARTER)
+
+    def is_last_trading_day_of_week(self, day: date) -> bool:
+        return self.is_period_end(day, CalendarPeriod.WEEK)
+
+    def is_last_trading_day_of_month(self, day: date) -> bool:
+        return self.is_period_end(day, CalendarPeriod.MONTH)
+
+    def is_last_trading_day_of_quarter(self, day: date) -> bool:
+        return self.is_period_end(day, CalendarPeriod.QUARTER)
+
+    def every_n_days(self, days: int) -> list[int]:
+        """
+        Positions of a schedule that starts on the first trading day and then
+        takes the first trading day at least ``days`` calendar days after the
+        previous one.
+        """
+        positions = []
+        i = 0
+        while i < len(self.days):
+            positions.append(i)
+            i = self.index_on_or_after(self.days[i] + timedelta(days=days))
+        return positions
@@ -15,6 +15,16 @@ class Settings(BaseSettings):
     ADMIN_CLIENT_ID: str = os.getenv("ADMIN_CLIENT_ID", "")
     AUTH0_CLIENT_SECRET: str = os.getenv("AUTH0_CLIENT_SECRET", "")
     OPEN_AI_API_KEY: str = os.getenv("OPEN_AI_API_KEY", "")
+    PRICE_REFRESH_IN_APP: bool = os.getenv("PRICE_REFRESH_IN_APP", "true") == "true"
+    PRICE_REFRESH_INTERVAL_SECONDS: int = int(
+        os.getenv("PRICE_REFRESH_INTERVAL_SECONDS", "900")
+    )
+    PRICE_CACHE_MAX_BYTES: int = int(
+        os.getenv("PRICE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    RETURN_MODEL_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("RETURN_MODEL_CACHE_MAX_ENTRIES", "256")
+    )
     AUTH0_AUDIENCE: str = f"https://{AUTH0_DOMAIN}/api/v2/"
 
 
@@ -0,0 +1,164 @@
+"""
+Timeseries ingestion benchmark: rows/sec of the write path.
+Run from the backend directory:
+    uv run python -m app.core.data_ingestion.benchmark_ingestion [tickers] [database_url]
+
+Loads ~10 years of synthetic daily prices per ticker (500 tickers by default)
+into an empty timeseries table, once with the old per-row write path
+(existing-timestamp scan, iterrows and one ORM object per row) and once with
+the bulk path used by update_all_assets. Defaults to in-memory SQLite; pass a
+Postgres URL to measure the COPY path. Tables are created if missing and
+emptied before each run, so never point it at a real database.
+
+Importing app.core needs DATABASE_URL to be set (e.g. from .env), although
+that database is never connected to.
+"""
+
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.data_ingestion.update_timeseries import (
+    DOWNLOAD_BATCH_SIZE,
+    insert_timeseries,
+    to_timeseries_rows,
+)
+from app.database import Base
+from app.models import Asset, Timeseries
+
+# ---------------------------------------------------------------------------
+# Shared config
+# ---------------------------------------------------------------------------
+
+TICKERS = 500
+DAYS = 2_520
+SEED = 42
+
+
+def make_histories(n_tickers: int) -> dict[int, pd.DataFrame]:
+    rng = np.random.default_rng(SEED)
+    dates = pd.bdate_range("2014-01-01", periods=DAYS)
+    histories = {}
+    for asset_id in range(1, n_tickers + 1):
+        prices = 100.0 * np.cumprod(1 + rng.normal(0.0004, 0.012, DAYS))
+        histories[asset_id] = pd.DataFrame(
+            {
+                "date": dates,
+                "open": prices,
+                "high": prices * 1.01,
+                "low": prices * 0.99,
+                "close": prices,
+                "adj_close": prices,
+                "volume": rng.integers(1_000, 1_000_000, DAYS),
+                "stock_splits": 0.0,
+            }
+        )
+    return histories
+
+
+def make_session_factory(database_url: str | None, n_tickers: int) -> sessionmaker:
+    if database_url:
+        engine = create_engine(database_url)
+    else:
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    Base.metadata.create_all(engine, tables=[Asset.__table__, Timeseries.__table__])
+    session_factory = sessionmaker(bind=engine)
+
+    db = session_factory()
+    db.query(Timeseries).delete()
+    db.query(Asset).filter(Asset.id <= n_tickers).delete()
+    db.add_all(
+        Asset(id=i, asset_name=f"Benchmark {i}", ticker=f"BENCH{i}")
+        for i in range(1, n_tickers + 1)
+    )
+    db.commit()
+    db.close()
+    return session_factory
+
+
+def write_per_row(db: Session, asset_id: int, history: pd.DataFrame) -> int:
+    """The write path update_all_assets used before bulk inserts."""
+    existing_timestamps = set(
+        row[0]
+        for row in db.query(Timeseries.timestamp)
+        .filter(Timeseries.asset_id == asset_id)
+        .all()
+    )
+    new_entries = []
+    for index, row in history.iterrows():
+        timestamp = row.date.to_pydatetime()
+        if timestamp.date() == datetime.now().date():
+            continue
+        if timestamp not in existing_timestamps:
+            new_entries.append(
+                Timeseries(
+                    asset_id=asset_id,
+                    close=float(row.close),
+                    volume=int(row.volume) if not pd.isna(row.volume) else None,
+                    timestamp=timestamp,
+                    adj_close=float(row.adj_close),
+                    high=float(row.high),
+                    low=float(row.low),
+                    open=float(row.open),
+                )
+            )
+    db.bulk_save_objects(new_entries)
+    db.commit()
+    return len(new_entries)
+
+
+def write_bulk(db: Session, histories: dict[int, pd.DataFrame]) -> int:
+    """Batches of DOWNLOAD_BATCH_SIZE assets, as update_all_assets writes them."""
+    asset_ids = list(histories)
+    rows_written = 0
+    for i in range(0, len(asset_ids), DOWNLOAD_BATCH_SIZE):
+        rows = pd.concat(
+            [
+                to_timeseries_rows(asset_id, histories[asset_id])
+                for asset_id in asset_ids[i : i + DOWNLOAD_BATCH_SIZE]
+            ],
+            ignore_index=True,
+        )
+        rows_written += insert_timeseries(db, rows)
+        db.commit()
+    return rows_written
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+def run_benchmark(n_tickers: int = TICKERS, database_url: str | None = None):
+    histories = make_histories(n_tickers)
+    print(f"\n{n_tickers} tickers x {DAYS} days = {n_tickers * DAYS:,} rows")
+    print(f"\n{'Write path':<12}  {'rows':>10}  {'seconds':>9}  {'rows/s':>10}")
+    print("-" * 47)
+
+    for name in ("per-row", "bulk"):
+        db = make_session_factory(database_url, n_tickers)()
+        t0 = time.perf_counter()
+        if name == "per-row":
+            rows = sum(write_per_row(db, a, h) for a, h in histories.items())
+        else:
+            rows = write_bulk(db, histories)
+        elapsed = time.perf_counter() - t0
+        db.close()
+        print(f"{name:<12}  {rows:>10,}  {elapsed:>9.2f}  {rows / elapsed:>10,.0f}")
+
+
+if __name__ == "__main__":
+    run_benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else TICKERS,
+        sys.argv[2] if len(sys.argv) > 2 else None,
+    )
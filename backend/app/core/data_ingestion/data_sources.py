@@ -0,0 +1,163 @@
+"""
+Sources of daily price history for timeseries ingestion.
+
+``update_all_assets`` only talks to a ``PriceDataSource``, so the live Yahoo
+Finance source can be swapped for ``InMemoryDataSource`` in tests or for
+``FileDataSource`` (a directory of CSV or Parquet files) when working offline
+or benchmarking.
+"""
+
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Protocol
+
+import pandas as pd
+import polars as pl
+import yfinance as yf
+from yfinance import shared as yf_shared
+
+PRICE_COLUMNS = ["date", "open", "high", "low", "close", "adj_close", "volume"]
+
+
+ACTION_COLUMNS = ["stock_splits", "dividends"]
+
+# yf.download keeps its results and errors in module globals that every call
+# resets, so concurrent calls overwrite each other's data
+_yf_download_lock = threading.Lock()
+
+
+class IncompleteDownloadError(Exception):
+    """
+    Some tickers in a batch came back without prices. ``histories`` holds
+    the ones that were downloaded, so they can still be stored.
+    """
+
+    def __init__(self, failed_tickers: list[str], histories: dict[str, pd.DataFrame]):
+        super().__init__(f"No prices downloaded for {failed_tickers}")
+        self.failed_tickers = failed_tickers
+        self.histories = histories
+
+
+def empty_history() -> pd.DataFrame:
+    return pd.DataFrame(columns=PRICE_COLUMNS + ACTION_COLUMNS)
+
+
+def _normalise(history: pd.DataFrame, start: date) -> pd.DataFrame:
+    history = history.copy()
+    history["date"] = pd.to_datetime(history["date"])
+    for column in ACTION_COLUMNS:
+        if column not in history.columns:
+            history[column] = 0.0
+    history = history[history["date"] >= pd.Timestamp(start)]
+    return history.reset_index(drop=True)
+
+
+class PriceDataSource(Protocol):
+    def get_histories(self, tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+        """
+        Daily price history from ``start`` (inclusive) for each ticker.
+
+        Frames have the columns in ``PRICE_COLUMNS`` plus ``stock_splits``
+        (the split ratio on split days, 0 otherwise) and ``dividends`` (per
+        share on ex-dividend days, 0 otherwise), one row per trading day.
+        Unknown tickers are missing from the result or map to an empty frame.
+        Sources that can tell a failed download apart raise
+        ``IncompleteDownloadError`` instead. Called concurrently from several
+        download threads.
+        """
+        ...
+
+
+class YFinanceDataSource:
+    """
+    Downloads daily prices, splits and dividends from Yahoo Finance.
+
+    Downloads run one at a time, whichever thread calls. Every ticker is
+    requested from its latest stored day, so a ticker that comes back with
+    no rows (or that yfinance reports an error for) failed to download.
+    """
+
+    def get_histories(self, tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+        with _yf_download_lock:
+            data = yf.download(
+                tickers,
+                start=start.isoformat(),
+                auto_adjust=False,
+                actions=True,
+                group_by="ticker",
+                threads=False,
+                progress=False,
+            )
+            errors = set(yf_shared._ERRORS)
+
+        downloaded = set()
+        if data is not None and not data.empty:
+            downloaded = set(data.columns.get_level_values(0))
+
+        histories = {}
+        for ticker in tickers:
+            if ticker not in downloaded or ticker.upper() in errors:
+                continue
+            history = data[ticker].dropna(subset=["Close"]).reset_index()
+            if history.empty:
+                continue
+            history.columns = history.columns.str.lower().str.replace(" ", "_")
+            histories[ticker] = _normalise(history, start)
+
+        failed_tickers = [ticker for ticker in tickers if ticker not in histories]
+        if failed_tickers:
+            raise IncompleteDownloadError(failed_tickers, histories)
+        return histories
+
+
+class InMemoryDataSource:
+    """
+    Serves fixed price histories without any network access.
+
+    Every batch requested is recorded in ``requested`` as (tickers, start) so
+    tests can check what was downloaded.
+    """
+
+    def __init__(self, histories: dict[str, pd.DataFrame] | None = None):
+        self.histories = histories or {}
+        self.requested: list[tuple[list[str], date]] = []
+
+    def get_histories(self, tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+        self.requested.append((list(tickers), start))
+        return {
+            ticker: _normalise(self.histories[ticker], start)
+            for ticker in tickers
+            if ticker in self.histories
+        }
+
+
+class FileDataSource:
+    """
+    Reads ``<ticker>.csv`` or ``<ticker>.parquet`` files from a directory.
+
+    A local stand-in for Yahoo Finance when testing or benchmarking ingestion.
+    Files use the ``PRICE_COLUMNS`` layout, optionally with ``stock_splits``
+    and ``dividends``.
+    """
+
+    def __init__(self, directory: str | Path, file_format: str = "csv"):
+        if file_format not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported file format: {file_format}")
+        self.directory = Path(directory)
+        self.file_format = file_format
+
+    def get_histories(self, tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+        histories = {}
+        for ticker in tickers:
+            path = self.directory / f"{ticker}.{self.file_format}"
+            if path.exists():
+                histories[ticker] = _normalise(self._read(path), start)
+        return histories
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        if self.file_format == "csv":
+            return pd.read_csv(path, parse_dates=["date"])
+        # Read through polars so Parquet works without pyarrow installed
+        frame = pl.read_parquet(path)
+        return pd.DataFrame({col: frame[col].to_numpy() for col in frame.columns})
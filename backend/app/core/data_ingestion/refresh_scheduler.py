@@ -0,0 +1,192 @@
+"""
+Background refresh of stale prices.
+
+Price ingestion used to run inside whichever HTTP request first noticed that
+prices were stale. ``PriceRefreshScheduler`` moves it to a background thread
+in the API process, or to a standalone worker started with
+``python -m app.core.data_ingestion.refresh_scheduler``, so request handlers
+only ever read prices.
+
+Refreshes are single-flight: an in-process lock stops concurrent triggers in
+one process, and on Postgres a session-level advisory lock stops several API
+processes or workers from ingesting at the same time.
+"""
+
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.config.settings import settings
+from app.core.data_ingestion.data_sources import PriceDataSource
+from app.logger import logger
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+PRICE_REFRESH_LOCK_KEY = 7_348_211
+
+
+class RefreshOutcome(str, Enum):
+    REFRESHED = "refreshed"
+    # Some download batches failed; the rest of the prices were stored
+    PARTIAL = "partial"
+    FRESH = "fresh"
+    IN_PROGRESS = "in_progress"
+
+
+class PriceRefreshScheduler:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        data_source: PriceDataSource | None = None,
+        interval_seconds: float = settings.PRICE_REFRESH_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.data_source = data_source
+        self.interval_seconds = interval_seconds
+        self.last_refreshed: datetime | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_refreshing(self) -> bool:
+        return self._lock.locked()
+
+    def refresh(self, force: bool = False) -> RefreshOutcome:
+        """
+        Ingest new prices if they are stale (or always, with ``force``).
+
+        Returns immediately with ``IN_PROGRESS`` if another refresh is already
+        running in this or any other process, and ``PARTIAL`` if some price
+        downloads failed.
+        """
+        if not self._lock.acquire(blocking=False):
+            logger.info("Price refresh already in progress, skipping")
+            return RefreshOutcome.IN_PROGRESS
+
+        try:
+            db = self._open_session()
+            try:
+                if not force and not crud.check_prices_stale(db):
+                    return RefreshOutcome.FRESH
+
+                with self._advisory_lock(db) as acquired:
+                    if not acquired:
+                        logger.info(
+                            "Price refresh running in another process, skipping"
+                        )
+                        return RefreshOutcome.IN_PROGRESS
+                    failed_batches = self._ingest(db)
+            finally:
+                db.close()
+        finally:
+            self._lock.release()
+
+        if failed_batches:
+            return RefreshOutcome.PARTIAL
+        self.last_refreshed = datetime.now()
+        return RefreshOutcome.REFRESHED
+
+    def start(self):
+        """Refresh now and then every ``interval_seconds`` on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run_forever, name="price-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_forever(self):
+        logger.info(
+            f"Price refresh scheduler started, checking every {self.interval_seconds}s"
+        )
+        while not self._stop.is_set():
+            try:
+                outcome = self.refresh()
+                if outcome == RefreshOutcome.REFRESHED:
+                    logger.info("Scheduled price refresh completed")
+                elif outcome == RefreshOutcome.PARTIAL:
+                    logger.warning("Scheduled price refresh had failed downloads")
+            except Exception as e:
+                logger.error(f"Scheduled price refresh failed: {e}", exc_info=True)
+            self._stop.wait(self.interval_seconds)
+
+    def _open_session(self) -> Session:
+        if self.session_factory is None:
+            from app.database import SessionLocal
+
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def _ingest(self, db: Session) -> int:
+        """Returns the number of failed download batches."""
+        from app.core.data_ingestion.update_timeseries import (
+            update_all_assets,  # lazy import prevents circular import
+        )
+        from app.services.portfolio_valuation import (
+            update_all_portfolio_valuations,  # lazy import prevents circular import
+        )
+
+        logger.info("Prices stale. Refreshing now")
+        failed_batches = update_all_assets(db, self.data_source)
+        update_all_portfolio_valuations(db)
+        return failed_batches
+
+    @staticmethod
+    @contextmanager
+    def _advisory_lock(db: Session) -> Iterator[bool]:
+        """
+        Hold a Postgres advisory lock for the duration of the block.
+
+        The lock is taken on its own connection because the session hands its
+        connection back to the pool on every commit during ingestion.
+        """
+        engine = db.get_bind()
+        if engine.dialect.name != "postgresql":
+            yield True
+            return
+
+        with engine.connect() as connection:
+            acquired = bool(
+                connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"),
+                    {"key": PRICE_REFRESH_LOCK_KEY},
+                ).scalar()
+            )
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"),
+                        {"key": PRICE_REFRESH_LOCK_KEY},
+                    )
+
+
+price_refresh_scheduler = PriceRefreshScheduler()
+
+
+def main():
+    try:
+        price_refresh_scheduler.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Price refresh worker stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
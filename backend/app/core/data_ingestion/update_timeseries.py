@@ -1,17 +1,27 @@
+import io
 import logging
 import sys
-from datetime import datetime, timedelta
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 import pandas as pd
-import pytz
-import yfinance as yf
-from sqlalchemy import func
+from sqlalchemy import BigInteger, cast, func, text
 from sqlalchemy.orm import Session
 
 from app import crud
-from app.database import SessionLocal
-from app.models import Asset, Timeseries
+from app.core.data_ingestion.data_sources import (
+    IncompleteDownloadError,
+    PriceDataSource,
+    YFinanceDataSource,
+    empty_history,
+)
+from app.database import SessionLocal, insert_for_dialect
+from app.models import Asset, CorporateAction, Timeseries
+from app.monte_carlo.model_cache import return_model_cache
+from app.services.price_cache import price_cache
 
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
@@ -30,36 +40,249 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Tickers per download request and concurrent download requests. Yahoo
+# downloads are serialised by the data source, but still overlap with writes
+DOWNLOAD_BATCH_SIZE = 20
+MAX_DOWNLOAD_WORKERS = 4
+HISTORY_YEARS = 10
+
+TIMESERIES_COLUMNS = [
+    "asset_id",
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "adj_close",
+    "volume",
+]
+
+
+def plan_downloads(
+    assets: list[Asset],
+    latest_timestamps: dict[int, datetime],
+    batch_size: int = DOWNLOAD_BATCH_SIZE,
+) -> list[tuple[date, list[Asset]]]:
+    """
+    Group assets into download batches that share a start date.
+
+    Each asset only needs prices from its latest stored day onwards, or the
+    last ``HISTORY_YEARS`` of history if it has none. After a normal daily
+    run most assets share the same start date, so they batch together.
+    """
+    default_start = (datetime.now() - timedelta(days=365 * HISTORY_YEARS)).date()
+    by_start: dict[date, list[Asset]] = defaultdict(list)
+    for asset in assets:
+        last_timestamp = latest_timestamps.get(asset.id)
+        start = last_timestamp.date() if last_timestamp else default_start
+        by_start[start].append(asset)
+
+    return [
+        (start, batch_assets[i : i + batch_size])
+        for start, batch_assets in sorted(by_start.items())
+        for i in range(0, len(batch_assets), batch_size)
+    ]
+
+
+def extract_corporate_actions(
+    history: pd.DataFrame,
+) -> list[tuple[datetime, str, float]]:
+    """(ex_date, action_type, value) for every split and dividend, latest first."""
+    if history.empty:
+        return []
+
+    actions = []
+    for column, action_type in (("stock_splits", "split"), ("dividends", "dividend")):
+        values = history[column].fillna(0)
+        for day, value in zip(history.loc[values != 0, "date"], values[values != 0]):
+            actions.append(
+                (pd.Timestamp(day).to_pydatetime(), action_type, float(value))
+            )
+    return sorted(actions, key=lambda action: action[0], reverse=True)
+
+
+def apply_corporate_actions(db: Session, asset_id: int, history: pd.DataFrame) -> int:
+    """
+    Record splits and dividends in ``history`` that have not been seen before
+    and rescale the stored rows before each ex-date with one UPDATE per event.
+
+    Yahoo returns downloaded prices already adjusted for these events, so this
+    must run before the downloaded rows are inserted. Events are applied latest
+    first, so stored prices are on the same scale as Yahoo's dividend amounts
+    by the time each dividend factor is worked out. Returns the number of new
+    events applied.
+    """
+    applied = 0
+    for ex_date, action_type, value in extract_corporate_actions(history):
+        if action_type == "split":
+            factor = 1 / value
+        else:
+            previous_close = _close_before(db, asset_id, history, ex_date)
+            factor = 1 - value / previous_close if previous_close else 1.0
+            if factor <= 0:
+                factor = 1.0
+
+        statement = (
+            insert_for_dialect(db, CorporateAction.__table__)
+            .values(
+                asset_id=asset_id,
+                ex_date=ex_date,
+                action_type=action_type,
+                value=value,
+                adjustment_factor=factor,
+                applied_at=datetime.now(),
+            )
+            .on_conflict_do_nothing(
+                index_elements=["asset_id", "ex_date", "action_type"]
+            )
+        )
+        if not db.connection().execute(statement).rowcount:
+            continue  # Already applied by an earlier run
+
+        before_ex_date = db.query(Timeseries).filter(
+            Timeseries.asset_id == asset_id, Timeseries.timestamp < ex_date
+        )
+        if action_type == "split":
+            before_ex_date.update(
+                {
+                    Timeseries.open: Timeseries.open * factor,
+                    Timeseries.high: Timeseries.high * factor,
+                    Timeseries.low: Timeseries.low * factor,
+                    Timeseries.close: Timeseries.close * factor,
+                    Timeseries.adj_close: Timeseries.adj_close * factor,
+                    Timeseries.volume: cast(
+                        func.round(Timeseries.volume * value), BigInteger
+                    ),
+                },
+                synchronize_session=False,
+            )
+        elif factor != 1.0:
+            before_ex_date.update(
+                {Timeseries.adj_close: Timeseries.adj_close * factor},
+                synchronize_session=False,
+            )
+        applied += 1
+
+    return applied
+
+
+def _close_before(
+    db: Session, asset_id: int, history: pd.DataFrame, ex_date: datetime
+) -> float | None:
+    earlier = history[history["date"] < pd.Timestamp(ex_date)]
+    if not earlier.empty:
+        return float(earlier["close"].iloc[-1])
+
+    stored = (
+        db.query(Timeseries.close)
+        .filter(Timeseries.asset_id == asset_id, Timeseries.timestamp < ex_date)
+        .order_by(Timeseries.timestamp.desc())
+        .first()
+    )
+    return float(stored[0]) if stored else None
+
+
+def to_timeseries_rows(asset_id: int, history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column-wise rows for the timeseries table. Today's (still incomplete) bar
+    and days without prices are dropped.
+    """
+    if history.empty:
+        return pd.DataFrame(columns=TIMESERIES_COLUMNS)
+
+    timestamps = pd.to_datetime(history["date"])
+    keep = (timestamps.dt.normalize() != pd.Timestamp(datetime.now().date())) & (
+        history[["close", "adj_close", "high", "low"]].notna().all(axis=1)
+    )
+    history = history[keep]
+    return pd.DataFrame(
+        {
+            "asset_id": asset_id,
+            "timestamp": timestamps[keep],
+            "open": history["open"].astype(float),
+            "high": history["high"].astype(float),
+            "low": history["low"].astype(float),
+            "close": history["close"].astype(float),
+            "adj_close": history["adj_close"].astype(float),
+            "volume": pd.to_numeric(history["volume"]).round().astype("Int64"),
+        },
+        columns=TIMESERIES_COLUMNS,
+    )
+
 
-def handle_stock_split(ticker: str, db: Session):
-    asset = db.query(Asset).filter(Asset.ticker == ticker).first()
-    if asset is None:
-        return
-    db.query(Timeseries).filter(Timeseries.asset_id == asset.id).delete()
+def insert_timeseries(db: Session, rows: pd.DataFrame) -> int:
+    """
+    Insert rows, skipping any (asset_id, timestamp) that is already stored.
+
+    On Postgres the rows are streamed with COPY into a temporary staging table
+    and merged with a single INSERT ... ON CONFLICT DO NOTHING. Other databases
+    get a multi-row INSERT with the same conflict handling. Does not commit.
+    Returns the number of rows inserted.
+    """
+    if rows.empty:
+        return 0
 
+    if db.get_bind().dialect.name == "postgresql":
+        return _copy_timeseries(db, rows)
+
+    # Plain Python values with None for missing volumes, as the driver needs
+    columns = {
+        col: rows[col].astype(object).where(rows[col].notna(), None).tolist()
+        for col in TIMESERIES_COLUMNS
+    }
+    columns["timestamp"] = list(rows["timestamp"].dt.to_pydatetime())
+    records = [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    statement = insert_for_dialect(db, Timeseries.__table__).on_conflict_do_nothing(
+        index_elements=["asset_id", "timestamp"]
+    )
+    return db.connection().execute(statement, records).rowcount
 
-def get_timeseries_data(ticker, db, last_timestamp=None):
-    asset = yf.download(ticker, auto_adjust=False)
-    split_info = yf.Ticker(ticker).splits
-    if not split_info.empty and last_timestamp is not None:
-        latest_split = max(split_info.reset_index()["Date"].to_list())
 
-        if last_timestamp.replace(tzinfo=pytz.UTC) <= latest_split.to_pydatetime():
-            handle_stock_split(ticker, db)
-            last_timestamp = None
+def _copy_timeseries(db: Session, rows: pd.DataFrame) -> int:
+    columns = ", ".join(TIMESERIES_COLUMNS)
+    buffer = io.StringIO()
+    rows.to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
 
-    start_date = (datetime.now() - timedelta(days=365 * 10)).strftime("%Y-%m-%d")
-    if last_timestamp:
-        start_date = last_timestamp.strftime("%Y-%m-%d")
+    db.execute(text("DROP TABLE IF EXISTS timeseries_staging"))
+    db.execute(
+        text(
+            "CREATE TEMP TABLE timeseries_staging "
+            "(LIKE timeseries INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+    )
+    with db.connection().connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY timeseries_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    result = db.execute(
+        text(
+            f"INSERT INTO timeseries ({columns}) "
+            f"SELECT {columns} FROM timeseries_staging "
+            "ON CONFLICT (asset_id, timestamp) DO NOTHING"
+        )
+    )
+    return result.rowcount
 
-    asset.columns = [col[0] for col in asset.columns]
-    asset = asset.reset_index()
-    asset.columns = asset.columns.str.lower().str.replace(" ", "_")
-    asset = asset[asset["date"] >= start_date]
-    return asset
 
+def update_all_assets(
+    db: Session,
+    data_source: PriceDataSource | None = None,
+    batch_size: int = DOWNLOAD_BATCH_SIZE,
+    max_workers: int = MAX_DOWNLOAD_WORKERS,
+) -> int:
+    """
+    Download missing prices for every asset and store them. Returns the
+    number of download batches that failed.
 
-def update_all_assets(db: Session):
+    Batches of tickers are downloaded concurrently on a bounded thread pool,
+    while this thread is the only one that writes to ``db``. Batches are
+    written as they arrive. If any batch fails, or comes back with tickers
+    missing, the refresh is not marked as complete, so the next run retries just the ranges that are still missing.
+    """
+    data_source = data_source or YFinanceDataSource()
     assets = db.query(Asset).all()
 
     latest_timestamps: dict[int, datetime] = dict(
@@ -68,50 +291,105 @@ def update_all_assets(db: Session):
         .all()
     )
 
-    for asset in assets:
-        last_timestamp = latest_timestamps.get(asset.id)
-        timeseries_data = get_timeseries_data(asset.ticker, db, last_timestamp)
-
-        existing_timestamps: set[datetime] = set(
-            row[0]
-            for row in db.query(Timeseries.timestamp)
-            .filter(Timeseries.asset_id == asset.id)
-            .all()
-        )
+    downloads = plan_downloads(assets, latest_timestamps, batch_size)
+    logger.info(
+        f"Downloading prices for {len(assets)} assets in {len(downloads)} batches"
+    )
+    failed_batches = 0
+    rows_written = 0
+    write_seconds = 0.0
 
-        new_entries = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(
+                data_source.get_histories, [a.ticker for a in batch], start
+            ): batch
+            for start, batch in downloads
+        }
 
-        for index, row in timeseries_data.iterrows():
-            timestamp = row.date.to_pydatetime()
-            if timestamp.date() == datetime.now().date():
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                histories = future.result()
+            except IncompleteDownloadError as e:
+                # Store what arrived, but leave the refresh unfinished
+                failed_batches += 1
+                logger.error(f"Failed to download {e.failed_tickers}")
+                histories = e.histories
+            except Exception as e:
+                failed_batches += 1
+                logger.error(
+                    f"Failed to download {[a.ticker for a in batch]}: {e}",
+                    exc_info=True,
+                )
                 continue
 
-            if timestamp not in existing_timestamps:
-                new_entries.append(
-                    Timeseries(
-                        asset_id=asset.id,
-                        close=float(row.close),
-                        volume=int(row.volume) if not pd.isna(row.volume) else None,
-                        timestamp=timestamp,
-                        adj_close=float(row.adj_close),
-                        high=float(row.high),
-                        low=float(row.low),
-                        open=float(row.open),
+            batch_rows = []
+            # Portfolio valuations that are now out of date, by the first
+            # date to revalue (None for all of them) -> asset ids
+            stale_valuations: dict[date | None, list[int]] = defaultdict(list)
+            for asset in batch:
+                history = histories.get(asset.ticker, empty_history())
+                asset_rows = to_timeseries_rows(asset.id, history)
+                batch_rows.append(asset_rows)
+
+                applied = apply_corporate_actions(db, asset.id, history)
+                if applied:
+                    logger.info(
+                        f"Applied {applied} split/dividend adjustment(s) to stored {asset.ticker} prices"
                     )
-                )
+                    stale_valuations[None].append(asset.id)
+                    continue
+
+                latest = latest_timestamps.get(asset.id)
+                new_timestamps = asset_rows["timestamp"]
+                if latest is not None:
+                    new_timestamps = new_timestamps[new_timestamps > latest]
+                if len(new_timestamps):
+                    stale_valuations[new_timestamps.min().date()].append(asset.id)
 
-        if new_entries:
-            db.bulk_save_objects(new_entries)
+            t0 = time.perf_counter()
+            # Empty frames would turn the timestamp column into objects
+            rows = pd.concat(
+                [r for r in batch_rows if not r.empty] or batch_rows,
+                ignore_index=True,
+            )
+            inserted = insert_timeseries(db, rows)
+            crud.refresh_latest_prices(db, [a.id for a in batch])
+            for from_date, asset_ids in stale_valuations.items():
+                crud.portfolio_valuation.delete_portfolio_valuations_for_assets(
+                    db, asset_ids, from_date
+                )
             db.commit()
-            logger.info(f"Inserted {len(new_entries)} entries for {asset.ticker}")
-        else:
-            logger.info(f"No new entries for {asset.ticker}")
+            write_seconds += time.perf_counter() - t0
+            rows_written += inserted
+            for asset in batch:
+                price_cache.invalidate(asset.id)
+                return_model_cache.invalidate(asset.id)
+            logger.info(
+                f"Inserted {inserted} of {len(rows)} downloaded rows for "
+                f"{[a.ticker for a in batch]}"
+            )
+
+    if write_seconds > 0:
+        logger.info(
+            f"Wrote {rows_written} rows in {write_seconds:.2f}s "
+            f"({rows_written / write_seconds:,.0f} rows/s)"
+        )
+
+    if failed_batches:
+        logger.error(
+            f"{failed_batches} download batch(es) failed, prices not marked as refreshed"
+        )
+        return failed_batches
+
     try:
         crud.mark_prices_as_refreshed(db)
     except Exception as e:
         logger.error(f"Failed to update last refresh date: {e}")
 
     logger.info("Timeseries data update completed!")
+    return 0
 
 
 def main():
@@ -120,7 +398,9 @@ def main():
     db = None
     try:
         db = SessionLocal()
-        update_all_assets(db)
+        if update_all_assets(db):
+            logger.error("Update finished with failed downloads")
+            return 1
         logger.info("Update completed successfully!")
         return 0
     except Exception as e:
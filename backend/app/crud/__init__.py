@@ -4,3 +4,5 @@ from .transaction import *  # noqa: F403
 from .user import *  # noqa: F403
 from .watchlist import *  # noqa: F403
 from .backtest import *  # noqa: F403
+from .portfolio_valuation import *  # noqa: F403
+from .position import *  # noqa: F403
@@ -0,0 +1,72 @@
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database import insert_for_dialect
+from app.models import PortfolioValuation, Transaction
+
+
+def get_latest_valuation_date(db: Session, user_id: str) -> date | None:
+    return (
+        db.query(func.max(PortfolioValuation.date))
+        .filter(PortfolioValuation.user_id == user_id)
+        .scalar()
+    )
+
+
+def get_portfolio_valuations(
+    db: Session, user_id: str, start_date: date | None = None
+) -> list[PortfolioValuation]:
+    query = db.query(PortfolioValuation).filter(PortfolioValuation.user_id == user_id)
+    if start_date is not None:
+        query = query.filter(PortfolioValuation.date >= start_date)
+    return query.order_by(PortfolioValuation.date).all()
+
+
+def upsert_portfolio_valuations(db: Session, rows: list[dict]) -> int:
+    """Insert valuation rows, overwriting any already stored for the same day."""
+    if not rows:
+        return 0
+
+    statement = insert_for_dialect(db, PortfolioValuation.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "date"],
+        set_={
+            column: statement.excluded[column]
+            for column in ("value", "cash_flow", "daily_return_val", "daily_return_pct")
+        },
+    )
+    db.execute(statement, rows)
+    return len(rows)
+
+
+def delete_portfolio_valuations(
+    db: Session, user_id: str, from_date: date | None = None
+) -> int:
+    """Drop a user's valuations from ``from_date`` on (all of them if None)."""
+    query = db.query(PortfolioValuation).filter(PortfolioValuation.user_id == user_id)
+    if from_date is not None:
+        query = query.filter(PortfolioValuation.date >= from_date)
+    return query.delete(synchronize_session=False)
+
+
+def delete_portfolio_valuations_for_assets(
+    db: Session, asset_ids: list[int], from_date: date | None = None
+) -> int:
+    """
+    Drop valuations from ``from_date`` on (all of them if None) for every user
+    who has ever traded one of ``asset_ids``.
+    """
+    if not asset_ids:
+        return 0
+
+    holders = (
+        select(Transaction.user_id)
+        .where(Transaction.asset_id.in_(asset_ids))
+        .distinct()
+    )
+    query = db.query(PortfolioValuation).filter(PortfolioValuation.user_id.in_(holders))
+    if from_date is not None:
+        query = query.filter(PortfolioValuation.date >= from_date)
+    return query.delete(synchronize_session=False)
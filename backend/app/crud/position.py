@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from sqlalchemy.orm import Session
+
+from app.models import Position, Transaction
+
+
+def get_positions(db: Session, user_id: str) -> list[Position]:
+    return (
+        db.query(Position)
+        .filter(Position.user_id == user_id)
+        .order_by(Position.asset_id)
+        .all()
+    )
+
+
+def get_position(
+    db: Session, user_id: str, asset_id: int, for_update: bool = False
+) -> Position | None:
+    """
+    With ``for_update`` the row stays locked until the caller's transaction
+    ends, so a check on it cannot race with a concurrent update.
+    """
+    return db.get(Position, (user_id, asset_id), with_for_update=for_update)
+
+
+def apply_transaction_to_position(
+    db: Session,
+    user_id: str,
+    asset_id: int,
+    type: str,
+    quantity: Decimal,
+    price: Decimal,
+) -> Position:
+    """
+    Add one new transaction to the user's position in the same database
+    transaction as the caller, which commits both together.
+    """
+    position = db.get(Position, (user_id, asset_id), with_for_update=True)
+    if position is None:
+        position = Position(
+            user_id=user_id,
+            asset_id=asset_id,
+            net_quantity=Decimal("0"),
+            total_cost=Decimal("0"),
+            average_cost_basis=Decimal("0"),
+        )
+        db.add(position)
+
+    _apply(position, type, Decimal(quantity), Decimal(price))
+    return position
+
+
+def rebuild_position(db: Session, user_id: str, asset_id: int) -> Position | None:
+    """
+    Replay the user's transactions in one asset, e.g. after one is deleted.
+    The position is removed once no transactions are left.
+    """
+    transactions = (
+        db.query(Transaction)
+        .filter(Transaction.user_id == user_id, Transaction.asset_id == asset_id)
+        .order_by(Transaction.id)
+        .all()
+    )
+    position = db.get(Position, (user_id, asset_id), with_for_update=True)
+
+    if not transactions:
+        if position is not None:
+            db.delete(position)
+        return None
+
+    if position is None:
+        position = Position(user_id=user_id, asset_id=asset_id)
+        db.add(position)
+    position.net_quantity = Decimal("0")
+    position.total_cost = Decimal("0")
+    position.average_cost_basis = Decimal("0")
+    for transaction in transactions:
+        _apply(position, transaction.type, transaction.quantity, transaction.price)
+    return position
+
+
+def _apply(position: Position, type: str, quantity: Decimal, price: Decimal):
+    net_quantity = Decimal(position.net_quantity)
+    total_cost = Decimal(position.total_cost)
+    average_cost_basis = Decimal(position.average_cost_basis)
+
+    if type == "buy":
+        total_cost += quantity * price
+        net_quantity += quantity
+        if net_quantity > 0:
+            average_cost_basis = total_cost / net_quantity
+    elif type == "sell":
+        total_cost -= average_cost_basis * quantity
+        net_quantity -= quantity
+
+    position.net_quantity = net_quantity
+    position.total_cost = total_cost
+    position.average_cost_basis = average_cost_basis
@@ -1,79 +1,173 @@
 import uuid
+from collections.abc import Iterable
 from datetime import datetime, timedelta
 
 import polars as pl
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm import Session
 
+from app.database import insert_for_dialect
+from app.models.latestprice import LatestPrice
 from app.models.priceupdate import PriceUpdate
 from app.models.timeseries import Timeseries
 
 
+LATEST_PRICE_SCHEMA = {
+    "asset_id": pl.Int64,
+    "latest_price": pl.Float64,
+    "price_change": pl.Float64,
+    "percentage_change": pl.Float64,
+    "timestamp": pl.Datetime,
+}
+
+
 def get_latest_price_and_changes(db: Session) -> pl.DataFrame:
-    subquery = db.query(
-        Timeseries.asset_id,
-        Timeseries.timestamp,
-        Timeseries.close.label("price"),
-        func.row_number()
-        .over(partition_by=Timeseries.asset_id, order_by=Timeseries.timestamp.desc())
-        .label("rank"),
-    ).subquery()
+    """
+    Latest close and change on the previous close for every asset with at
+    least two prices, read from the ``latest_prices`` snapshot.
+    """
+    snapshot = (
+        db.query(
+            LatestPrice.asset_id,
+            LatestPrice.latest_price,
+            LatestPrice.price_change,
+            LatestPrice.percentage_change,
+            LatestPrice.timestamp,
+        )
+        .filter(LatestPrice.previous_close.isnot(None))
+        .all()
+    )
 
-    ranked_timeseries = aliased(subquery)
+    return pl.DataFrame(
+        [tuple(row) for row in snapshot],
+        schema=LATEST_PRICE_SCHEMA,
+        orient="row",
+    )
 
-    latest_and_second_latest = (
+
+def get_latest_prices(db: Session, asset_ids: Iterable[int]) -> dict[int, dict]:
+    """
+    Snapshot rows for just the given assets, keyed by asset id. Assets without
+    prices are missing; those with a single price have no change values.
+    """
+    asset_ids = set(asset_ids)
+    if not asset_ids:
+        return {}
+
+    rows = (
         db.query(
-            ranked_timeseries.c.asset_id,
-            ranked_timeseries.c.timestamp,
-            ranked_timeseries.c.price,
-            ranked_timeseries.c.rank,
+            LatestPrice.asset_id,
+            LatestPrice.latest_price,
+            LatestPrice.price_change,
+            LatestPrice.percentage_change,
+            LatestPrice.timestamp,
         )
-        .filter(ranked_timeseries.c.rank.in_([1, 2]))
+        .filter(LatestPrice.asset_id.in_(asset_ids))
         .all()
     )
 
-    timeseries_data = [
-        {
-            "asset_id": row.asset_id,
+    return {
+        row.asset_id: {
+            "latest_price": row.latest_price,
+            "price_change": row.price_change,
+            "percentage_change": row.percentage_change,
             "timestamp": row.timestamp,
-            "price": row.price,
-            "rank": row.rank,
         }
-        for row in latest_and_second_latest
-    ]
+        for row in rows
+    }
+
+
+def get_price_versions(db: Session, asset_ids: Iterable[int]) -> dict[int, datetime]:
+    """
+    When ingestion last rewrote each asset's ``latest_prices`` row, keyed by
+    asset id. Changes whenever the asset's stored prices do. Assets without
+    prices are missing.
+    """
+    asset_ids = set(asset_ids)
+    if not asset_ids:
+        return {}
+
+    rows = (
+        db.query(LatestPrice.asset_id, LatestPrice.updated_at)
+        .filter(LatestPrice.asset_id.in_(asset_ids))
+        .all()
+    )
+    return {row.asset_id: row.updated_at for row in rows}
 
-    timeseries_df = pl.DataFrame(timeseries_data)
 
-    latest_df = timeseries_df.filter(timeseries_df["rank"] == 1).rename(
-        {"price": "latest_price"}
+def refresh_latest_prices(db: Session, asset_ids: list[int] | None = None) -> int:
+    """
+    Recompute the ``latest_prices`` snapshot from timeseries for the given
+    assets (all assets if None). Called by ingestion before it commits, so the
+    snapshot never lags behind the prices it summarises.
+    """
+    ranked = db.query(
+        Timeseries.asset_id,
+        Timeseries.timestamp,
+        Timeseries.close,
+        func.row_number()
+        .over(partition_by=Timeseries.asset_id, order_by=Timeseries.timestamp.desc())
+        .label("rank"),
     )
-    second_latest_df = timeseries_df.filter(timeseries_df["rank"] == 2).rename(
-        {"price": "second_latest_price"}
+    if asset_ids is not None:
+        if not asset_ids:
+            return 0
+        ranked = ranked.filter(Timeseries.asset_id.in_(asset_ids))
+    ranked = ranked.subquery()
+
+    rows = (
+        db.query(ranked.c.asset_id, ranked.c.timestamp, ranked.c.close, ranked.c.rank)
+        .filter(ranked.c.rank <= 2)
+        .all()
     )
 
-    combined_df = latest_df.join(second_latest_df, on="asset_id", how="inner")
-
-    combined_df = combined_df.with_columns(
-        [
-            (combined_df["latest_price"] - combined_df["second_latest_price"]).alias(
-                "price_change"
-            ),
-            (
-                (
-                    (combined_df["latest_price"] - combined_df["second_latest_price"])
-                    / combined_df["second_latest_price"]
-                )
-                * 100
-            ).alias("percentage_change"),
-        ]
-    )
+    now = datetime.now()
+    snapshots: dict[int, dict] = {}
+    previous_closes: dict[int, float] = {}
+    for row in rows:
+        if row.rank == 1:
+            snapshots[row.asset_id] = {
+                "asset_id": row.asset_id,
+                "timestamp": row.timestamp,
+                "latest_price": row.close,
+                "previous_close": None,
+                "price_change": None,
+                "percentage_change": None,
+                "updated_at": now,
+            }
+        else:
+            previous_closes[row.asset_id] = row.close
+
+    for asset_id, previous_close in previous_closes.items():
+        snapshot = snapshots[asset_id]
+        price_change = snapshot["latest_price"] - previous_close
+        snapshot["previous_close"] = previous_close
+        snapshot["price_change"] = price_change
+        snapshot["percentage_change"] = (
+            price_change / previous_close * 100 if previous_close else None
+        )
 
-    result_df = combined_df.select(
-        ["asset_id", "latest_price", "price_change", "percentage_change", "timestamp"]
+    if not snapshots:
+        return 0
+
+    statement = insert_for_dialect(db, LatestPrice.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["asset_id"],
+        set_={
+            column: statement.excluded[column]
+            for column in (
+                "timestamp",
+                "latest_price",
+                "previous_close",
+                "price_change",
+                "percentage_change",
+                "updated_at",
+            )
+        },
     )
-
-    return result_df
+    db.execute(statement, list(snapshots.values()))
+    return len(snapshots)
 
 
 def get_latest_timeseries_for_asset(asset_id: int, db: Session) -> pl.DataFrame:
@@ -118,6 +212,11 @@ def check_prices_stale(db: Session) -> bool:
 
 
 def mark_prices_as_refreshed(db: Session):
+    from app.services.price_cache import (
+        price_cache,  # lazy import prevents circular import
+    )
+
+    price_cache.invalidate()
     price_update = db.query(PriceUpdate).first()
     if price_update is None:
         return
@@ -1,5 +1,9 @@
+from datetime import datetime
+
 from app import models
+from app.crud.position import rebuild_position
 from app.schemas import TransactionBase, TransactionOut
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 
@@ -63,5 +67,23 @@ def delete_transaction(db: Session, transaction_id: int) -> TransactionBase | No
     if not transaction:
         return None
     db.delete(transaction)
+    db.flush()
+    rebuild_position(db, transaction.user_id, transaction.asset_id)
     db.commit()
     return TransactionBase(**transaction.__dict__)
+
+
+def get_transaction_version(
+    db: Session, user_id: str
+) -> tuple[int, int | None, datetime | None]:
+    """Count, last id and last timestamp of a user's transactions."""
+    count, last_id, last_timestamp = (
+        db.query(
+            func.count(models.Transaction.id),
+            func.max(models.Transaction.id),
+            func.max(models.Transaction.timestamp),
+        )
+        .filter(models.Transaction.user_id == user_id)
+        .one()
+    )
+    return count, last_id, last_timestamp
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.config.settings import settings
@@ -36,3 +38,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def insert_for_dialect(db, table):
+    """INSERT that supports ``on_conflict_do_*`` on Postgres and SQLite (tests)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql_insert(table)
+    return sqlite_insert(table)
@@ -1,5 +1,6 @@
 import re
 import time
+from contextlib import asynccontextmanager
 
 from app.api.endpoints import (
     admin,
@@ -14,6 +15,7 @@ from app.api.endpoints import (
     watchlist,
 )
 from app.config.settings import settings
+from app.core.data_ingestion.refresh_scheduler import price_refresh_scheduler
 from app.logger import logger
 from fastapi import APIRouter, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -24,8 +26,20 @@ oauth2_scheme = OAuth2AuthorizationCodeBearer(
     tokenUrl=f"https://{settings.AUTH0_DOMAIN}/oauth/token",
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep prices fresh in the background so requests never ingest.
+    # Disable when a separate refresh worker is deployed.
+    if settings.PRICE_REFRESH_IN_APP:
+        price_refresh_scheduler.start()
+    yield
+    price_refresh_scheduler.stop(timeout=5)
+
+
 app = FastAPI(
     title="Porta",
+    lifespan=lifespan,
     swagger_ui_init_oauth={
         "clientId": settings.AUTH0_CLIENT_ID,
         "appName": "Porta",
@@ -5,3 +5,7 @@ from .transaction import Transaction  # noqa: F401
 from .user import User  # noqa: F401
 from .watchlistitem import WatchlistItem  # noqa: F401
 from .backtesthistory import BacktestHistory  # noqa: F401
+from .corporateaction import CorporateAction  # noqa: F401
+from .latestprice import LatestPrice  # noqa: F401
+from .portfoliovaluation import PortfolioValuation  # noqa: F401
+from .position import Position  # noqa: F401
@@ -0,0 +1,33 @@
+from app.database import Base
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+)
+
+
+class CorporateAction(Base):
+    """
+    A split or dividend, recorded once when ingestion first sees it.
+
+    ``adjustment_factor`` is what stored adj_close values before ``ex_date``
+    were multiplied by when the event was applied (1 / ratio for a split).
+    """
+
+    __tablename__ = "corporate_actions"
+
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
+    ex_date = Column(DateTime, nullable=False)
+    action_type = Column(String, nullable=False)  # "split" or "dividend"
+    value = Column(Float, nullable=False)  # split ratio or dividend per share
+    adjustment_factor = Column(Float, nullable=False)
+    applied_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (PrimaryKeyConstraint("asset_id", "ex_date", "action_type"),)
+
+    def __repr__(self):
+        return f"<CorporateAction(asset_id={self.asset_id}, ex_date={self.ex_date}, {self.action_type}={self.value})>"
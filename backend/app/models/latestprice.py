@@ -0,0 +1,22 @@
+from app.database import Base
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+
+
+class LatestPrice(Base):
+    """
+    Latest close and day-on-day change per asset. Maintained by ingestion so
+    that reads are a primary-key lookup instead of a window over timeseries.
+    """
+
+    __tablename__ = "latest_prices"
+
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    timestamp = Column(DateTime, nullable=False)
+    latest_price = Column(Float, nullable=False)
+    previous_close = Column(Float, nullable=True)
+    price_change = Column(Float, nullable=True)
+    percentage_change = Column(Float, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<LatestPrice(asset_id={self.asset_id}, timestamp={self.timestamp}, latest_price={self.latest_price})>"
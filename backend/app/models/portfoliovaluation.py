@@ -0,0 +1,33 @@
+from app.database import Base
+from sqlalchemy import (
+    Column,
+    Date,
+    ForeignKey,
+    Numeric,
+    PrimaryKeyConstraint,
+    String,
+)
+
+
+class PortfolioValuation(Base):
+    """
+    Value of a user's holdings at the close of one trading day.
+
+    Rows are appended as new prices arrive and deleted from the date of any
+    back-dated transaction onwards, so the table is always a prefix of the
+    full history that ``calculate_portfolio_history`` would produce.
+    """
+
+    __tablename__ = "portfolio_valuations"
+
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    value = Column(Numeric(20, 8), nullable=False)
+    cash_flow = Column(Numeric(20, 8), nullable=False)
+    daily_return_val = Column(Numeric(20, 8), nullable=False)
+    daily_return_pct = Column(Numeric(20, 8), nullable=False)
+
+    __table_args__ = (PrimaryKeyConstraint("user_id", "date"),)
+
+    def __repr__(self):
+        return f"<PortfolioValuation(user_id={self.user_id}, date={self.date}, value={self.value})>"
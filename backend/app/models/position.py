@@ -0,0 +1,33 @@
+from app.database import Base
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Integer,
+    Numeric,
+    PrimaryKeyConstraint,
+    String,
+)
+
+
+class Position(Base):
+    """
+    Net quantity and cost basis of one asset for one user, kept in step with
+    the user's transactions so holdings never have to replay them.
+
+    ``total_cost`` and ``average_cost_basis`` follow the running-average method
+    used by ``calculate_holdings``: buys add to the cost and reset the average,
+    sells remove ``average_cost_basis * quantity`` of cost.
+    """
+
+    __tablename__ = "positions"
+
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
+    net_quantity = Column(Numeric(15, 8), nullable=False)
+    total_cost = Column(Numeric(20, 8), nullable=False)
+    average_cost_basis = Column(Numeric(20, 8), nullable=False)
+
+    __table_args__ = (PrimaryKeyConstraint("user_id", "asset_id"),)
+
+    def __repr__(self):
+        return f"<Position(user_id={self.user_id}, asset_id={self.asset_id}, net_quantity={self.net_quantity})>"
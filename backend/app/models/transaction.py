@@ -1,5 +1,6 @@
 import enum
 from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
 
 from app.database import Base
 from sqlalchemy import (
@@ -16,6 +17,16 @@ from sqlalchemy import (
 from sqlalchemy.orm import relationship
 
 
+# Precision of the quantity and price columns below
+QUANTITY_QUANTUM = Decimal("1e-8")
+PRICE_QUANTUM = Decimal("0.01")
+
+
+def as_stored(value: float | Decimal, quantum: Decimal) -> Decimal:
+    """The value as a Numeric column stores it (Postgres rounds half up)."""
+    return Decimal(str(value)).quantize(quantum, rounding=ROUND_HALF_UP)
+
+
 class TransactionType(str, enum.Enum):
     buy = "buy"
     sell = "sell"
@@ -1,13 +1,20 @@
 """
-Monte Carlo benchmark: loop-based vs vectorised implementation.
-Run from the backend directory: uv run python benchmark_monte_carlo.py
+Monte Carlo benchmark: loop-based vs vectorised implementation, for the DCA
+paths and for the per-path max drawdown, the engine's throughput by number
+of worker processes, and monthly vs daily resolution over a long horizon.
+Run from the backend directory: uv run python -m app.monte_carlo.benchmark_monte_carlo
 """
 
+import os
 import time
+import tracemalloc
 
 import numpy as np
 import polars as pl
 
+from app.monte_carlo.monte_carlo_engine import MonteCarloEngine, simulation_calendar
+from app.schemas.monte_carlo import MonteCarloConfig, SimulationResolution
+
 # ---------------------------------------------------------------------------
 # Shared config
 # ---------------------------------------------------------------------------
@@ -17,6 +24,10 @@ MONTHLY_INVESTMENT = 500.0
 INITIAL_PRICE = 150.0
 SEED = 42
 SIM_COUNTS = [1_000, 5_000, 10_000, 50_000]
+PARALLEL_SIMULATIONS = 400_000
+DRAWDOWN_CHUNK_ROWS = 4_096
+RESOLUTION_SIMULATIONS = 10_000
+RESOLUTION_MONTHS = 345  # ~7,500 trading days
 
 
 def make_synthetic_timeseries(n_days: int = 2520) -> pl.DataFrame:
@@ -81,6 +92,34 @@ def simulate_vectorised(
     return portfolio_paths
 
 
+# ---------------------------------------------------------------------------
+# Max drawdown: per-path loop (original) vs chunked accumulate (current)
+# ---------------------------------------------------------------------------
+
+
+def max_drawdown_loop(portfolio_paths: np.ndarray) -> np.ndarray:
+    max_drawdowns = []
+    for sim in range(portfolio_paths.shape[0]):
+        portfolio_values = portfolio_paths[sim, :]
+        running_max = np.maximum.accumulate(portfolio_values)
+        drawdowns = (portfolio_values - running_max) / np.maximum(running_max, 1)
+        max_drawdowns.append(np.min(drawdowns))
+    return np.array(max_drawdowns)
+
+
+def max_drawdown_vectorised(
+    portfolio_paths: np.ndarray, chunk_rows: int = DRAWDOWN_CHUNK_ROWS
+) -> np.ndarray:
+    max_drawdowns = np.empty(portfolio_paths.shape[0])
+    for start in range(0, portfolio_paths.shape[0], chunk_rows):
+        block = portfolio_paths[start : start + chunk_rows]
+        running_max = np.maximum.accumulate(block, axis=1)
+        drawdowns = block - running_max
+        drawdowns /= np.maximum(running_max, 1, out=running_max)
+        max_drawdowns[start : start + len(block)] = drawdowns.min(axis=1)
+    return max_drawdowns
+
+
 # ---------------------------------------------------------------------------
 # Runner
 # ---------------------------------------------------------------------------
@@ -89,7 +128,7 @@ def simulate_vectorised(
 def run_benchmark():
     df = make_synthetic_timeseries()
 
-    # Pre-compute return stats (same as engine.setup_data)
+    # Pre-compute return stats (same as ReturnModel.from_timeseries)
     df = df.sort("timestamp").with_columns(
         [
             pl.col("timestamp").dt.month().alias("month"),
@@ -137,6 +176,30 @@ def run_benchmark():
         print(f"{n_sims:>12,}  {loop_time:>10.3f}  {vec_time:>16.4f}  {speedup:>7.1f}x")
         results.append((n_sims, loop_time, vec_time, speedup))
 
+    print("\nMax drawdown")
+    print(
+        f"{'Simulations':>12}  {'Loop (s)':>10}  {'Vectorised (s)':>16}  {'Speedup':>8}"
+    )
+    print("-" * 54)
+
+    for n_sims in SIM_COUNTS:
+        return_scenarios = generate_returns_normal(mean, std, n_sims, INVESTMENT_MONTHS)
+        paths = simulate_vectorised(return_scenarios, INVESTMENT_MONTHS)
+
+        t0 = time.perf_counter()
+        drawdowns_loop = max_drawdown_loop(paths)
+        loop_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        drawdowns_vec = max_drawdown_vectorised(paths)
+        vec_time = time.perf_counter() - t0
+
+        assert np.allclose(drawdowns_loop, drawdowns_vec), (
+            "Drawdowns differ between implementations!"
+        )
+        speedup = loop_time / vec_time if vec_time > 0 else float("inf")
+        print(f"{n_sims:>12,}  {loop_time:>10.3f}  {vec_time:>16.4f}  {speedup:>7.1f}x")
+
     print()
     print("Memory footprint (50k sims, 60 months):")
     n = 50_000
@@ -144,6 +207,68 @@ def run_benchmark():
     print(f"  Return scenarios matrix : {matrix_bytes / 1e6:.1f} MB")
     print(f"  Portfolio paths matrix  : {n * (INVESTMENT_MONTHS + 1) * 8 / 1e6:.1f} MB")
     print(f"  Total (approx)          : {2 * matrix_bytes / 1e6:.0f} MB")
+    chunk_bytes = 2 * DRAWDOWN_CHUNK_ROWS * (INVESTMENT_MONTHS + 1) * 8
+    print(f"  Drawdown temporaries    : {chunk_bytes / 1e6:.1f} MB per chunk")
+
+    print(f"\nEngine throughput ({PARALLEL_SIMULATIONS:,} sims, streaming, seeded)")
+    print(f"{'Workers':>12}  {'Time (s)':>10}  {'Sims/s':>16}  {'Scaling':>8}")
+    print("-" * 54)
+
+    engine = MonteCarloEngine(make_synthetic_timeseries())
+    config = MonteCarloConfig(
+        monthly_investment=MONTHLY_INVESTMENT,
+        investment_months=INVESTMENT_MONTHS,
+        num_simulations=PARALLEL_SIMULATIONS,
+        initial_price=INITIAL_PRICE,
+        chunk_size=10_000,
+        seed=SEED,
+    )
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, *(w for w in (2, 4, 8, 16) if w < cores), cores})
+    baseline_time = None
+    baseline_results = None
+    for workers in worker_counts:
+        t0 = time.perf_counter()
+        engine_results = engine.simulate_dca_strategy(config, max_workers=workers)
+        elapsed = time.perf_counter() - t0
+
+        if baseline_results is None:
+            baseline_time, baseline_results = elapsed, engine_results.to_dict()
+        assert engine_results.to_dict() == baseline_results, (
+            "Results differ between worker counts!"
+        )
+        scaling = baseline_time / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"{workers:>12}  {elapsed:>10.3f}  {PARALLEL_SIMULATIONS / elapsed:>16,.0f}  {scaling:>7.1f}x"
+        )
+
+    trading_days = len(simulation_calendar(RESOLUTION_MONTHS, daily=True))
+    print(
+        f"\nResolution ({RESOLUTION_SIMULATIONS:,} sims, {RESOLUTION_MONTHS} months "
+        f"= {trading_days:,} trading days, streaming, 1 worker)"
+    )
+    print(f"{'Resolution':>12}  {'Time (s)':>10}  {'Sims/s':>16}  {'Peak MB':>8}")
+    print("-" * 54)
+
+    for resolution in SimulationResolution:
+        config = MonteCarloConfig(
+            monthly_investment=MONTHLY_INVESTMENT,
+            investment_months=RESOLUTION_MONTHS,
+            num_simulations=RESOLUTION_SIMULATIONS,
+            initial_price=INITIAL_PRICE,
+            chunk_size=1_000,
+            seed=SEED,
+            resolution=resolution,
+        )
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        engine.simulate_dca_strategy(config, max_workers=1)
+        elapsed = time.perf_counter() - t0
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{resolution.value:>12}  {elapsed:>10.3f}  {RESOLUTION_SIMULATIONS / elapsed:>16,.0f}  {peak_bytes / 1e6:>8.0f}"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""
+Process-wide cache of fitted Monte Carlo return models.
+
+Building a ``ReturnModel`` means loading eight years of prices, resampling
+them to month ends and computing moments, and the Student-t fit is an
+iterative MLE that costs more than the simulation itself. Models are stored
+per asset together with the date of the asset's latest price, read from the
+``latest_prices`` snapshot. A lookup only hits while that date still matches,
+so prices ingested by another process are picked up on the next request.
+Ingestion in this process also invalidates the assets it writes.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.config.settings import settings
+from app.monte_carlo.monte_carlo_engine import ReturnModel
+
+
+@dataclass(frozen=True)
+class ReturnModelCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    max_entries: int
+
+
+class ReturnModelCache:
+    """Thread-safe LRU cache of asset_id -> (latest price date, ReturnModel)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[datetime, ReturnModel]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, asset_id: int, latest_price_date: datetime) -> ReturnModel | None:
+        with self._lock:
+            entry = self._entries.get(asset_id)
+            if entry is None or entry[0] != latest_price_date:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(asset_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, asset_id: int, latest_price_date: datetime, model: ReturnModel):
+        with self._lock:
+            self._entries.pop(asset_id, None)
+            if self.max_entries <= 0:
+                return
+
+            self._entries[asset_id] = (latest_price_date, model)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, asset_id: int | None = None):
+        """Drop one asset, or every asset if ``asset_id`` is None."""
+        with self._lock:
+            if asset_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(asset_id, None)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> ReturnModelCacheStats:
+        with self._lock:
+            return ReturnModelCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+            )
+
+
+return_model_cache = ReturnModelCache(settings.RETURN_MODEL_CACHE_MAX_ENTRIES)
@@ -1,35 +1,145 @@
+import itertools
+import os
 import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from datetime import date
+from decimal import Decimal
 
 import numpy as np
+import pandas as pd
 import polars as pl
 from scipy import stats
 
+from app.backtesting.columnar import execute_plan
+from app.backtesting.strategies.base import BacktestStrategy
+from app.backtesting.strategies.dca import DCAStrategy
+from app.backtesting.trading_calendar import CalendarPeriod, TradingCalendar
 from app.logger import logger
+from app.monte_carlo.streaming import QuantileSketch, RunningMoments
 from app.schemas.monte_carlo import (
     MonteCarloConfig,
     MonteCarloSimulationMethods,
+    SimulationResolution,
     SimulationResults,
 )
 
+PERCENTILE_LEVELS = [5, 10, 25, 50, 75, 90, 95]
 
-class MonteCarloEngine:
-    def __init__(self, timeseries_df: pl.DataFrame):
-        self.df = timeseries_df
-        self.returns_stats = None
-        self.historical_returns: np.ndarray | None = None
-        self.setup_data()
-
-    def setup_data(self):
-        self.df = self.df.sort("timestamp")
-        self.df = self.df.with_columns(
+# Paths per block when computing drawdowns, so the running-max and drawdown
+# temporaries stay at a few MB whatever the number of simulations
+DRAWDOWN_CHUNK_ROWS = 4_096
+
+# Simulations per chunk in the in-memory mode. Each chunk draws from its own
+# child of the config seed, so chunks can run on any worker in any order and
+# a seed gives the same results whatever the number of workers
+SIMULATION_CHUNK_SIZE = 10_000
+
+# Upper bound on (simulations x trading days x assets) per chunk at daily
+# resolution, so a chunk's float32 price, holding and value arrays stay at
+# tens of MB whatever the horizon
+DAILY_CHUNK_CELLS = 2_000_000
+
+# First month of the synthetic calendar that simulated paths trade on
+SIMULATION_START = date(2000, 1, 1)
+
+# Asset id of strategies built by the engine itself; simulations have one asset
+SIMULATED_ASSET_ID = 0
+
+# Engine shared by every chunk, set once per worker process
+_worker_engine: "MonteCarloEngine | None" = None
+
+
+def _init_simulation_worker(engine: "MonteCarloEngine"):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _run_simulation_chunk(method: Callable, *args):
+    assert _worker_engine is not None, "Simulation worker not initialised"
+    return method(_worker_engine, *args)
+
+
+@dataclass
+class _ChunkSummary:
+    """Streaming aggregates of one or more chunks of simulations."""
+
+    values: QuantileSketch
+    returns: QuantileSketch
+    drawdowns: QuantileSketch
+    return_moments: RunningMoments
+    invested_sum: np.ndarray
+    losses: int
+    sharpe_sum: float
+    drawdown_sum: float
+    sample_paths: np.ndarray
+
+    def merge(self, other: "_ChunkSummary"):
+        self.values.merge(other.values)
+        self.returns.merge(other.returns)
+        self.drawdowns.merge(other.drawdowns)
+        self.return_moments.merge(other.return_moments)
+        self.invested_sum += other.invested_sum
+        self.losses += other.losses
+        self.sharpe_sum += other.sharpe_sum
+        self.drawdown_sum += other.drawdown_sum
+        self.sample_paths = np.concatenate((self.sample_paths, other.sample_paths))
+
+
+@lru_cache(maxsize=32)
+def _simulation_days(months: int, daily: bool) -> pd.DatetimeIndex:
+    # Cached: pandas builds business-day ranges one date at a time, and every
+    # chunk needs the number of steps
+    month_starts = pd.bdate_range(SIMULATION_START, periods=months, freq="BMS")
+    if not daily:
+        return month_starts
+    return pd.bdate_range(month_starts[0], month_starts[-1] + pd.offsets.BMonthEnd(0))
+
+
+def simulation_calendar(months: int, daily: bool = False) -> TradingCalendar:
+    """
+    Trading calendar of simulated paths: the first business day of each of
+    ``months`` consecutive months, or every business day of those months at
+    daily resolution. Only the spacing of the days matters to strategies, so
+    the calendar starts at a fixed ``SIMULATION_START``.
+    """
+    return TradingCalendar(_simulation_days(months, daily).date)
+
+
+@dataclass
+class ReturnModel:
+    """
+    Everything the engine derives from an asset's price history: the monthly
+    return sample, its moments, the daily return sample and the last close
+    (the default initial price).
+
+    The Student-t parameters are fitted on first use and kept on the model,
+    so a cached model only pays for the fit once.
+    """
+
+    historical_returns: np.ndarray
+    returns_stats: dict[str, float]
+    last_price: float
+    # Month of each return as year * 12 + month - 1, to align several assets
+    month_keys: np.ndarray
+    daily_returns: np.ndarray
+    # Date of each daily return, as days since 1970-01-01
+    day_keys: np.ndarray
+    t_params: tuple[float, float, float] | None = None
+    daily_t_params: tuple[float, float, float] | None = None
+
+    @classmethod
+    def from_timeseries(cls, timeseries_df: pl.DataFrame) -> "ReturnModel":
+        df = timeseries_df.sort("timestamp").with_columns(
             [
-                pl.col("close").pct_change().alias("daily_return"),
                 pl.col("timestamp").dt.month().alias("month"),
                 pl.col("timestamp").dt.year().alias("year"),
             ]
         )
         monthly_data = (
-            self.df.group_by(["year", "month"])
+            df.group_by(["year", "month"])
             .agg(
                 [
                     pl.col("close").last().alias("month_end_price"),
@@ -43,190 +153,620 @@ class MonteCarloEngine:
             .drop_nulls()
         )
 
-        self.historical_returns = (
-            monthly_data.select("monthly_return").to_numpy().flatten()
+        historical_returns = monthly_data.select("monthly_return").to_numpy().flatten()
+        historical_returns.flags.writeable = False
+        month_keys = (
+            monthly_data.select(pl.col("year") * 12 + pl.col("month") - 1)
+            .to_numpy()
+            .flatten()
         )
+        daily_data = df.select(
+            pl.col("timestamp").cast(pl.Date).cast(pl.Int64).alias("day_key"),
+            pl.col("close").pct_change().alias("daily_return"),
+        ).drop_nulls()
+        daily_returns = daily_data["daily_return"].to_numpy().copy()
+        daily_returns.flags.writeable = False
 
-        self.returns_stats = {
-            "mean": np.mean(self.historical_returns),
-            "std": np.std(self.historical_returns),
-            "skew": stats.skew(self.historical_returns),
-            "kurtosis": stats.kurtosis(self.historical_returns),
-            "min": np.min(self.historical_returns),
-            "max": np.max(self.historical_returns),
-            "count": len(self.historical_returns),
+        returns_stats = {
+            "mean": np.mean(historical_returns),
+            "std": np.std(historical_returns),
+            "skew": stats.skew(historical_returns),
+            "kurtosis": stats.kurtosis(historical_returns),
+            "min": np.min(historical_returns),
+            "max": np.max(historical_returns),
+            "count": len(historical_returns),
         }
 
         logger.info("Historical Return Statistics:")
         logger.info(
-            f"Mean Monthly Return: {self.returns_stats['mean']:.4f} ({self.returns_stats['mean'] * 12:.2%} annualized)"
+            f"Mean Monthly Return: {returns_stats['mean']:.4f} ({returns_stats['mean'] * 12:.2%} annualized)"
         )
         logger.info(
-            f"Monthly Volatility: {self.returns_stats['std']:.4f} ({self.returns_stats['std'] * np.sqrt(12):.2%} annualized)"
+            f"Monthly Volatility: {returns_stats['std']:.4f} ({returns_stats['std'] * np.sqrt(12):.2%} annualized)"
+        )
+        logger.info(f"Skewness: {returns_stats['skew']:.4f}")
+        logger.info(f"Kurtosis: {returns_stats['kurtosis']:.4f}")
+        logger.info(f"Sample Size: {returns_stats['count']} months")
+
+        return cls(
+            historical_returns=historical_returns,
+            returns_stats=returns_stats,
+            last_price=df.select("close").row(-1)[0],
+            month_keys=month_keys,
+            daily_returns=daily_returns,
+            day_keys=daily_data["day_key"].to_numpy(),
         )
-        logger.info(f"Skewness: {self.returns_stats['skew']:.4f}")
-        logger.info(f"Kurtosis: {self.returns_stats['kurtosis']:.4f}")
-        logger.info(f"Sample Size: {self.returns_stats['count']} months")
 
-    def generate_returns(self, config: MonteCarloConfig) -> np.ndarray:
-        assert self.returns_stats is not None
-        assert self.historical_returns is not None
+
+def align_returns(models: list[ReturnModel], daily: bool = False) -> np.ndarray:
+    """
+    (periods x assets) matrix of the monthly (or daily) returns of the
+    periods every model has, oldest first, so that a row holds the same
+    period for every asset.
+    """
+    samples = [
+        (m.day_keys, m.daily_returns) if daily else (m.month_keys, m.historical_returns)
+        for m in models
+    ]
+    common = samples[0][0]
+    for keys, _ in samples[1:]:
+        common = np.intersect1d(common, keys)
+    if len(common) < 2:
+        period = "daily" if daily else "monthly"
+        raise ValueError(f"Not enough overlapping {period} returns between assets")
+
+    aligned = np.column_stack(
+        [returns[np.searchsorted(keys, common)] for keys, returns in samples]
+    )
+    aligned.flags.writeable = False
+    return aligned
+
+
+def _correlated_cholesky(returns: np.ndarray) -> np.ndarray:
+    """
+    Cholesky factor of the correlation matrix of (months x assets) returns.
+    Matrices that are not positive definite (e.g. a duplicated asset) have
+    their eigenvalues clipped first.
+    """
+    correlation = np.atleast_2d(np.corrcoef(returns, rowvar=False))
+    try:
+        return np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        correlation = (eigenvectors * np.maximum(eigenvalues, 1e-10)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(correlation))
+        return np.linalg.cholesky(correlation / np.outer(scale, scale))
+
+
+class MonteCarloEngine:
+    def __init__(
+        self,
+        timeseries_df: pl.DataFrame | None = None,
+        model: ReturnModel | None = None,
+        models: dict[int, ReturnModel] | None = None,
+    ):
+        """
+        A single-asset engine is built from ``timeseries_df``, or reuses
+        ``model``, and simulates asset ``SIMULATED_ASSET_ID``. ``models``
+        simulates several assets jointly, keyed by asset id.
+        """
+        if models is None:
+            if model is None:
+                assert timeseries_df is not None, "Need a timeseries or a model"
+                model = ReturnModel.from_timeseries(timeseries_df)
+            models = {SIMULATED_ASSET_ID: model}
+        self.models = models
+        self.asset_ids = list(models)
+        self.historical_returns = align_returns(list(models.values()))
+
+    @cached_property
+    def daily_historical_returns(self) -> np.ndarray:
+        """Aligned (days x assets) daily returns, in float32 like daily paths."""
+        return align_returns(list(self.models.values()), daily=True).astype(np.float32)
+
+    def generate_returns(
+        self,
+        config: MonteCarloConfig,
+        num_simulations: int | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> np.ndarray:
+        """
+        Returns shaped (simulations x months x assets), or (simulations x
+        trading days x assets) in float32 at daily resolution.
+
+        Bootstraps resample whole rows of the aligned historical returns, so
+        cross-asset correlation is kept; block and stationary bootstraps also
+        keep runs of consecutive periods. Normal and Student-t draws use each
+        asset's own moments (or fitted t parameters) and are correlated
+        through the Cholesky factor of the historical correlation matrix.
+        """
+        if rng is None:
+            rng = np.random.default_rng(config.seed)
+        daily = config.resolution == SimulationResolution.DAILY
+        history = self.daily_historical_returns if daily else self.historical_returns
+        steps = len(_simulation_days(config.investment_months, daily))
+        size = (num_simulations or config.num_simulations, steps)
+        dtype = np.float32 if daily else np.float64
+        method = config.simulation_method
+        models = list(self.models.values())
         returns = None
 
-        if config.simulation_method == MonteCarloSimulationMethods.NORMAL_DISTRIBUTION:
-            returns = np.random.normal(
-                self.returns_stats["mean"],
-                self.returns_stats["std"],
-                (config.num_simulations, config.investment_months),
-            )
-        elif config.simulation_method == MonteCarloSimulationMethods.BOOTSTRAP:
-            bootstrap_indices = np.random.choice(
-                len(self.historical_returns),
-                (config.num_simulations, config.investment_months),
-                replace=True,
+        if method == MonteCarloSimulationMethods.NORMAL_DISTRIBUTION:
+            if daily:
+                means = np.array([np.mean(m.daily_returns) for m in models])
+                stds = np.array([np.std(m.daily_returns) for m in models])
+            else:
+                means = np.array([m.returns_stats["mean"] for m in models])
+                stds = np.array([m.returns_stats["std"] for m in models])
+            factor = stds[:, np.newaxis] * _correlated_cholesky(history)
+            returns = rng.standard_normal((*size, len(models)), dtype=dtype) @ (
+                factor.T.astype(dtype)
+            ) + means.astype(dtype)
+        elif method == MonteCarloSimulationMethods.BOOTSTRAP:
+            bootstrap_indices = rng.integers(len(history), size=size)
+            returns = history[bootstrap_indices]
+        elif method in (
+            MonteCarloSimulationMethods.BLOCK_BOOTSTRAP,
+            MonteCarloSimulationMethods.STATIONARY_BOOTSTRAP,
+        ):
+            returns = history[
+                self._block_bootstrap_indices(
+                    rng,
+                    len(history),
+                    size,
+                    config.block_length,
+                    method == MonteCarloSimulationMethods.STATIONARY_BOOTSTRAP,
+                )
+            ]
+        elif method == MonteCarloSimulationMethods.T_STUDENT:
+            df_param, loc_param, scale_param = self.fit_t_distributions(daily).T
+            normals = rng.standard_normal((*size, len(models)), dtype=dtype) @ (
+                _correlated_cholesky(history).T.astype(dtype)
             )
-            returns = self.historical_returns[bootstrap_indices]
-        elif config.simulation_method == MonteCarloSimulationMethods.T_STUDENT:
-            df_param, loc_param, scale_param = stats.t.fit(self.historical_returns)
-            returns = stats.t.rvs(
-                df=df_param,
-                loc=loc_param,
-                scale=scale_param,
-                size=(config.num_simulations, config.investment_months),
+            # Nested chi-square mixing variables: with the assets sorted by df,
+            # each one adds an independent chi2(df_k - df_k-1) to the previous
+            # one, so every asset keeps its t marginal while sharing its tails
+            order = np.argsort(df_param)
+            increments = rng.gamma(
+                np.diff(df_param[order], prepend=0) / 2, 2, (*size, len(models))
             )
+            chi_square = np.empty_like(increments)
+            chi_square[..., order] = np.cumsum(increments, axis=-1)
+            returns = (
+                loc_param + scale_param * normals / np.sqrt(chi_square / df_param)
+            ).astype(dtype, copy=False)
 
-        assert returns is not None, (
-            f"Unsupported simulation method: {config.simulation_method}"
-        )
+        assert returns is not None, f"Unsupported simulation method: {method}"
         return returns
 
-    def simulate_dca_strategy(self, config: MonteCarloConfig) -> SimulationResults:
+    @staticmethod
+    def _block_bootstrap_indices(
+        rng: np.random.Generator,
+        history_length: int,
+        size: tuple[int, int],
+        block_length: int,
+        stationary: bool,
+    ) -> np.ndarray:
+        """
+        Row indices of a circular block bootstrap: blocks of consecutive
+        periods start at random rows and wrap around the end of the history.
+        Blocks have ``block_length`` periods, or a geometric length with that
+        mean for the stationary bootstrap.
+        """
+        steps = np.arange(size[1])
+        if stationary:
+            new_block = rng.random(size) < 1 / block_length
+            new_block[:, 0] = True
+        else:
+            new_block = np.broadcast_to(steps % block_length == 0, size)
+
+        starts = rng.integers(history_length, size=size)
+        block_start = np.maximum.accumulate(np.where(new_block, steps, 0), axis=1)
+        return (
+            np.take_along_axis(starts, block_start, axis=1) + steps - block_start
+        ) % history_length
+
+    def fit_t_distributions(self, daily: bool = False) -> np.ndarray:
+        """
+        (assets x 3) Student-t parameters (df, loc, scale) of the monthly (or
+        daily) returns, each fitted once per model on the asset's full history.
+        """
+        for model in self.models.values():
+            if daily and model.daily_t_params is None:
+                model.daily_t_params = stats.t.fit(model.daily_returns)
+            elif not daily and model.t_params is None:
+                model.t_params = stats.t.fit(model.historical_returns)
+        return np.array(
+            [
+                model.daily_t_params if daily else model.t_params
+                for model in self.models.values()
+            ]
+        )
+
+    def simulate_dca_strategy(
+        self, config: MonteCarloConfig, max_workers: int | None = None
+    ) -> SimulationResults:
+        """Simulate investing ``config.monthly_investment`` every month."""
+        amount = Decimal(str(config.monthly_investment))
+        strategy = DCAStrategy(SIMULATED_ASSET_ID, amount, amount, "monthly")
+        return self.simulate_strategy(strategy, config, max_workers)
+
+    def simulate_strategy(
+        self,
+        strategy: BacktestStrategy,
+        config: MonteCarloConfig,
+        max_workers: int | None = None,
+    ) -> SimulationResults:
+        """
+        Simulate a backtesting strategy over ``config.num_simulations``
+        synthetic price paths of ``config.investment_months`` months.
+
+        Each batch of paths goes through the strategy's ``plan_paths`` and
+        ``execute_plan`` in one pass, as in the backtester. Paths have one
+        trading day per month (see ``simulation_calendar``), so strategies
+        with a finer cadence, such as weekly DCA, trade monthly. At daily
+        resolution paths step through every business day in float32 and
+        chunks are capped at ``DAILY_CHUNK_CELLS``; drawdowns are measured
+        on the daily values and everything else at month ends.
+
+        Simulations are split into chunks (``config.chunk_size``, or
+        ``SIMULATION_CHUNK_SIZE`` in memory), each seeded from
+        ``SeedSequence(config.seed).spawn``, and spread over a process pool
+        of up to ``max_workers`` (default: one per core).
+        """
+        missing = set(strategy.get_asset_ids()) - set(self.asset_ids)
+        if missing:
+            raise ValueError(f"Assets {sorted(missing)} are not part of the simulation")
+
         logger.info(f"Running {config.num_simulations:,} Monte Carlo simulations...")
         start_time = time.time()
 
-        if config.initial_price is None:
-            config.initial_price = self.df.select("close").row(-1)[0]
+        if config.initial_price is None and len(self.models) == 1:
+            config.initial_price = next(iter(self.models.values())).last_price
+        daily = config.resolution == SimulationResolution.DAILY
+        # Fit and align before the engine is sent to the workers
+        if config.simulation_method == MonteCarloSimulationMethods.T_STUDENT:
+            self.fit_t_distributions(daily)
+        if daily:
+            _ = self.daily_historical_returns
+        calendar = simulation_calendar(config.investment_months, daily)
+
+        streaming = (
+            config.chunk_size is not None
+            and 0 < config.chunk_size < config.num_simulations
+        )
+        chunk_size = config.chunk_size if streaming else SIMULATION_CHUNK_SIZE
+        if daily:
+            cells_per_path = len(calendar) * len(strategy.get_asset_ids())
+            chunk_size = min(chunk_size, max(1, DAILY_CHUNK_CELLS // cells_per_path))
+        chunk_sizes = [
+            min(chunk_size, config.num_simulations - start)
+            for start in range(0, config.num_simulations, chunk_size)
+        ]
+        *chunk_seeds, sample_seed = np.random.SeedSequence(config.seed).spawn(
+            len(chunk_sizes) + 1
+        )
+        sample_rng = np.random.default_rng(sample_seed)
+        sample_count = min(20, config.num_simulations)
+
+        workers = min(max_workers or os.cpu_count() or 1, len(chunk_sizes))
+        logger.info(f"Simulating {len(chunk_sizes)} chunk(s) on {workers} worker(s)")
+
+        if streaming:
+            # Spread the sample paths over chunks so that, together, they are
+            # a uniform sample without replacement of every simulation
+            sample_counts = sample_rng.multivariate_hypergeometric(
+                chunk_sizes, sample_count
+            )
+            summaries = self._map_chunks(
+                MonteCarloEngine._summarise_chunk,
+                workers,
+                itertools.repeat(config),
+                itertools.repeat(strategy),
+                itertools.repeat(calendar),
+                chunk_seeds,
+                chunk_sizes,
+                sample_counts,
+            )
+            results = self._streaming_results(config, summaries)
+        else:
+            chunks = self._map_chunks(
+                MonteCarloEngine._simulate_chunk,
+                workers,
+                itertools.repeat(config),
+                itertools.repeat(strategy),
+                itertools.repeat(calendar),
+                chunk_seeds,
+                chunk_sizes,
+            )
+            portfolio_paths, invested_paths, sharpe_ratios, max_drawdowns = zip(*chunks)
+            sample_indices = sample_rng.choice(
+                config.num_simulations, sample_count, replace=False
+            )
+            results = self._in_memory_results(
+                np.concatenate(portfolio_paths),
+                np.concatenate(invested_paths),
+                np.concatenate(sharpe_ratios),
+                np.concatenate(max_drawdowns),
+                sample_indices,
+            )
+
+        elapsed_time = time.time() - start_time
+        logger.info(f"Simulation completed in {elapsed_time:.2f} seconds")
+        return results
 
-        return_scenarios = self.generate_returns(config)
+    def _map_chunks(self, method: Callable, workers: int, *task_args) -> Iterator:
+        """
+        ``method(self, *args)`` for every chunk, yielded in chunk order as
+        they complete, so callers can fold results without holding them all.
+        """
+        if workers <= 1:
+            for args in zip(*task_args):
+                yield method(self, *args)
+            return
 
-        portfolio_paths = np.zeros(
-            (config.num_simulations, config.investment_months + 1)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_simulation_worker,
+            initargs=(self,),
+        ) as pool:
+            yield from pool.map(
+                _run_simulation_chunk, itertools.repeat(method), *task_args
+            )
+
+    def _simulate_chunk(
+        self,
+        config: MonteCarloConfig,
+        strategy: BacktestStrategy,
+        calendar: TradingCalendar,
+        seed: np.random.SeedSequence,
+        rows: int,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Portfolio paths, invested paths, per-path Sharpe ratios and max
+        drawdowns of one chunk.
+        """
+        return_scenarios = self.generate_returns(
+            config, rows, np.random.default_rng(seed)
+        )
+        portfolio_paths, invested_paths, max_drawdowns = self._simulate_paths(
+            config, strategy, calendar, return_scenarios
         )
-        shares_accumulated = np.zeros(
-            (config.num_simulations, config.investment_months + 1)
+        return (
+            portfolio_paths,
+            invested_paths,
+            self._sharpe_ratios(portfolio_paths, invested_paths),
+            max_drawdowns,
         )
 
-        # Vectorised DCA: compute all paths without Python loops
-        price_paths = config.initial_price * np.cumprod(
-            1 + return_scenarios, axis=1
-        )  # (n_sims, n_months)
-        cumulative_shares = np.cumsum(
-            config.monthly_investment / price_paths, axis=1
-        )  # (n_sims, n_months)
-        portfolio_paths[:, 1:] = cumulative_shares * price_paths
-        shares_accumulated[:, 1:] = cumulative_shares
+    def _summarise_chunk(
+        self,
+        config: MonteCarloConfig,
+        strategy: BacktestStrategy,
+        calendar: TradingCalendar,
+        seed: np.random.SeedSequence,
+        rows: int,
+        sample_count: int,
+    ) -> _ChunkSummary:
+        """Streaming aggregates of one chunk; only these leave the worker."""
+        rng = np.random.default_rng(seed)
+        return_scenarios = self.generate_returns(config, rows, rng)
+        portfolio_paths, invested_paths, max_drawdowns = self._simulate_paths(
+            config, strategy, calendar, return_scenarios
+        )
         final_values = portfolio_paths[:, -1]
+        total_invested = invested_paths[:, -1]
+        returns = (final_values - total_invested) / total_invested
+        sample_indices = rng.choice(rows, sample_count, replace=False)
 
-        total_invested = config.monthly_investment * config.investment_months
+        values = QuantileSketch(columns=portfolio_paths.shape[1])
+        values.add(portfolio_paths)
+        return_sketch = QuantileSketch(min_value=1e-6, max_value=1e6)
+        return_sketch.add(returns)
+        drawdowns = QuantileSketch(min_value=1e-6, max_value=1.0)
+        drawdowns.add(max_drawdowns)
+        return_moments = RunningMoments()
+        return_moments.add(returns)
 
-        final_percentiles = {
-            5: np.percentile(final_values, 5),
-            10: np.percentile(final_values, 10),
-            25: np.percentile(final_values, 25),
-            50: np.percentile(final_values, 50),
-            75: np.percentile(final_values, 75),
-            90: np.percentile(final_values, 90),
-            95: np.percentile(final_values, 95),
-        }
+        return _ChunkSummary(
+            values=values,
+            returns=return_sketch,
+            drawdowns=drawdowns,
+            return_moments=return_moments,
+            invested_sum=invested_paths.sum(axis=0),
+            losses=int(np.count_nonzero(final_values < total_invested)),
+            sharpe_sum=float(
+                np.sum(self._sharpe_ratios(portfolio_paths, invested_paths))
+            ),
+            drawdown_sum=float(np.sum(max_drawdowns)),
+            sample_paths=portfolio_paths[sample_indices],
+        )
+
+    def _in_memory_results(
+        self,
+        portfolio_paths: np.ndarray,
+        invested_paths: np.ndarray,
+        sharpe_ratios: np.ndarray,
+        max_drawdowns: np.ndarray,
+        sample_indices: np.ndarray,
+    ) -> SimulationResults:
+        final_values = portfolio_paths[:, -1]
+        total_invested = invested_paths[:, -1]
+
+        final_percentiles = dict(
+            zip(PERCENTILE_LEVELS, np.percentile(final_values, PERCENTILE_LEVELS))
+        )
 
         # Risk metrics
         returns = (final_values - total_invested) / total_invested
-        # Sharpe: annualised mean/std of the simulated monthly returns (periodic, not total)
-        _monthly_means = np.mean(return_scenarios, axis=1)
-        _monthly_stds = np.std(return_scenarios, axis=1)
-        sharpe_ratio = float(
-            np.mean(_monthly_means / np.maximum(_monthly_stds, 1e-10) * np.sqrt(12))
-        )
         risk_metrics = {
             "probability_of_loss": np.mean(final_values < total_invested),
             "mean_return": np.mean(returns),
             "std_return": np.std(returns),
-            "sharpe_ratio": sharpe_ratio,
-            "max_drawdown": self._calculate_max_drawdown(
-                portfolio_paths, config.monthly_investment
-            ),
+            "sharpe_ratio": float(np.mean(sharpe_ratios)),
+            "max_drawdown": float(np.mean(max_drawdowns)),
             "var_95": np.percentile(returns, 5),  # Value at Risk (95% confidence)
             "cvar_95": np.mean(
                 returns[returns <= np.percentile(returns, 5)]
             ),  # Conditional VaR
         }
 
-        percentile_levels = [5, 10, 25, 50, 75, 90, 95]
-        percentile_paths = np.percentile(portfolio_paths, percentile_levels, axis=0)
-
-        invested_per_month = (
-            np.arange(config.investment_months + 1) * config.monthly_investment
-        )
-
-        chart_data = [
-            {
-                "month": month,
-                "invested": round(float(invested_per_month[month]), 2),
-                "p5": round(float(percentile_paths[0, month]), 2),
-                "p10": round(float(percentile_paths[1, month]), 2),
-                "p25": round(float(percentile_paths[2, month]), 2),
-                "p50": round(float(percentile_paths[3, month]), 2),
-                "p75": round(float(percentile_paths[4, month]), 2),
-                "p90": round(float(percentile_paths[5, month]), 2),
-                "p95": round(float(percentile_paths[6, month]), 2),
-            }
-            for month in range(config.investment_months + 1)
-        ]
+        percentile_paths = np.percentile(portfolio_paths, PERCENTILE_LEVELS, axis=0)
+        max_drawdown_percentiles = dict(
+            zip(
+                PERCENTILE_LEVELS,
+                np.percentile(max_drawdowns, PERCENTILE_LEVELS).tolist(),
+            )
+        )
 
-        sample_count = min(20, config.num_simulations)
-        sample_indices = np.random.choice(
-            config.num_simulations, sample_count, replace=False
+        histogram_counts, histogram_edges = np.histogram(final_values, bins=50)
+        return SimulationResults(
+            invested_per_month=np.mean(invested_paths, axis=0),
+            percentile_paths=percentile_paths,
+            sample_path_values=portfolio_paths[sample_indices],
+            histogram_counts=histogram_counts,
+            histogram_edges=histogram_edges,
+            total_invested=float(np.mean(total_invested)),
+            final_percentiles=final_percentiles,
+            risk_metrics=risk_metrics,
+            max_drawdown_percentiles=max_drawdown_percentiles,
         )
-        sample_paths = [
-            [round(float(v), 2) for v in portfolio_paths[i]] for i in sample_indices
-        ]
 
-        hist_counts, bin_edges = np.histogram(final_values, bins=50)
-        histogram = [
-            {
-                "min": round(float(bin_edges[i]), 2),
-                "max": round(float(bin_edges[i + 1]), 2),
-                "count": int(hist_counts[i]),
-            }
-            for i in range(len(hist_counts))
-        ]
+    def _streaming_results(
+        self, config: MonteCarloConfig, summaries: Iterable[_ChunkSummary]
+    ) -> SimulationResults:
+        """
+        Results of the streaming mode, where only per-chunk aggregates are
+        kept and merged as chunks complete, so peak memory depends on the
+        chunk size and the horizon only.
 
-        elapsed_time = time.time() - start_time
-        logger.info(f"Simulation completed in {elapsed_time:.2f} seconds")
+        Percentiles, the histogram, VaR and CVaR come from quantile sketches
+        and are accurate to about 1% of the value.
+        """
+        summaries = iter(summaries)
+        summary = next(summaries)
+        for other in summaries:
+            summary.merge(other)
+
+        percentile_paths = summary.values.quantiles(PERCENTILE_LEVELS)
+        final_percentiles = dict(zip(PERCENTILE_LEVELS, percentile_paths[:, -1]))
+        invested_per_month = summary.invested_sum / config.num_simulations
+
+        risk_metrics = {
+            "probability_of_loss": summary.losses / config.num_simulations,
+            "mean_return": summary.return_moments.mean,
+            "std_return": summary.return_moments.std,
+            "sharpe_ratio": summary.sharpe_sum / config.num_simulations,
+            "max_drawdown": summary.drawdown_sum / config.num_simulations,
+            "var_95": float(summary.returns.quantiles([5])[0, 0]),
+            "cvar_95": summary.returns.tail_mean(5),
+        }
+        max_drawdown_percentiles = dict(
+            zip(
+                PERCENTILE_LEVELS,
+                summary.drawdowns.quantiles(PERCENTILE_LEVELS)[:, 0].tolist(),
+            )
+        )
 
+        histogram_counts, histogram_edges = summary.values.histogram(
+            50, column=len(invested_per_month) - 1
+        )
         return SimulationResults(
-            chart_data=chart_data,
-            sample_paths=sample_paths,
-            histogram=histogram,
-            total_invested=total_invested,
+            invested_per_month=invested_per_month,
+            percentile_paths=percentile_paths,
+            sample_path_values=summary.sample_paths,
+            histogram_counts=histogram_counts,
+            histogram_edges=histogram_edges,
+            total_invested=float(invested_per_month[-1]),
             final_percentiles=final_percentiles,
             risk_metrics=risk_metrics,
+            max_drawdown_percentiles=max_drawdown_percentiles,
         )
 
+    def _simulate_paths(
+        self,
+        config: MonteCarloConfig,
+        strategy: BacktestStrategy,
+        calendar: TradingCalendar,
+        return_scenarios: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Portfolio value and cumulative amount invested at every month end,
+        month 0 (empty) included, and the max drawdown of every path over
+        all of its trading days.
+        """
+        if len(self.models) == 1:
+            assert config.initial_price is not None
+            initial_prices = np.array([config.initial_price])
+        else:
+            initial_prices = np.array([m.last_price for m in self.models.values()])
+        columns = [self.asset_ids.index(a) for a in strategy.get_asset_ids()]
+
+        # Month k trades at the price reached after the month's return
+        dtype = return_scenarios.dtype
+        price_paths = initial_prices[columns].astype(dtype) * np.cumprod(
+            1 + return_scenarios[..., columns], axis=1
+        )  # (n_sims, n_days, n_assets) in the strategy's asset order
+
+        cash_flow_plan = strategy.plan_paths(calendar, price_paths)
+        if cash_flow_plan is None:
+            raise ValueError(
+                f"{type(strategy).__name__} has no batched plan to simulate"
+            )
+        _, cash_flows, values, _ = execute_plan(
+            cash_flow_plan.astype(dtype, copy=False), price_paths
+        )
+        max_drawdowns = self.calculate_max_drawdowns(values)
+
+        month_ends = np.append(
+            np.flatnonzero(calendar.period_start_mask(CalendarPeriod.MONTH))[1:] - 1,
+            len(calendar) - 1,
+        )
+        portfolio_paths = np.zeros((len(return_scenarios), len(month_ends) + 1))
+        portfolio_paths[:, 1:] = values[:, month_ends]
+        invested_paths = np.zeros_like(portfolio_paths)
+        invested_paths[:, 1:] = np.cumsum(cash_flows, axis=1)[:, month_ends]
+        return portfolio_paths, invested_paths, max_drawdowns
+
+    @staticmethod
+    def _sharpe_ratios(
+        portfolio_paths: np.ndarray, invested_paths: np.ndarray
+    ) -> np.ndarray:
+        """
+        Annualised mean/std of every path's monthly time-weighted portfolio
+        returns, so the month's cash flow is not counted as a gain; months
+        that start with an empty portfolio are skipped.
+        """
+        previous = portfolio_paths[:, :-1]
+        held = previous > 0
+        growth = portfolio_paths[:, 1:] - np.diff(invested_paths, axis=1)
+        monthly_returns = (
+            np.divide(growth, previous, out=np.ones_like(growth), where=held) - 1
+        )
+
+        months = np.maximum(held.sum(axis=1), 1)
+        monthly_means = monthly_returns.sum(axis=1) / months
+        deviations = np.where(held, monthly_returns - monthly_means[:, np.newaxis], 0)
+        monthly_stds = np.sqrt((deviations**2).sum(axis=1) / months)
+        return monthly_means / np.maximum(monthly_stds, 1e-10) * np.sqrt(12)
+
     @staticmethod
-    def _calculate_max_drawdown(
-        portfolio_paths: np.ndarray, monthly_investment: float
-    ) -> float:
-        max_drawdowns = []
-
-        for sim in range(portfolio_paths.shape[0]):
-            # Calculate running maximum of portfolio value
-            portfolio_values = portfolio_paths[sim, :]
-            running_max = np.maximum.accumulate(portfolio_values)
-
-            # Calculate drawdown (as percentage of running max)
-            drawdowns = (portfolio_values - running_max) / np.maximum(running_max, 1)
-            max_drawdown = np.min(drawdowns)
-            max_drawdowns.append(max_drawdown)
-
-        return np.mean(max_drawdowns)
+    def calculate_max_drawdowns(
+        portfolio_paths: np.ndarray, chunk_rows: int = DRAWDOWN_CHUNK_ROWS
+    ) -> np.ndarray:
+        """
+        Worst drawdown of every path, as a fraction of its running maximum
+        (running maxima below 1 are treated as 1 so empty months divide
+        safely).
+
+        Paths are processed ``chunk_rows`` at a time with one axis-wise
+        ``maximum.accumulate`` per block.
+        """
+        max_drawdowns = np.empty(portfolio_paths.shape[0])
+        for start in range(0, portfolio_paths.shape[0], chunk_rows):
+            block = portfolio_paths[start : start + chunk_rows]
+            running_max = np.maximum.accumulate(block, axis=1)
+            drawdowns = block - running_max
+            drawdowns /= np.maximum(running_max, 1, out=running_max)
+            max_drawdowns[start : start + len(block)] = drawdowns.min(axis=1)
+        return max_drawdowns
@@ -0,0 +1,146 @@
+"""
+Bounded-memory aggregates for streaming Monte Carlo simulations.
+
+When simulations are processed in chunks, no step ever sees every path. These
+aggregates take one chunk at a time and need memory that depends only on the
+number of months, not on the number of simulations:
+
+- ``QuantileSketch``: per-column percentiles with a fixed relative error
+  (a dense DDSketch), also used to rebuild histograms and tail means
+- ``RunningMoments``: count, mean and population variance (Chan et al.)
+
+Both can be built per chunk in worker processes and merged afterwards.
+"""
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with dense logarithmic buckets.
+
+    A value ``x`` lands in bucket ``ceil(log_gamma(|x|))`` with
+    ``gamma = (1 + a) / (1 - a)``, so every quantile is returned within a
+    relative error ``a`` of a real sample value. Magnitudes below
+    ``min_value`` count as zero and above ``max_value`` are clamped, which
+    fixes the number of buckets per column up front.
+    """
+
+    def __init__(
+        self,
+        columns: int = 1,
+        relative_accuracy: float = 0.01,
+        min_value: float = 1e-2,
+        max_value: float = 1e12,
+    ):
+        self.columns = columns
+        self.min_value = min_value
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(gamma)
+        self._min_key = int(np.floor(np.log(min_value) / self._log_gamma))
+        max_key = int(np.ceil(np.log(max_value) / self._log_gamma))
+        self._buckets = max_key - self._min_key + 1
+
+        # Positions: negative buckets (largest magnitude first), zero, positive
+        magnitudes = 2 * gamma ** np.arange(self._min_key, max_key + 1) / (gamma + 1)
+        self._values = np.concatenate((-magnitudes[::-1], [0.0], magnitudes))
+        self.counts = np.zeros((columns, len(self._values)), dtype=np.int64)
+        self.count = 0
+        self.min = np.full(columns, np.inf)
+        self.max = np.full(columns, -np.inf)
+
+    @property
+    def nbytes(self) -> int:
+        return self.counts.nbytes + self._values.nbytes
+
+    def add(self, values: np.ndarray):
+        """Add a chunk of rows, shaped (rows, columns) or (rows,) for one column."""
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+        magnitude = np.abs(values)
+        keys = np.ceil(
+            np.log(np.maximum(magnitude, self.min_value)) / self._log_gamma
+        ).astype(np.int64)
+        keys = np.clip(keys - self._min_key, 0, self._buckets - 1)
+
+        zero = self._buckets
+        positions = np.where(
+            magnitude < self.min_value,
+            zero,
+            np.where(values > 0, zero + 1 + keys, zero - 1 - keys),
+        )
+        positions += np.arange(self.columns) * len(self._values)
+        self.counts += np.bincount(
+            positions.ravel(), minlength=self.counts.size
+        ).reshape(self.counts.shape)
+
+        self.count += len(values)
+        if len(values):
+            np.minimum(self.min, values.min(axis=0), out=self.min)
+            np.maximum(self.max, values.max(axis=0), out=self.max)
+
+    def merge(self, other: "QuantileSketch"):
+        """Add every value of a sketch built with the same parameters."""
+        assert self.counts.shape == other.counts.shape, "Incompatible sketches"
+        self.counts += other.counts
+        self.count += other.count
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+
+    def quantiles(self, percentiles: list[float]) -> np.ndarray:
+        """Percentiles (0-100) of every column, shaped (len(percentiles), columns)."""
+        ranks = np.asarray(percentiles, dtype=np.float64) / 100 * (self.count - 1)
+        cumulative = np.cumsum(self.counts, axis=1)
+        result = np.empty((len(ranks), self.columns))
+        for column in range(self.columns):
+            positions = np.searchsorted(cumulative[column], ranks, side="right")
+            result[:, column] = np.clip(
+                self._values[positions], self.min[column], self.max[column]
+            )
+        return result
+
+    def tail_mean(self, percentile: float, column: int = 0) -> float:
+        """Approximate mean of the values at or below ``percentile``."""
+        rank = percentile / 100 * (self.count - 1)
+        counts = self.counts[column]
+        last = np.searchsorted(np.cumsum(counts), rank, side="right")
+        tail_counts = counts[: last + 1]
+        values = np.clip(self._values[: last + 1], self.min[column], self.max[column])
+        return float(np.dot(tail_counts, values) / tail_counts.sum())
+
+    def histogram(self, bins: int, column: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """Counts and edges of ``bins`` equal-width bins from min to max."""
+        edges = np.linspace(self.min[column], self.max[column], bins + 1)
+        values = np.clip(self._values, self.min[column], self.max[column])
+        counts, _ = np.histogram(values, bins=edges, weights=self.counts[column])
+        return counts.astype(np.int64), edges
+
+
+class RunningMoments:
+    """Count, mean and population variance, merged one chunk at a time."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        chunk = RunningMoments()
+        chunk.count = len(values)
+        chunk.mean = float(np.mean(values))
+        chunk._m2 = float(np.sum((values - chunk.mean) ** 2))
+        self.merge(chunk)
+
+    def merge(self, other: "RunningMoments"):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta**2 * self.count * other.count / total
+        self.count = total
+
+    @property
+    def std(self) -> float:
+        return (self._m2 / self.count) ** 0.5 if self.count else 0.0
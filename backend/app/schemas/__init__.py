@@ -16,5 +16,8 @@ from .backtest import (
     BacktestMetrics,  # noqa: F401
     BacktestResponse,  # noqa: F401
     BacktestResult,  # noqa: F401
+    BacktestSummary,  # noqa: F401
+    BatchBacktestRequest,  # noqa: F401
+    BatchBacktestResponse,  # noqa: F401
     BaseModel,  # noqa: F401
 )
@@ -117,6 +117,48 @@ class BacktestResponse(BaseModel):
     data: BacktestResult
 
 
+class BatchBacktestRequest(BacktestRequest):
+    """
+    One strategy run over the cartesian product of ``parameter_grid``.
+
+    Each grid entry maps a strategy parameter to the values to try, e.g.
+    ``{"amount_per_period": [100, 200], "frequency": ["weekly", "monthly"]}``.
+    Grid values override ``parameters`` for each configuration.
+    """
+
+    parameters: dict[str, Any] = {}
+    parameter_grid: dict[str, list[Any]]
+    include_history: bool = False
+
+
+class BacktestSummary(BaseModel):
+    parameters: dict[str, Any]
+    total_invested: Decimal
+    final_value: Decimal
+    total_return_pct: Decimal
+    total_return_abs: Decimal
+    avg_daily_return: Decimal
+    metrics: BacktestMetrics
+    history: list[DailySnapshot] | None = None
+
+    @field_serializer(
+        "total_invested",
+        "final_value",
+        "total_return_pct",
+        "total_return_abs",
+        "avg_daily_return",
+        when_used="json",
+    )
+    def serialize_decimal(self, value: Decimal) -> float:
+        return float(value)
+
+
+class BatchBacktestResponse(BaseModel):
+    batch_id: UUID
+    strategy: str
+    results: list[BacktestSummary]
+
+
 class MaxDrawdownResponse(BaseModel):
     max_drawdown: Decimal
     max_drawdown_duration: int
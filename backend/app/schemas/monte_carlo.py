@@ -1,13 +1,25 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
+import numpy as np
+from pydantic import BaseModel, Field
+
+from app.utils.columnar_response import ColumnarPayload
+
 
 class MonteCarloSimulationMethods(str, Enum):
     NORMAL_DISTRIBUTION = "Normal Distribution"
     BOOTSTRAP = "Bootstrap"
+    BLOCK_BOOTSTRAP = "Block Bootstrap"
+    STATIONARY_BOOTSTRAP = "Stationary Bootstrap"
     T_STUDENT = "T-Student"
 
 
+class SimulationResolution(str, Enum):
+    MONTHLY = "Monthly"
+    DAILY = "Daily"
+
+
 @dataclass
 class MonteCarloConfig:
     monthly_investment: float = 1000.0
@@ -17,16 +29,63 @@ class MonteCarloConfig:
     simulation_method: MonteCarloSimulationMethods = (
         MonteCarloSimulationMethods.BOOTSTRAP
     )
+    # Simulations per chunk in streaming mode; None keeps every path in memory
+    chunk_size: int | None = None
+    # Same seed, same results, whatever the number of workers; None is random
+    seed: int | None = None
+    # Months per block (mean length for the stationary bootstrap); trading
+    # days per block at daily resolution
+    block_length: int = 6
+    # Daily steps show intramonth drawdowns; results stay monthly either way
+    resolution: SimulationResolution = SimulationResolution.MONTHLY
 
 
 @dataclass
 class SimulationResults:
-    chart_data: list[dict]
-    sample_paths: list[list[float]]
-    histogram: list[dict]
+    """
+    Monte Carlo results. The per-month series are kept as NumPy arrays; the
+    list-of-dicts views used by the JSON response are only built on access,
+    and ``to_columnar`` hands the arrays over as they are.
+    """
+
+    invested_per_month: np.ndarray  # (months + 1,)
+    percentile_paths: np.ndarray  # (percentile levels, months + 1)
+    sample_path_values: np.ndarray  # (samples, months + 1)
+    histogram_counts: np.ndarray  # (bins,)
+    histogram_edges: np.ndarray  # (bins + 1,)
     total_invested: float
     final_percentiles: dict[int, float]
     risk_metrics: dict[str, float]
+    max_drawdown_percentiles: dict[int, float] = field(default_factory=dict)
+
+    @property
+    def chart_data(self) -> list[dict]:
+        return [
+            {
+                "month": month,
+                "invested": round(float(self.invested_per_month[month]), 2),
+                **{
+                    f"p{level}": round(float(self.percentile_paths[i, month]), 2)
+                    for i, level in enumerate(self.final_percentiles)
+                },
+            }
+            for month in range(len(self.invested_per_month))
+        ]
+
+    @property
+    def sample_paths(self) -> list[list[float]]:
+        return [[round(float(v), 2) for v in path] for path in self.sample_path_values]
+
+    @property
+    def histogram(self) -> list[dict]:
+        return [
+            {
+                "min": round(float(self.histogram_edges[i]), 2),
+                "max": round(float(self.histogram_edges[i + 1]), 2),
+                "count": int(self.histogram_counts[i]),
+            }
+            for i in range(len(self.histogram_counts))
+        ]
 
     def to_dict(self):
         return {
@@ -36,4 +95,51 @@ class SimulationResults:
             "total_invested": self.total_invested,
             "final_percentiles": self.final_percentiles,
             "risk_metrics": self.risk_metrics,
+            "max_drawdown_percentiles": self.max_drawdown_percentiles,
         }
+
+    def to_columnar(self) -> ColumnarPayload:
+        """
+        One row per month (chart columns, then ``sample_<i>`` per sample
+        path), rounded like ``to_dict``; the histogram goes in the metadata.
+        """
+        table = {
+            "month": np.arange(len(self.invested_per_month)),
+            "invested": np.round(self.invested_per_month, 2),
+        }
+        for i, level in enumerate(self.final_percentiles):
+            table[f"p{level}"] = np.round(self.percentile_paths[i], 2)
+        for i, path in enumerate(self.sample_path_values):
+            table[f"sample_{i}"] = np.round(path, 2)
+
+        return ColumnarPayload(
+            table=table,
+            metadata={
+                "histogram": {
+                    "min": np.round(self.histogram_edges[:-1], 2).tolist(),
+                    "max": np.round(self.histogram_edges[1:], 2).tolist(),
+                    "count": self.histogram_counts.tolist(),
+                },
+                "total_invested": self.total_invested,
+                "final_percentiles": _floats(self.final_percentiles),
+                "risk_metrics": _floats(self.risk_metrics),
+                "max_drawdown_percentiles": _floats(self.max_drawdown_percentiles),
+            },
+        )
+
+
+def _floats(values: dict) -> dict:
+    return {key: float(value) for key, value in values.items()}
+
+
+class PortfolioMonteCarloRequest(BaseModel):
+    # Asset id -> weight of the initial investment; weights sum to 1
+    allocation: dict[int, float]
+    initial_investment: float = Field(gt=0)
+    investment_months: int = Field(gt=0)
+    simulation_method: MonteCarloSimulationMethods = (
+        MonteCarloSimulationMethods.BLOCK_BOOTSTRAP
+    )
+    block_length: int = Field(6, gt=0)
+    resolution: SimulationResolution = SimulationResolution.MONTHLY
+    seed: int | None = Field(None, ge=0)
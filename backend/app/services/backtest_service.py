@@ -1,13 +1,20 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, timedelta
+from decimal import Decimal
 from enum import Enum
 
+import numpy as np
+
 from app import crud, schemas
+from app.backtesting.columnar import ColumnarHistory
 from app.backtesting.engine import BacktestEngine
 from app.backtesting.strategies import base
 from app.backtesting.strategies.base import BacktestStrategy
 from app.backtesting.strategies.buy_hold import BuyAndHoldStrategy
 from app.backtesting.strategies.dca import DCAStrategy
 from app.backtesting.strategies.va import VAStrategy
+from app.backtesting.trading_calendar import TradingCalendar
 from app.core import PriceService
 from app.logger import logger
 from fastapi import HTTPException
@@ -26,35 +33,260 @@ STRATEGY_REGISTRY: dict[StrategyType | str, type[BacktestStrategy]] = {
     StrategyType.VA: VAStrategy,
 }
 
+MAX_BATCH_CONFIGURATIONS = 200
+
+DCA_FREQUENCIES = {"daily", "weekly", "monthly"}
+
+# Price data shared by every configuration in a batch, set once per worker process
+_batch_price_data: tuple[TradingCalendar, dict[tuple[int, date], float]] | None = None
+
+
+def _init_batch_worker(
+    trading_days: TradingCalendar, price_lookup: dict[tuple[int, date], float]
+):
+    global _batch_price_data
+    _batch_price_data = (trading_days, price_lookup)
+
+
+def _run_batch_configuration(
+    request: schemas.BacktestRequest, include_history: bool
+) -> schemas.BacktestSummary:
+    assert _batch_price_data is not None, "Batch worker not initialised"
+    trading_days, price_lookup = _batch_price_data
+    return BacktestService.run_configuration(
+        request, trading_days, price_lookup, include_history
+    )
+
 
 class BacktestService:
     def __init__(self, db: Session):
         self.db = db
         self.price_service = PriceService(db)
-        self.engine = BacktestEngine(self.db)
 
     def run_backtest(
         self, request: schemas.BacktestRequest, user_id: str, save_backtest: bool = True
     ) -> schemas.BacktestResult:
-        strategy = self._create_strategy(request)
+        backtest_result, _ = self._run_and_save(request, user_id, save_backtest)
+        return backtest_result
+
+    def run_backtest_columnar(
+        self, request: schemas.BacktestRequest, user_id: str, save_backtest: bool = True
+    ) -> tuple[schemas.BacktestResult, dict[str, np.ndarray]]:
+        """
+        ``run_backtest`` for columnar responses: the daily history comes back
+        as named columns and no per-day snapshot is built.
+        """
+        backtest_result, history = self._run_and_save(
+            request, user_id, save_backtest, include_history=False
+        )
+        return backtest_result, history.to_columns()
+
+    def _run_and_save(
+        self,
+        request: schemas.BacktestRequest,
+        user_id: str,
+        save_backtest: bool,
+        include_history: bool = True,
+    ) -> tuple[schemas.BacktestResult, ColumnarHistory]:
+        trading_days, price_lookup = self._load_price_data(request)
+        strategy = self._create_strategy(request, trading_days)
 
         logger.info(
             f"Running {request.strategy} on asset(s) {request.asset_ids} from {request.start_date} to {request.end_date} with initial investment {request.initial_cash} and parameters {request.parameters}"
         )
 
-        backtest_result = self.engine.run(
+        backtest_result, history = BacktestEngine.simulate_columnar_history(
             strategy=strategy,
+            trading_days=trading_days,
+            price_lookup=price_lookup,
             start_date=request.start_date,
             end_date=request.end_date,
             initial_cash=request.initial_cash,
+            include_history=include_history,
         )
 
         if save_backtest:
             crud.backtest.save_backtest(request, backtest_result, user_id, self.db)
 
-        return backtest_result
+        return backtest_result, history
+
+    def run_many(
+        self, request: schemas.BatchBacktestRequest, max_workers: int = 1
+    ) -> list[schemas.BacktestSummary]:
+        """
+        Run one strategy over every combination in ``request.parameter_grid``.
+
+        Trading days and prices are loaded once and shared by all
+        configurations. They run inline by default, which suits HTTP requests:
+        a planned configuration takes milliseconds, and a process pool per
+        request would be forked from the threaded server with nothing bounding
+        pools across requests. Scripts and benchmarks can pass ``max_workers``
+        to spread configurations over a process pool. Summaries are returned
+        in grid order; daily histories only if ``include_history``.
+        """
+        configurations = self.expand_parameter_grid(request)
+        trading_days, price_lookup = self._load_price_data(request)
+
+        workers = min(max_workers, len(configurations))
+        logger.info(
+            f"Running batch of {len(configurations)} {request.strategy} configurations on {workers} worker(s)"
+        )
+
+        if workers <= 1:
+            return [
+                self.run_configuration(
+                    configuration, trading_days, price_lookup, request.include_history
+                )
+                for configuration in configurations
+            ]
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(trading_days, price_lookup),
+        ) as pool:
+            return list(
+                pool.map(
+                    _run_batch_configuration,
+                    configurations,
+                    itertools.repeat(request.include_history),
+                )
+            )
+
+    @classmethod
+    def run_configuration(
+        cls,
+        request: schemas.BacktestRequest,
+        trading_days: TradingCalendar,
+        price_lookup: dict[tuple[int, date], float],
+        include_history: bool = False,
+    ) -> schemas.BacktestSummary:
+        strategy = cls._create_strategy(request, trading_days)
+        result = BacktestEngine.simulate_columnar(
+            strategy=strategy,
+            trading_days=trading_days,
+            price_lookup=price_lookup,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            initial_cash=request.initial_cash,
+            include_history=include_history,
+        )
+
+        return schemas.BacktestSummary(
+            parameters=request.parameters,
+            total_invested=result.total_invested,
+            final_value=result.final_value,
+            total_return_pct=result.total_return_pct,
+            total_return_abs=result.total_return_abs,
+            avg_daily_return=result.avg_daily_return,
+            metrics=result.metrics,
+            history=result.history if include_history else None,
+        )
+
+    @staticmethod
+    def expand_parameter_grid(
+        request: schemas.BatchBacktestRequest,
+    ) -> list[schemas.BacktestRequest]:
+        keys = list(request.parameter_grid.keys())
+        base = request.model_dump(
+            exclude={"parameters", "parameter_grid", "include_history"}
+        )
+
+        return [
+            schemas.BacktestRequest(
+                **base, parameters={**request.parameters, **dict(zip(keys, values))}
+            )
+            for values in itertools.product(*request.parameter_grid.values())
+        ]
+
+    def validate_batch_request(
+        self, request: schemas.BatchBacktestRequest, db: Session
+    ):
+        # Parameters are checked per configuration below, once the grid is known
+        self._validate_assets_and_dates(request, db)
+
+        if not request.parameter_grid:
+            raise HTTPException(status_code=400, detail="Parameter grid is empty")
+
+        for name, values in request.parameter_grid.items():
+            if not values:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Parameter grid entry '{name}' has no values",
+                )
+
+        num_configurations = 1
+        for values in request.parameter_grid.values():
+            num_configurations *= len(values)
+
+        if num_configurations > MAX_BATCH_CONFIGURATIONS:
+            logger.warning(
+                f"Batch of {num_configurations} configurations exceeds limit of {MAX_BATCH_CONFIGURATIONS}"
+            )
+            raise HTTPException(
+                status_code=400,
+                detail=f"Parameter grid expands to {num_configurations} configurations, maximum is {MAX_BATCH_CONFIGURATIONS}",
+            )
+
+        for configuration in self.expand_parameter_grid(request):
+            self.validate_parameters(configuration)
+
+    def _load_price_data(
+        self, request: schemas.BacktestRequest
+    ) -> tuple[TradingCalendar, dict[tuple[int, date], float]]:
+        trading_days = TradingCalendar(
+            self.price_service.get_trading_days(request.start_date, request.end_date)
+        )
+        price_lookup = self.price_service.get_price_lookup(
+            request.asset_ids, request.start_date, request.end_date
+        )
+        return trading_days, price_lookup
 
     def validate_request(self, request: schemas.BacktestRequest, db: Session):
+        self._validate_assets_and_dates(request, db)
+        self.validate_parameters(request)
+
+    @staticmethod
+    def validate_parameters(request: schemas.BacktestRequest):
+        """Reject strategy parameters the strategy cannot run with."""
+
+        def reject(detail: str):
+            logger.warning(
+                f"Invalid backtest parameters {request.parameters}: {detail}"
+            )
+            raise HTTPException(status_code=400, detail=detail)
+
+        def is_positive_amount(value) -> bool:
+            return (
+                isinstance(value, (int, float, Decimal))
+                and not isinstance(value, bool)
+                and value > 0
+            )
+
+        parameters = request.parameters
+        if request.strategy == StrategyType.DCA:
+            if parameters.get("frequency") not in DCA_FREQUENCIES:
+                reject(
+                    f"DCA frequency must be one of: {', '.join(sorted(DCA_FREQUENCIES))}"
+                )
+            if not is_positive_amount(parameters.get("amount_per_period")):
+                reject("DCA amount_per_period must be positive")
+        elif request.strategy == StrategyType.VA:
+            if not is_positive_amount(parameters.get("target_increment_amount")):
+                reject("VA target_increment_amount must be positive")
+        elif request.strategy == StrategyType.BUY_AND_HOLD:
+            allocation = parameters.get("allocation")
+            if not allocation:
+                if len(request.asset_ids) != 1:
+                    reject("Buy and hold over several assets requires an allocation")
+            elif not isinstance(allocation, dict):
+                reject("Buy and hold allocation must map asset ids to weights")
+            elif not all(is_positive_amount(w) for w in allocation.values()):
+                reject("Buy and hold allocation weights must be positive")
+        else:
+            reject(f"Unknown strategy: {request.strategy}")
+
+    def _validate_assets_and_dates(self, request: schemas.BacktestRequest, db: Session):
         invalid_assets = self._validate_assets_exist(request.asset_ids)
         if invalid_assets:
             logger.warning(f"Asset(s) not found: {invalid_assets}")
@@ -161,15 +393,16 @@ class BacktestService:
 
         return assets_not_found
 
+    @classmethod
     def _create_strategy(
-        self, request: schemas.BacktestRequest
+        cls, request: schemas.BacktestRequest, trading_days: TradingCalendar
     ) -> base.BacktestStrategy:
         if request.strategy == StrategyType.BUY_AND_HOLD:
-            return self._create_buy_hold_strategy(request)
+            return cls._create_buy_hold_strategy(request)
         elif request.strategy == StrategyType.DCA:
-            return self._create_dca_strategy(request)
+            return cls._create_dca_strategy(request)
         elif request.strategy == StrategyType.VA:
-            return self._create_va_strategy(request)
+            return cls._create_va_strategy(request, trading_days)
 
         logger.error(f"Unhandled strategy: {request.strategy}")
         raise ValueError(f"Unhandled strategy: {request.strategy}")
@@ -206,20 +439,17 @@ class BacktestService:
             frequency=frequency,
         )
 
+    @staticmethod
     def _create_va_strategy(
-        self,
         request: schemas.BacktestRequest,
+        trading_days: TradingCalendar,
     ) -> VAStrategy:
         asset_id = request.asset_ids[0]
         target_increment_amount = request.parameters.get("target_increment_amount")
-        trading_days = self.price_service.get_trading_days(
-            request.start_date, request.end_date
-        )
 
         return VAStrategy(
             asset_id=asset_id,
             initial_investment=request.initial_cash,
             target_increment_amount=target_increment_amount,
             trading_days=trading_days,
-            price_service=self.price_service,
         )
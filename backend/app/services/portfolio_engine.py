@@ -1,7 +1,8 @@
+from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal
 
-import polars as pl
+import numpy as np
 from fastapi import HTTPException
 from sqlalchemy.orm.session import Session
 
@@ -11,6 +12,7 @@ from app.backtesting.metrics import (
     calculate_sharpe,
     calculate_volatility,
 )
+from app.services.price_cache import PriceArray
 
 
 def get_portfolio_data_for_user(
@@ -68,11 +70,7 @@ def get_portfolio_data_for_user(
 
     unique_asset_ids = list(set(t.asset_id for t in transactions))  # type: ignore[arg-type]
 
-    price_lookup = price_service.get_price_lookup(
-        unique_asset_ids,  # type: ignore[arg-type]
-        effective_start,
-        end_date,
-    )
+    price_arrays = price_service.get_price_arrays(unique_asset_ids)  # type: ignore[arg-type]
 
     # Pre-compute holdings from transactions before the effective start date so that
     # existing positions are correctly reflected without loading years of price history
@@ -81,16 +79,45 @@ def get_portfolio_data_for_user(
     initial_holdings = get_current_holdings(pre_start_txns) if pre_start_txns else {}
 
     history = calculate_portfolio_history(
-        in_range_txns, trading_days, price_lookup, initial_holdings
+        in_range_txns, trading_days, price_arrays, initial_holdings
     )
 
     return transactions, history
 
 
+@dataclass(frozen=True)
+class PortfolioSeries:
+    """Daily portfolio values as float arrays aligned with ``days``."""
+
+    days: list[date]
+    values: np.ndarray
+    cash_flows: np.ndarray
+    daily_return_val: np.ndarray
+    daily_return_pct: np.ndarray
+
+    def to_history(self) -> list[schemas.PortfolioValueHistory]:
+        return [
+            schemas.PortfolioValueHistory(
+                date=day,
+                value=Decimal(f"{value:.2f}"),
+                daily_return_pct=Decimal(f"{return_pct:.6f}"),
+                daily_return_val=Decimal(f"{return_val:.2f}"),
+                cash_flow=Decimal(f"{cash_flow:.2f}"),
+            )
+            for day, value, return_pct, return_val, cash_flow in zip(
+                self.days,
+                self.values.tolist(),
+                self.daily_return_pct.tolist(),
+                self.daily_return_val.tolist(),
+                self.cash_flows.tolist(),
+            )
+        ]
+
+
 def calculate_portfolio_history(
     transactions: list,
     trading_days: list[date],
-    price_lookup: dict[tuple[int, date], float],
+    price_arrays: dict[int, PriceArray],
     initial_holdings: dict | None = None,
 ) -> list[schemas.PortfolioValueHistory]:
     """
@@ -99,77 +126,113 @@ def calculate_portfolio_history(
     Args:
         transactions: list of transaction objects (sorted by timestamp)
         trading_days: list of trading days to calculate for
-        price_lookup: dictionary mapping (asset_id, date) to price
+        price_arrays: dictionary mapping asset_id to its PriceArray
         initial_holdings: pre-computed holdings before the first trading day
 
     Returns:
         list of PortfolioValueHistory with date, value, daily_return_pct
     """
-    holdings = dict(initial_holdings) if initial_holdings else {}
-    results = []
-    transaction_index = 0
-
-    for day in trading_days:
-        net_cash_flow = Decimal("0")
-
-        while (
-            transaction_index < len(transactions)
-            and transactions[transaction_index].timestamp.date() <= day
-        ):
-            txn = transactions[transaction_index]
-
-            if txn.type == "buy":
-                holdings[txn.asset_id] = (
-                    holdings.get(txn.asset_id, Decimal("0")) + txn.quantity
-                )
-                net_cash_flow += txn.quantity * txn.price
-
-            elif txn.type == "sell":
-                holdings[txn.asset_id] = (
-                    holdings.get(txn.asset_id, Decimal("0")) - txn.quantity
-                )
-                net_cash_flow -= txn.quantity * txn.price
-
-            transaction_index += 1
-
-        total_value = Decimal("0")
-        for asset_id, quantity in holdings.items():
-            if quantity > 0:
-                price = price_lookup.get((asset_id, day))
-                if price is not None:
-                    total_value += quantity * Decimal(str(price))
-
-        results.append(
-            schemas.PortfolioValueHistory(
-                date=day,
-                value=total_value.quantize(Decimal("0.01")),
-                daily_return_pct=Decimal("0"),
-                daily_return_val=Decimal("0"),
-                cash_flow=net_cash_flow.quantize(Decimal("0.01")),
-            )
-        )
+    return calculate_portfolio_series(
+        transactions, trading_days, price_arrays, initial_holdings
+    ).to_history()
+
+
+def calculate_portfolio_series(
+    transactions: list,
+    trading_days: list[date],
+    price_arrays: dict[int, PriceArray],
+    initial_holdings: dict | None = None,
+) -> PortfolioSeries:
+    """
+    Array version of calculate_portfolio_history.
 
-    if results:
-        results[0].daily_return_pct = Decimal("0")
-        results[0].daily_return_val = Decimal("0")
+    Transactions become a (day x asset) matrix of quantity deltas, each on the
+    first trading day on or after the transaction. Its cumulative sum gives
+    the holdings on every day, which are multiplied element-wise with the
+    price matrix. Days without a price for an asset value that asset at zero.
+    """
+    initial_holdings = initial_holdings or {}
+    asset_ids = list(
+        dict.fromkeys([*initial_holdings, *(t.asset_id for t in transactions)])
+    )
+    columns = {asset_id: i for i, asset_id in enumerate(asset_ids)}
+    day_ordinals = np.array([day.toordinal() for day in trading_days], dtype=np.int64)
+    n_days = len(trading_days)
+
+    signs = np.array(
+        [
+            1.0 if t.type == "buy" else -1.0 if t.type == "sell" else 0.0
+            for t in transactions
+        ]
+    )
+    quantities = signs * np.array([float(t.quantity) for t in transactions])
+    amounts = quantities * np.array([float(t.price) for t in transactions])
+    txn_days = np.searchsorted(
+        day_ordinals,
+        np.array(
+            [t.timestamp.date().toordinal() for t in transactions], dtype=np.int64
+        ),
+        side="left",
+    )
+    txn_columns = np.array([columns[t.asset_id] for t in transactions], dtype=np.int64)
+    # Transactions after the last trading day are not part of the history
+    in_range = txn_days < n_days
+
+    deltas = np.zeros((n_days, len(asset_ids)))
+    np.add.at(deltas, (txn_days[in_range], txn_columns[in_range]), quantities[in_range])
+    if n_days:
+        for asset_id, quantity in initial_holdings.items():
+            deltas[0, columns[asset_id]] += float(quantity)
+    holdings = np.cumsum(deltas, axis=0)
+
+    prices = _price_matrix(day_ordinals, asset_ids, price_arrays)
+    positions = np.where((holdings > 0) & ~np.isnan(prices), holdings * prices, 0.0)
+
+    values = np.round(positions.sum(axis=1), 2)
+    cash_flows = np.round(
+        np.bincount(txn_days[in_range], weights=amounts[in_range], minlength=n_days),
+        2,
+    )
 
-    for i in range(1, len(results)):
-        prev_value = results[i - 1].value
-        curr_value = results[i].value
-        cash_flow = results[i].cash_flow
+    daily_return_val = np.zeros(n_days)
+    daily_return_pct = np.zeros(n_days)
+    if n_days > 1:
+        previous = values[:-1]
+        gains = values[1:] - previous - cash_flows[1:]
+        invested = previous > 0
+        daily_return_val[1:] = np.where(invested, np.round(gains, 2), 0.0)
+        daily_return_pct[1:] = np.where(
+            invested, np.round(gains / np.where(invested, previous, 1.0), 6), 0.0
+        )
 
-        if prev_value > 0:
-            results[i].daily_return_pct = (
-                (curr_value - prev_value - cash_flow) / prev_value
-            ).quantize(Decimal("0.000001"))
-            results[i].daily_return_val = (
-                curr_value - prev_value - cash_flow
-            ).quantize(Decimal("0.01"))
-        else:
-            results[i].daily_return_pct = Decimal("0")
-            results[i].daily_return_val = Decimal("0")
+    # Adding 0.0 turns -0.0 into 0.0 so it never serialises as "-0.00"
+    return PortfolioSeries(
+        days=list(trading_days),
+        values=values + 0.0,
+        cash_flows=cash_flows + 0.0,
+        daily_return_val=daily_return_val + 0.0,
+        daily_return_pct=daily_return_pct + 0.0,
+    )
 
-    return results
+
+def _price_matrix(
+    day_ordinals: np.ndarray,
+    asset_ids: list[int],
+    price_arrays: dict[int, PriceArray],
+) -> np.ndarray:
+    """(day x asset) matrix of prices, NaN where an asset has no price that day."""
+    matrix = np.full((len(day_ordinals), len(asset_ids)), np.nan)
+    for column, asset_id in enumerate(asset_ids):
+        price_array = price_arrays.get(asset_id)
+        if price_array is None or len(price_array.ordinals) == 0:
+            continue
+        positions = np.minimum(
+            np.searchsorted(price_array.ordinals, day_ordinals),
+            len(price_array.ordinals) - 1,
+        )
+        found = price_array.ordinals[positions] == day_ordinals
+        matrix[found, column] = price_array.prices[positions[found]]
+    return matrix
 
 
 def get_current_holdings(transactions: list) -> dict[int, Decimal]:
@@ -241,71 +304,47 @@ def calculate_metrics(
 
 
 def calculate_holdings(
-    transactions: list[type[models.Transaction]],
-    latest_prices: pl.DataFrame,
+    positions: list[models.Position],
+    latest_prices: dict[int, dict],
     db: Session,
 ) -> dict:
     holdings = {}
 
-    unique_asset_ids = list({t.asset_id for t in transactions})
     asset_name_map: dict[int, str] = {
         asset.id: asset.asset_name
         for asset in db.query(models.Asset)
-        .filter(models.Asset.id.in_(unique_asset_ids))
+        .filter(models.Asset.id.in_([p.asset_id for p in positions]))
         .all()
     }
 
-    for transaction in transactions:
-        asset_id = str(transaction.asset_id)
-        asset_name = asset_name_map.get(transaction.asset_id, "Unknown")
-        if asset_id not in holdings:
-            holdings[asset_id] = schemas.PortfolioHoldings(
-                asset_id=asset_id,
-                asset_name=asset_name,
-                net_quantity_shares=Decimal("0"),
-                average_cost_basis=Decimal("0"),
-                total_cost=Decimal("0"),
-                current_price=Decimal("0"),
-                net_value=Decimal("0"),
-                unrealised_gain_loss=Decimal("0"),
-                unrealised_gain_loss_pct=Decimal("0"),
-            )
-
-        if transaction.type == schemas.TransactionType.buy:
-            holdings[asset_id].total_cost += transaction.quantity * transaction.price
-            holdings[asset_id].net_quantity_shares += transaction.quantity
-            if holdings[asset_id].net_quantity_shares > 0:
-                holdings[asset_id].average_cost_basis = (
-                    holdings[asset_id].total_cost
-                    / holdings[asset_id].net_quantity_shares
-                )
-        elif transaction.type == schemas.TransactionType.sell:
-            cost_reduction = (
-                holdings[asset_id].average_cost_basis * transaction.quantity
-            )
-            holdings[asset_id].total_cost -= cost_reduction
-            holdings[asset_id].net_quantity_shares -= transaction.quantity
+    for position in positions:
+        asset_id = str(position.asset_id)
+        holding = schemas.PortfolioHoldings(
+            asset_id=asset_id,
+            asset_name=asset_name_map.get(position.asset_id, "Unknown"),
+            net_quantity_shares=Decimal(position.net_quantity),
+            average_cost_basis=Decimal(position.average_cost_basis),
+            total_cost=Decimal(position.total_cost),
+            current_price=Decimal("0"),
+            net_value=Decimal("0"),
+            unrealised_gain_loss=Decimal("0"),
+            unrealised_gain_loss_pct=Decimal("0"),
+        )
+        holdings[asset_id] = holding
 
-    for asset in holdings.values():
-        if asset.net_quantity_shares == 0:
+        if holding.net_quantity_shares == 0:
             continue
 
-        asset_id = int(asset.asset_id)
-        latest_price_float = (
-            latest_prices.filter(pl.col("asset_id") == asset_id)
-            .select(pl.col("latest_price"))
-            .item()
-        )
-        latest_price = Decimal(str(latest_price_float))
+        latest_price = Decimal(str(latest_prices[position.asset_id]["latest_price"]))
 
-        asset.current_price = latest_price
-        asset.net_value = latest_price * asset.net_quantity_shares
-        asset.average_cost_basis = asset.total_cost / asset.net_quantity_shares
-        asset.unrealised_gain_loss = asset.net_value - asset.total_cost
+        holding.current_price = latest_price
+        holding.net_value = latest_price * holding.net_quantity_shares
+        holding.average_cost_basis = holding.total_cost / holding.net_quantity_shares
+        holding.unrealised_gain_loss = holding.net_value - holding.total_cost
 
-        if asset.total_cost > 0:
-            asset.unrealised_gain_loss_pct = (
-                asset.unrealised_gain_loss / asset.total_cost
+        if holding.total_cost > 0:
+            holding.unrealised_gain_loss_pct = (
+                holding.unrealised_gain_loss / holding.total_cost
             )
 
     return holdings
@@ -0,0 +1,164 @@
+"""
+Persisted daily portfolio valuations.
+
+``portfolio_valuations`` holds one row per user per trading day, produced by
+the same array engine as ``calculate_portfolio_history``. Rows are only ever
+appended by ``update_portfolio_valuations``, which values the trading days
+after the last stored one. Anything that changes past values deletes the
+affected rows instead, so the next update recomputes just that tail:
+
+- a new or deleted transaction drops the user's rows from its date on
+- late prices drop rows from the first new price date for holders of the asset
+- a split or dividend adjustment drops every row for holders of the asset
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.logger import logger
+from app.services.portfolio_engine import (
+    PortfolioSeries,
+    calculate_portfolio_series,
+    get_current_holdings,
+)
+
+
+def update_portfolio_valuations(db: Session, user_id: str) -> int:
+    """
+    Value the trading days after the user's last stored valuation and store
+    them. Returns the number of days written.
+    """
+    from app.core import PriceService  # inside function to prevent circular import
+
+    price_service = PriceService(db=db)
+    end_date = datetime.now()
+    last_valued = crud.portfolio_valuation.get_latest_valuation_date(db, user_id)
+
+    if last_valued is not None:
+        trading_days = price_service.get_trading_days(
+            datetime.combine(last_valued, time.min), end_date
+        )
+        # Only the last valued day itself, nothing new to add
+        if len(trading_days) <= 1:
+            return 0
+
+    transactions = (
+        db.query(models.Transaction)
+        .filter(models.Transaction.user_id == user_id)
+        .order_by(models.Transaction.timestamp)
+        .all()
+    )
+    if not transactions:
+        return 0
+
+    if last_valued is None:
+        trading_days = price_service.get_trading_days(
+            transactions[0].timestamp, end_date
+        )
+        initial_holdings = {}
+        new_transactions = transactions
+    else:
+        # Holdings at the close of the last valued day, which is re-valued as
+        # the base for the first new day's return and then dropped
+        initial_holdings = get_current_holdings(
+            [t for t in transactions if t.timestamp.date() <= last_valued]
+        )
+        new_transactions = [t for t in transactions if t.timestamp.date() > last_valued]
+
+    if not trading_days:
+        return 0
+
+    # Read from the database rather than the shared price cache, which can
+    # lag behind ingestion in other processes and would be persisted here
+    price_arrays = price_service.load_price_arrays(
+        list({t.asset_id for t in transactions}), trading_days[0]
+    )
+    series = calculate_portfolio_series(
+        new_transactions, trading_days, price_arrays, initial_holdings
+    )
+
+    first_new_day = 0 if last_valued is None else 1
+    rows = [
+        {
+            "user_id": user_id,
+            "date": day,
+            "value": value,
+            "cash_flow": cash_flow,
+            "daily_return_val": return_val,
+            "daily_return_pct": return_pct,
+        }
+        for day, value, cash_flow, return_val, return_pct in zip(
+            series.days[first_new_day:],
+            series.values[first_new_day:].tolist(),
+            series.cash_flows[first_new_day:].tolist(),
+            series.daily_return_val[first_new_day:].tolist(),
+            series.daily_return_pct[first_new_day:].tolist(),
+        )
+    ]
+    crud.portfolio_valuation.upsert_portfolio_valuations(db, rows)
+    db.commit()
+    return len(rows)
+
+
+def update_all_portfolio_valuations(db: Session) -> int:
+    """Bring every user's valuations up to date, e.g. after a price refresh."""
+    user_ids = [
+        user_id for (user_id,) in db.query(models.Transaction.user_id).distinct().all()
+    ]
+
+    days_written = 0
+    for user_id in user_ids:
+        try:
+            days_written += update_portfolio_valuations(db, user_id)
+        except Exception as e:
+            db.rollback()
+            logger.error(
+                f"Failed to update valuations for user {user_id[-8:]}: {e}",
+                exc_info=True,
+            )
+
+    logger.info(
+        f"Valued {days_written} new portfolio day(s) for {len(user_ids)} user(s)"
+    )
+    return days_written
+
+
+def get_portfolio_history(
+    db: Session, user_id: str, start_date: date | None = None
+) -> list[schemas.PortfolioValueHistory]:
+    """
+    Stored daily valuations from ``start_date`` on, updated first if new
+    trading days are available. Like a history calculated from
+    ``start_date``, the first day in the range has no daily return.
+    """
+    update_portfolio_valuations(db, user_id)
+    valuations = crud.portfolio_valuation.get_portfolio_valuations(
+        db, user_id, start_date
+    )
+
+    if not valuations:
+        transaction_count, _, _ = crud.transaction.get_transaction_version(db, user_id)
+        if transaction_count == 0:
+            raise HTTPException(status_code=404, detail="No transactions found")
+        raise HTTPException(status_code=404, detail="No trading data available")
+
+    history = PortfolioSeries(
+        days=[v.date for v in valuations],
+        values=np.array([v.value for v in valuations], dtype=float),
+        cash_flows=np.array([v.cash_flow for v in valuations], dtype=float),
+        daily_return_val=np.array(
+            [v.daily_return_val for v in valuations], dtype=float
+        ),
+        daily_return_pct=np.array(
+            [v.daily_return_pct for v in valuations], dtype=float
+        ),
+    ).to_history()
+
+    history[0].daily_return_pct = Decimal("0")
+    history[0].daily_return_val = Decimal("0")
+    return history
@@ -0,0 +1,146 @@
+"""
+Process-wide cache of adjusted-close price arrays.
+
+Each entry holds the full price history of one asset as two aligned NumPy
+arrays (date ordinals and adjusted closes), so a request for any date range is
+a ``searchsorted`` slice instead of a SQL query. Entries are evicted least
+recently used first once the cache holds more than ``max_bytes`` of arrays.
+
+Entries are stored with the asset's price version, the time its
+``latest_prices`` row was last rewritten by ingestion. A lookup only hits
+while that version still matches, so prices ingested by another process are
+picked up on the next request. Ingestion in this process also clears the
+cache.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import numpy as np
+
+from app.config.settings import settings
+
+
+@dataclass(frozen=True)
+class PriceArray:
+    """Adjusted closes for one asset, sorted by date ordinal."""
+
+    ordinals: np.ndarray
+    prices: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple[date | datetime, float]]) -> "PriceArray":
+        ordinals = np.array(
+            [
+                (ts.date() if isinstance(ts, datetime) else ts).toordinal()
+                for ts, _ in rows
+            ],
+            dtype=np.int64,
+        )
+        prices = np.array([price for _, price in rows], dtype=np.float64)
+        order = np.argsort(ordinals, kind="stable")
+        ordinals, prices = ordinals[order], prices[order]
+        ordinals.flags.writeable = False
+        prices.flags.writeable = False
+        return cls(ordinals=ordinals, prices=prices)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ordinals.nbytes + self.prices.nbytes
+
+    def between(self, start: date, end: date) -> "PriceArray":
+        """Read-only slice of the days from ``start`` to ``end`` inclusive."""
+        lo = np.searchsorted(self.ordinals, start.toordinal(), side="left")
+        hi = np.searchsorted(self.ordinals, end.toordinal(), side="right")
+        return PriceArray(ordinals=self.ordinals[lo:hi], prices=self.prices[lo:hi])
+
+    def dates(self) -> list[date]:
+        return [date.fromordinal(int(o)) for o in self.ordinals]
+
+
+@dataclass(frozen=True)
+class PriceCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+
+class PriceCache:
+    """
+    Thread-safe LRU cache of asset_id -> (price version, PriceArray), bounded
+    by bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, tuple[datetime | None, PriceArray]] = (
+            OrderedDict()
+        )
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, asset_id: int, version: datetime | None) -> PriceArray | None:
+        with self._lock:
+            entry = self._entries.get(asset_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(asset_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, asset_id: int, version: datetime | None, prices: PriceArray):
+        with self._lock:
+            previous = self._entries.pop(asset_id, None)
+            if previous is not None:
+                self._nbytes -= previous[1].nbytes
+
+            # An entry larger than the whole cache is served but not kept
+            if prices.nbytes > self.max_bytes:
+                return
+
+            self._entries[asset_id] = (version, prices)
+            self._nbytes += prices.nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.evictions += 1
+
+    def invalidate(self, asset_id: int | None = None):
+        """Drop one asset, or every asset if ``asset_id`` is None."""
+        with self._lock:
+            if asset_id is None:
+                self._entries.clear()
+                self._nbytes = 0
+                return
+
+            entry = self._entries.pop(asset_id, None)
+            if entry is not None:
+                self._nbytes -= entry[1].nbytes
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> PriceCacheStats:
+        with self._lock:
+            return PriceCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                nbytes=self._nbytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+price_cache = PriceCache(max_bytes=settings.PRICE_CACHE_MAX_BYTES)
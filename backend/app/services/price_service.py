@@ -1,9 +1,9 @@
-from datetime import date
+from datetime import date, datetime
 
 from sqlalchemy.orm import Session
 
 from app import crud, models
-from app.logger import logger
+from app.services.price_cache import PriceArray, price_cache
 
 
 class PriceService:
@@ -12,20 +12,22 @@ class PriceService:
     Handles trading days, price lookups, and caching.
     """
 
-    def __init__(self, db: Session, autorun=True):
+    def __init__(self, db: Session, autorun=False):
         self.db = db
         self._price_cache: dict[tuple[int, date], float] = {}
         if autorun:
             self.update_prices()
 
     def update_prices(self):
-        from app.core.data_ingestion.update_timeseries import (
-            update_all_assets,  # lazy import prevents circular import
+        """
+        Refresh stale prices in the foreground. Request handlers should not
+        call this: prices are kept fresh by the background refresh scheduler.
+        """
+        from app.core.data_ingestion.refresh_scheduler import (
+            price_refresh_scheduler,  # lazy import prevents circular import
         )
 
-        if crud.check_prices_stale(self.db):
-            logger.info("Prices state. Refreshing now")
-            update_all_assets(self.db)
+        price_refresh_scheduler.refresh()
 
     def get_trading_days(self, start_date: date, end_date: date) -> list[date]:
         """
@@ -56,6 +58,77 @@ class PriceService:
 
         return trading_days
 
+    def get_price_arrays(self, asset_ids: list[int]) -> dict[int, PriceArray]:
+        """
+        Full adjusted-close history for each asset, served from the shared
+        process-wide price cache while the asset's price version is unchanged.
+        Other assets are loaded in a single query and added to the cache,
+        unless new prices were ingested while they loaded.
+
+        Args:
+            asset_ids: list of asset IDs to fetch prices for
+
+        Returns:
+            dictionary with asset_id -> PriceArray (empty if no prices)
+        """
+        asset_ids = list(dict.fromkeys(asset_ids))
+        versions = crud.timeseries.get_price_versions(self.db, asset_ids)
+
+        arrays: dict[int, PriceArray] = {}
+        missing = []
+        for asset_id in asset_ids:
+            cached = price_cache.get(asset_id, versions.get(asset_id))
+            if cached is None:
+                missing.append(asset_id)
+            else:
+                arrays[asset_id] = cached
+
+        if not missing:
+            return arrays
+
+        arrays.update(self.load_price_arrays(missing))
+        loaded_versions = crud.timeseries.get_price_versions(self.db, missing)
+        for asset_id in missing:
+            version = versions.get(asset_id)
+            # Arrays loaded while ingestion committed may mix old and new rows
+            if loaded_versions.get(asset_id) == version:
+                price_cache.put(asset_id, version, arrays[asset_id])
+
+        return arrays
+
+    def load_price_arrays(
+        self, asset_ids: list[int], start_date: date | None = None
+    ) -> dict[int, PriceArray]:
+        """
+        Adjusted closes from ``start_date`` on (all history if None), read
+        straight from the database in a single query without using the shared
+        price cache.
+
+        Args:
+            asset_ids: list of asset IDs to fetch prices for
+            start_date: Optional earliest date to load
+
+        Returns:
+            dictionary with asset_id -> PriceArray (empty if no prices)
+        """
+        query = self.db.query(
+            models.Timeseries.asset_id,
+            models.Timeseries.timestamp,
+            models.Timeseries.adj_close,
+        ).filter(models.Timeseries.asset_id.in_(asset_ids))
+        if start_date is not None:
+            query = query.filter(models.Timeseries.timestamp >= start_date)
+
+        rows: dict[int, list[tuple[datetime, float]]] = {a: [] for a in asset_ids}
+        for row in query.all():
+            if row.asset_id in rows:
+                rows[row.asset_id].append((row.timestamp, float(row.adj_close)))
+
+        return {
+            asset_id: PriceArray.from_rows(asset_rows)
+            for asset_id, asset_rows in rows.items()
+        }
+
     def get_price_lookup(
         self, asset_ids: list[int], start_date: date, end_date: date
     ) -> dict[tuple[int, date], float]:
@@ -71,24 +144,20 @@ class PriceService:
         Returns:
             dictionary with (asset_id, date) -> price mapping
         """
-        timeseries_data = (
-            self.db.query(
-                models.Timeseries.asset_id,
-                models.Timeseries.timestamp,
-                models.Timeseries.adj_close,
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
+
+        price_lookup = {}
+        for asset_id, prices in self.get_price_arrays(asset_ids).items():
+            in_range = prices.between(start_date, end_date)
+            price_lookup.update(
+                zip(
+                    ((asset_id, day) for day in in_range.dates()),
+                    in_range.prices.tolist(),
+                )
             )
-            .filter(
-                models.Timeseries.asset_id.in_(asset_ids),
-                models.Timeseries.timestamp >= start_date,
-                models.Timeseries.timestamp <= end_date,
-            )
-            .all()
-        )
-
-        price_lookup = {
-            (row.asset_id, row.timestamp.date()): float(row.adj_close)
-            for row in timeseries_data
-        }
 
         return price_lookup
 
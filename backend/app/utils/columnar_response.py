@@ -0,0 +1,83 @@
+"""
+Opt-in column-oriented responses for large numeric results.
+
+The default JSON responses serialise one Python object per cell (per-month
+dicts, per-day pydantic snapshots). Here the bulk of a result is a table of
+equal-length NumPy columns, sent either as column-oriented JSON arrays or as
+an Arrow IPC stream, with the few scalar fields alongside:
+
+- ``columns``: ``{**metadata, "columns": {name: [...]}}`` as JSON
+- ``arrow``: the table as an Arrow IPC stream (written by polars, zero-copy
+  from the NumPy buffers) and the metadata as JSON in ``X-Result-Metadata``
+"""
+
+import io
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+import numpy as np
+import polars as pl
+from fastapi import Header, Query, Response
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNS_MEDIA_TYPE = "application/vnd.columns+json"
+METADATA_HEADER = "X-Result-Metadata"
+
+
+class ResponseFormat(str, Enum):
+    JSON = "json"
+    COLUMNS = "columns"
+    ARROW = "arrow"
+
+
+@dataclass
+class ColumnarPayload:
+    # Equal-length columns holding the bulk of the result
+    table: dict[str, np.ndarray]
+    # Small JSON-serialisable fields: scalars, short tables as column lists
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+def get_response_format(
+    format_: ResponseFormat | None = Query(None, alias="format"),
+    accept: str | None = Header(None),
+) -> ResponseFormat:
+    """Response format from the ``format`` query flag, else the Accept header."""
+    if format_ is not None:
+        return format_
+    if accept and ARROW_MEDIA_TYPE in accept:
+        return ResponseFormat.ARROW
+    if accept and COLUMNS_MEDIA_TYPE in accept:
+        return ResponseFormat.COLUMNS
+    return ResponseFormat.JSON
+
+
+def column_list(column: np.ndarray) -> list:
+    """JSON-ready list of a column, converted in one C-level pass."""
+    if np.issubdtype(column.dtype, np.datetime64):
+        column = np.datetime_as_string(column, unit="D")
+    return column.tolist()
+
+
+def columnar_response(
+    payload: ColumnarPayload, response_format: ResponseFormat
+) -> Response:
+    if response_format == ResponseFormat.ARROW:
+        buffer = io.BytesIO()
+        pl.DataFrame(payload.table).write_ipc_stream(buffer)
+        return Response(
+            content=buffer.getvalue(),
+            media_type=ARROW_MEDIA_TYPE,
+            headers={METADATA_HEADER: json.dumps(payload.metadata)},
+        )
+
+    assert response_format == ResponseFormat.COLUMNS, "JSON is not columnar"
+    content = {
+        **payload.metadata,
+        "columns": {
+            name: column_list(column) for name, column in payload.table.items()
+        },
+    }
+    return Response(content=json.dumps(content), media_type="application/json")
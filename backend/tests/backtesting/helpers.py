@@ -110,3 +110,60 @@ def create_mock_history_with_value(value: Decimal) -> list[DailySnapshot]:
             daily_return_pct=Decimal("0"),
         )
     ]
+
+
+def create_mock_engine(
+    trading_days: list[date], price_lookup: dict[tuple[int, date], float]
+):
+    """
+    Create a BacktestEngine whose price service serves the given data.
+
+    Args:
+        trading_days: Trading days returned for any date range
+        price_lookup: Dict mapping (asset_id, date) to price
+
+    Returns:
+        BacktestEngine that never touches the database
+    """
+    from unittest.mock import Mock
+
+    from app.backtesting.engine import BacktestEngine
+
+    engine = BacktestEngine(Mock(), autorun_prices=False)
+    engine.price_service.get_trading_days = Mock(return_value=trading_days)
+    engine.price_service.get_price_lookup = Mock(return_value=price_lookup)
+    return engine
+
+
+def create_random_walk_prices(
+    asset_ids: list[int], trading_days: list[date], seed: int = 0
+) -> dict[tuple[int, date], float]:
+    """
+    Create a reproducible random-walk price lookup for each asset.
+
+    Returns:
+        Dict mapping (asset_id, date) to price
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    price_lookup = {}
+    for asset_id in asset_ids:
+        returns = rng.normal(0.0004, 0.015, len(trading_days))
+        prices = 100.0 * np.cumprod(1 + returns)
+        for day, price in zip(trading_days, prices):
+            price_lookup[(asset_id, day)] = float(price)
+    return price_lookup
+
+
+def create_business_days(start: date, n: int) -> list[date]:
+    """Return the first n weekdays starting from start."""
+    from datetime import timedelta
+
+    days = []
+    current = start
+    while len(days) < n:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
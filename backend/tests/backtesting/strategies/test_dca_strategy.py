@@ -3,9 +3,12 @@
 from datetime import date, timedelta
 from decimal import Decimal
 
+import numpy as np
+
 from app.backtesting.actions import BuyAction
 from app.backtesting.strategies.dca import DCAStrategy
-from tests.backtesting.helpers import create_mock_context
+from app.backtesting.trading_calendar import TradingCalendar
+from tests.backtesting.helpers import create_mock_context, create_trading_days
 
 
 class TestDCAStrategyInitialization:
@@ -470,3 +473,43 @@ class TestDCAStateManagement:
         context3 = create_mock_context(current_date=date(2024, 1, 8))
         strategy.on_day(context3)
         assert strategy.last_investment_date == date(2024, 1, 8)  # Updated
+
+
+class TestDCAPlan:
+    """Test the vectorised investment schedule"""
+
+    def test_weekly_plan_matches_on_day_schedule(self):
+        days = create_trading_days(2024, 1, [1, 2, 5, 8, 9, 12, 15, 22, 23, 29])
+        strategy = DCAStrategy(
+            asset_id=1,
+            initial_investment=Decimal("1000"),
+            amount_per_period=Decimal("100"),
+            frequency="weekly",
+        )
+
+        plan = strategy.plan(TradingCalendar(days), np.full((len(days), 1), 100.0))
+
+        invested_days = [d for d, amount in zip(days, plan[:, 0]) if amount == amount]
+        assert invested_days == [
+            date(2024, 1, 1),
+            date(2024, 1, 8),
+            date(2024, 1, 15),
+            date(2024, 1, 22),
+            date(2024, 1, 29),
+        ]
+        assert plan[0, 0] == 1000.0
+        assert plan[4, 0] != plan[4, 0]  # NaN: no action on 9th
+
+    def test_plan_does_not_change_strategy_state(self):
+        days = create_trading_days(2024, 1, [1, 2, 3])
+        strategy = DCAStrategy(
+            asset_id=1,
+            initial_investment=Decimal("1000"),
+            amount_per_period=Decimal("100"),
+            frequency="daily",
+        )
+
+        strategy.plan(TradingCalendar(days), np.full((3, 1), 100.0))
+
+        assert strategy.last_investment_date is None
+        assert not strategy.already_invested_initial
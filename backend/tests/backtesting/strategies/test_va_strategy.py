@@ -3,9 +3,11 @@
 from datetime import date
 from decimal import Decimal
 
+import numpy as np
+
 from app.backtesting.actions import BuyAction
 from app.backtesting.strategies.va import VAStrategy
-from app.services.price_service import PriceService
+from app.backtesting.trading_calendar import TradingCalendar
 from tests.backtesting.helpers import (
     create_mock_context,
     create_mock_history_with_value,
@@ -69,7 +71,6 @@ class TestVAInitialInvestment:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Jan 2nd - should invest
@@ -90,7 +91,6 @@ class TestVAInitialInvestment:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Jan 2nd - should invest
@@ -116,7 +116,6 @@ class TestVAMonthlyInvestment:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Jan 2nd - should invest
@@ -138,7 +137,6 @@ class TestVAMonthlyInvestment:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Jan 3rd - NOT first trading day
@@ -163,7 +161,6 @@ class TestVAMonthlyInvestment:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Jan 2 - should invest
@@ -195,7 +192,6 @@ class TestVATargetValueCalculation:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         context = create_mock_context(
@@ -225,7 +221,6 @@ class TestVATargetValueCalculation:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Period 0: Jan investment (period_number becomes 1)
@@ -256,7 +251,6 @@ class TestVATargetValueCalculation:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Period 0
@@ -286,7 +280,6 @@ class TestVATargetValueCalculation:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Period 0
@@ -320,7 +313,6 @@ class TestVANoInvestmentAboveTarget:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Period 0
@@ -350,7 +342,6 @@ class TestVANoInvestmentAboveTarget:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Period 0
@@ -382,7 +373,6 @@ class TestVAEdgeCases:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=[],  # Empty list
-            price_service=PriceService,
         )
 
         context = create_mock_context(current_date=date(2024, 1, 1))
@@ -400,7 +390,6 @@ class TestVAEdgeCases:
             initial_investment=Decimal("0"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         context = create_mock_context(
@@ -421,7 +410,6 @@ class TestVAEdgeCases:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("0"),  # No increment
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         # Period 0: Invest 1000
@@ -462,7 +450,6 @@ class TestVAStateManagement:
             initial_investment=Decimal("1000"),
             target_increment_amount=Decimal("100"),
             trading_days=trading_days,
-            price_service=PriceService,
         )
 
         assert strategy.period_number == 0
@@ -490,3 +477,25 @@ class TestVAStateManagement:
         )
         strategy.on_day(context3)
         assert strategy.period_number == 3
+
+
+class TestVAPlan:
+    """Test the vectorised investment schedule"""
+
+    def test_plan_uses_the_given_calendar(self):
+        """A strategy built without trading days plans from the calendar passed in"""
+        days = create_multi_month_trading_days(2024, {1: [2, 3], 2: [1, 2], 3: [1]})
+        strategy = VAStrategy(
+            asset_id=1,
+            initial_investment=Decimal("1000"),
+            target_increment_amount=Decimal("100"),
+        )
+
+        plan = strategy.plan(TradingCalendar(days), np.full((len(days), 1), 100.0))
+
+        invested_days = [d for d, amount in zip(days, plan[:, 0]) if amount == amount]
+        assert invested_days == [date(2024, 1, 2), date(2024, 2, 1), date(2024, 3, 1)]
+        # Price unchanged, so each month only tops up by the increment
+        assert plan[0, 0] == 1000.0
+        assert plan[2, 0] == 100.0
+        assert plan[4, 0] == 100.0
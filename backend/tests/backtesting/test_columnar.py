@@ -0,0 +1,474 @@
+"""Tests that the columnar engine matches the Decimal engine"""
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.backtesting.actions import BuyAction, SellAction
+from app.backtesting.columnar import (
+    COLUMNAR_RTOL,
+    PriceMatrix,
+    execute_plan,
+    held_since_first_trade,
+)
+from app.backtesting.engine import BacktestEngine
+from app.backtesting.strategies.base import BacktestStrategy
+from app.backtesting.strategies.buy_hold import BuyAndHoldStrategy
+from app.backtesting.strategies.dca import DCAStrategy
+from app.backtesting.strategies.va import VAStrategy
+from app.backtesting.trading_calendar import TradingCalendar
+from tests.backtesting.helpers import (
+    create_business_days,
+    create_mock_engine,
+    create_random_walk_prices,
+)
+
+TRADING_DAYS = create_business_days(date(2020, 1, 1), 500)
+
+
+def assert_results_match(expected, actual):
+    def close(a, b):
+        return float(a) == pytest.approx(float(b), rel=COLUMNAR_RTOL, abs=1e-12)
+
+    assert close(actual.total_invested, expected.total_invested)
+    assert close(actual.final_value, expected.final_value)
+    assert close(actual.total_return_pct, expected.total_return_pct)
+    assert close(actual.total_return_abs, expected.total_return_abs)
+    assert close(actual.avg_daily_return, expected.avg_daily_return)
+
+    assert close(actual.metrics.sharpe, expected.metrics.sharpe)
+    assert close(actual.metrics.volatility, expected.metrics.volatility)
+    assert close(actual.metrics.max_drawdown, expected.metrics.max_drawdown)
+    assert (
+        actual.metrics.max_drawdown_duration == expected.metrics.max_drawdown_duration
+    )
+    assert actual.metrics.days_analysed == expected.metrics.days_analysed
+    assert actual.metrics.investments_made == expected.metrics.investments_made
+    assert close(actual.metrics.peak_value, expected.metrics.peak_value)
+    assert close(actual.metrics.trough_value, expected.metrics.trough_value)
+
+    assert len(actual.history) == len(expected.history)
+    for a, e in zip(actual.history, expected.history):
+        assert a.date == e.date
+        assert close(a.value, e.value)
+        assert close(a.cash_flow, e.cash_flow)
+        assert close(a.daily_return_pct, e.daily_return_pct)
+        assert close(a.daily_return_abs, e.daily_return_abs)
+        assert a.holdings.keys() == e.holdings.keys()
+        for asset_id in e.holdings:
+            assert close(a.holdings[asset_id], e.holdings[asset_id])
+
+
+def run_both(strategy_factory, trading_days, price_lookup):
+    engine = create_mock_engine(trading_days, price_lookup)
+    kwargs = dict(
+        start_date=trading_days[0] if trading_days else date(2020, 1, 1),
+        end_date=trading_days[-1] if trading_days else date(2020, 1, 1),
+        initial_cash=Decimal("10000"),
+    )
+    expected = engine.run(strategy=strategy_factory(), **kwargs)
+    actual = engine.run_columnar(strategy=strategy_factory(), **kwargs)
+    return expected, actual
+
+
+class TestPriceMatrix:
+    """Test building the dense price matrix"""
+
+    def test_missing_prices_are_nan(self):
+        days = [date(2024, 1, 1), date(2024, 1, 2)]
+        matrix = PriceMatrix.from_lookup(
+            {(1, days[0]): 100.0, (2, days[1]): 50.0}, days, [1, 2]
+        )
+
+        assert matrix.prices.shape == (2, 2)
+        assert matrix.prices[0, 0] == 100.0
+        assert matrix.prices[1, 1] == 50.0
+        assert matrix.prices[0, 1] != matrix.prices[0, 1]  # NaN
+
+    def test_ignores_unrequested_assets_and_days(self):
+        days = [date(2024, 1, 1)]
+        matrix = PriceMatrix.from_lookup(
+            {(1, days[0]): 100.0, (9, days[0]): 1.0, (1, date(2023, 1, 1)): 5.0},
+            days,
+            [1],
+        )
+
+        assert matrix.prices.tolist() == [[100.0]]
+
+
+class TestColumnarMatchesDecimalEngine:
+    """Run each built-in strategy through both engines and compare"""
+
+    def test_buy_and_hold_multi_asset(self):
+        prices = create_random_walk_prices([1, 2, 3], TRADING_DAYS)
+
+        expected, actual = run_both(
+            lambda: BuyAndHoldStrategy(
+                allocation={1: 0.5, 2: 0.3, 3: 0.2},
+                initial_investment=Decimal("10000"),
+            ),
+            TRADING_DAYS,
+            prices,
+        )
+
+        assert_results_match(expected, actual)
+
+    @pytest.mark.parametrize("frequency", ["daily", "weekly", "monthly"])
+    def test_dca(self, frequency):
+        prices = create_random_walk_prices([1], TRADING_DAYS, seed=1)
+
+        expected, actual = run_both(
+            lambda: DCAStrategy(
+                asset_id=1,
+                initial_investment=Decimal("1000"),
+                amount_per_period=Decimal("250"),
+                frequency=frequency,
+            ),
+            TRADING_DAYS,
+            prices,
+        )
+
+        assert_results_match(expected, actual)
+
+    def test_value_averaging_reads_history(self):
+        prices = create_random_walk_prices([1], TRADING_DAYS, seed=2)
+
+        expected, actual = run_both(
+            lambda: VAStrategy(
+                asset_id=1,
+                initial_investment=Decimal("1000"),
+                target_increment_amount=Decimal("500"),
+                trading_days=TRADING_DAYS,
+            ),
+            TRADING_DAYS,
+            prices,
+        )
+
+        assert_results_match(expected, actual)
+
+    def test_missing_prices_skip_actions_and_value(self):
+        prices = create_random_walk_prices([1], TRADING_DAYS[:40], seed=3)
+        for day in TRADING_DAYS[5:40:7]:
+            del prices[(1, day)]
+
+        expected, actual = run_both(
+            lambda: DCAStrategy(
+                asset_id=1,
+                initial_investment=Decimal("1000"),
+                amount_per_period=Decimal("100"),
+                frequency="daily",
+            ),
+            TRADING_DAYS[:40],
+            prices,
+        )
+
+        assert_results_match(expected, actual)
+
+    def test_buy_then_sell(self):
+        days = TRADING_DAYS[:10]
+        prices = create_random_walk_prices([1], days, seed=4)
+
+        class BuyThenSellStrategy(BacktestStrategy):
+            def __init__(self):
+                self.day = 0
+
+            def on_day(self, context):
+                self.day += 1
+                if self.day == 1:
+                    return [BuyAction(asset_id=1, dollar_amount=Decimal("1000"))]
+                if self.day == 5:
+                    return [SellAction(asset_id=1, quantity=Decimal("2"))]
+                return []
+
+            def get_parameters(self):
+                return {}
+
+            def get_asset_ids(self):
+                return [1]
+
+        expected, actual = run_both(BuyThenSellStrategy, days, prices)
+
+        assert_results_match(expected, actual)
+
+    def test_empty_trading_days(self):
+        expected, actual = run_both(
+            lambda: BuyAndHoldStrategy({1: 1.0}, Decimal("10000")), [], {}
+        )
+
+        assert_results_match(expected, actual)
+        assert actual.history == []
+
+
+class TestColumnarActions:
+    """Test action execution on holdings arrays"""
+
+    def test_cannot_sell_more_than_owned(self):
+        days = TRADING_DAYS[:3]
+
+        class OversellStrategy(BacktestStrategy):
+            def on_day(self, context):
+                return [SellAction(asset_id=1, quantity=Decimal("10"))]
+
+            def get_parameters(self):
+                return {}
+
+            def get_asset_ids(self):
+                return [1]
+
+        engine = create_mock_engine(days, {(1, d): 100.0 for d in days})
+
+        with pytest.raises(ValueError, match="Cannot sell 10 shares"):
+            engine.run_columnar(OversellStrategy(), days[0], days[-1], Decimal("1000"))
+
+    def test_context_exposes_holdings_and_history(self):
+        days = TRADING_DAYS[:3]
+        seen = []
+
+        class RecordingStrategy(BacktestStrategy):
+            def on_day(self, context):
+                seen.append((dict(context.holdings), len(context.history)))
+                if not context.history:
+                    return [BuyAction(asset_id=1, dollar_amount=Decimal("1000"))]
+                assert float(context.history[-1].value) == pytest.approx(1000.0)
+                return []
+
+            def get_parameters(self):
+                return {}
+
+            def get_asset_ids(self):
+                return [1]
+
+        engine = create_mock_engine(days, {(1, d): 100.0 for d in days})
+        engine.run_columnar(RecordingStrategy(), days[0], days[-1], Decimal("1000"))
+
+        assert seen[0] == ({}, 0)
+        assert seen[1] == ({1: pytest.approx(10.0)}, 1)
+        assert seen[2][1] == 2
+
+    def test_history_view_keeps_sold_out_assets(self):
+        """Strategies see the same holdings as the returned history"""
+        days = TRADING_DAYS[:4]
+        seen = []
+
+        class RoundTripStrategy(BacktestStrategy):
+            def on_day(self, context):
+                if context.history:
+                    seen.append(context.history[-1].holdings)
+                if len(context.history) == 0:
+                    return [BuyAction(asset_id=1, dollar_amount=Decimal("1000"))]
+                if len(context.history) == 1:
+                    return [SellAction(asset_id=1, quantity=Decimal("10"))]
+                return []
+
+            def get_parameters(self):
+                return {}
+
+            def get_asset_ids(self):
+                return [1, 2]
+
+        engine = create_mock_engine(days, {(a, d): 100.0 for d in days for a in (1, 2)})
+        result = engine.run_columnar(
+            RoundTripStrategy(), days[0], days[-1], Decimal("1000")
+        )
+
+        assert seen == [snapshot.holdings for snapshot in result.history[:-1]]
+        assert seen[-1] == {1: Decimal("0")}
+
+    def test_plan_and_days_mark_the_same_held_assets(self):
+        days = TRADING_DAYS[:60]
+        prices = create_random_walk_prices([1], days, seed=2)
+        kwargs = dict(
+            trading_days=days,
+            price_lookup=prices,
+            start_date=days[0],
+            end_date=days[-1],
+            initial_cash=Decimal("1000"),
+        )
+
+        histories = [
+            BacktestEngine.simulate_columnar_history(
+                DCAStrategy(1, Decimal("1000"), Decimal("100"), "monthly"),
+                use_plan=use_plan,
+                **kwargs,
+            )[1]
+            for use_plan in (False, True)
+        ]
+
+        for history in histories:
+            assert (
+                history.held.tolist()
+                == held_since_first_trade(history.holdings).tolist()
+            )
+
+
+def run_plan_and_days(strategy_factory, trading_days, price_lookup):
+    kwargs = dict(
+        trading_days=trading_days,
+        price_lookup=price_lookup,
+        start_date=date(2020, 1, 1),
+        end_date=date(2022, 1, 1),
+        initial_cash=Decimal("10000"),
+    )
+    per_day = BacktestEngine.simulate_columnar(
+        strategy_factory(), use_plan=False, **kwargs
+    )
+    planned = BacktestEngine.simulate_columnar(strategy_factory(), **kwargs)
+    return per_day, planned
+
+
+class TestStrategyPlans:
+    """A strategy's plan must give exactly the same result as on_day"""
+
+    def test_buy_and_hold_many_assets(self):
+        asset_ids = list(range(1, 13))
+        prices = create_random_walk_prices(asset_ids, TRADING_DAYS, seed=6)
+        allocation = {asset_id: 1 / len(asset_ids) for asset_id in asset_ids}
+
+        per_day, planned = run_plan_and_days(
+            lambda: BuyAndHoldStrategy(allocation, Decimal("10000")),
+            TRADING_DAYS,
+            prices,
+        )
+
+        assert planned == per_day
+
+    @pytest.mark.parametrize("frequency", ["daily", "weekly", "monthly", "yearly"])
+    def test_dca(self, frequency):
+        prices = create_random_walk_prices([1], TRADING_DAYS, seed=7)
+
+        per_day, planned = run_plan_and_days(
+            lambda: DCAStrategy(1, Decimal("1000"), Decimal("150"), frequency),
+            TRADING_DAYS,
+            prices,
+        )
+
+        assert planned == per_day
+
+    def test_value_averaging(self):
+        prices = create_random_walk_prices([1], TRADING_DAYS, seed=8)
+
+        per_day, planned = run_plan_and_days(
+            lambda: VAStrategy(1, Decimal("1000"), Decimal("400"), TRADING_DAYS),
+            TRADING_DAYS,
+            prices,
+        )
+
+        assert planned == per_day
+        assert planned.metrics.investments_made > 1
+
+    def test_value_averaging_with_missing_prices(self):
+        """Skipped buys and zero valuations on missing days match on_day"""
+        prices = create_random_walk_prices([1], TRADING_DAYS, seed=9)
+        first_days = {}
+        for day in TRADING_DAYS:
+            first_days.setdefault((day.year, day.month), TRADING_DAYS.index(day))
+        for i in list(first_days.values())[2:6]:
+            del prices[(1, TRADING_DAYS[i])]
+            prices.pop((1, TRADING_DAYS[i - 1]), None)
+
+        per_day, planned = run_plan_and_days(
+            lambda: VAStrategy(1, Decimal("1000"), Decimal("400"), TRADING_DAYS),
+            TRADING_DAYS,
+            prices,
+        )
+
+        assert planned == per_day
+
+    def test_strategy_without_plan_uses_on_day(self):
+        days = TRADING_DAYS[:5]
+
+        class OnDayOnlyStrategy(BacktestStrategy):
+            def __init__(self):
+                self.calls = 0
+
+            def on_day(self, context):
+                self.calls += 1
+                return []
+
+            def get_parameters(self):
+                return {}
+
+            def get_asset_ids(self):
+                return [1]
+
+        strategy = OnDayOnlyStrategy()
+        BacktestEngine.simulate_columnar(
+            strategy, days, {}, days[0], days[-1], Decimal("1000")
+        )
+
+        assert strategy.plan(days, None) is None
+        assert strategy.calls == len(days)
+
+
+class TestBatchedPlans:
+    """plan_paths must agree with plan on every path of a batch"""
+
+    @staticmethod
+    def price_paths(asset_ids, paths=6, days=TRADING_DAYS[:260]):
+        rng = np.random.default_rng(10)
+        returns = rng.normal(0.0005, 0.02, (paths, len(days), len(asset_ids)))
+        prices = 100 * np.cumprod(1 + returns, axis=1)
+        prices[2, 40:45, 0] = np.nan
+        return TradingCalendar(days), prices
+
+    @pytest.mark.parametrize(
+        "strategy_factory",
+        [
+            lambda: BuyAndHoldStrategy({1: 0.25, 2: 0.75}, Decimal("10000")),
+            lambda: DCAStrategy(1, Decimal("1000"), Decimal("150"), "weekly"),
+            lambda: DCAStrategy(1, Decimal("1000"), Decimal("150"), "monthly"),
+        ],
+    )
+    def test_calendar_plans_broadcast_over_paths(self, strategy_factory):
+        strategy = strategy_factory()
+        calendar, prices = self.price_paths(strategy.get_asset_ids())
+
+        batched = strategy.plan_paths(calendar, prices)
+
+        for path in range(len(prices)):
+            np.testing.assert_array_equal(
+                batched[path], strategy.plan(calendar, prices[path])
+            )
+
+    def test_value_averaging_keeps_state_per_path(self):
+        calendar, prices = self.price_paths([1])
+        strategy = VAStrategy(1, Decimal("1000"), Decimal("400"), calendar)
+
+        batched = strategy.plan_paths(calendar, prices)
+
+        for path in range(len(prices)):
+            np.testing.assert_allclose(
+                batched[path],
+                strategy.plan(calendar, prices[path]),
+                rtol=COLUMNAR_RTOL,
+            )
+        # Top-ups depend on each path's prices
+        assert len({float(np.nansum(plan)) for plan in batched}) == len(prices)
+
+    def test_execute_plan_matches_per_path_execution(self):
+        calendar, prices = self.price_paths([1])
+        strategy = VAStrategy(1, Decimal("1000"), Decimal("400"), calendar)
+        batched = execute_plan(strategy.plan_paths(calendar, prices), prices)
+
+        for path in range(len(prices)):
+            single = execute_plan(
+                strategy.plan_paths(calendar, prices[path]), prices[path]
+            )
+            for batched_array, single_array in zip(batched[:3], single[:3]):
+                np.testing.assert_array_equal(batched_array[path], single_array)
+
+    def test_strategies_without_batched_plan(self):
+        class OnDayOnlyStrategy(BacktestStrategy):
+            def on_day(self, context):
+                return []
+
+            def get_parameters(self):
+                return {}
+
+            def get_asset_ids(self):
+                return [1]
+
+        calendar, prices = self.price_paths([1])
+        assert OnDayOnlyStrategy().plan_paths(calendar, prices) is None
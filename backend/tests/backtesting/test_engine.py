@@ -602,3 +602,59 @@ class TestBacktestEngineIntegration:
 
         # With no trading days, we can't have history
         assert len(result.history) == 0
+
+
+class TestContextViews:
+    """The context passed to strategies is a read-only, zero-copy view"""
+
+    def _run_recording(self, days=3):
+        from app.backtesting.strategies.base import BacktestStrategy
+        from tests.backtesting.helpers import create_business_days, create_mock_engine
+
+        trading_days = create_business_days(date(2024, 1, 1), days)
+        contexts = []
+
+        class RecordingStrategy(BacktestStrategy):
+            def on_day(self, context):
+                contexts.append(context)
+                if len(contexts) == 1:
+                    return [BuyAction(asset_id=1, dollar_amount=Decimal("1000"))]
+                return []
+
+            def get_parameters(self):
+                return {}
+
+            def get_asset_ids(self):
+                return [1]
+
+        engine = create_mock_engine(trading_days, {(1, d): 100.0 for d in trading_days})
+        result = engine.run(
+            RecordingStrategy(), trading_days[0], trading_days[-1], Decimal("1000")
+        )
+        return contexts, result
+
+    def test_history_view_is_fixed_to_days_seen(self):
+        """Each day's view only covers earlier days, even after the run ends"""
+        contexts, result = self._run_recording()
+
+        assert [len(c.history) for c in contexts] == [0, 1, 2]
+        assert contexts[2].history[-1] is result.history[1]
+        assert list(contexts[2].history) == result.history[:2]
+        with pytest.raises(IndexError):
+            contexts[1].history[1]
+
+    def test_history_view_is_read_only(self):
+        contexts, _ = self._run_recording()
+
+        assert not hasattr(contexts[2].history, "append")
+        with pytest.raises(TypeError):
+            contexts[2].history[0] = None
+
+    def test_holdings_are_frozen(self):
+        """Holdings reflect the opening position and cannot be modified"""
+        contexts, _ = self._run_recording()
+
+        assert dict(contexts[0].holdings) == {}
+        assert float(contexts[1].holdings[1]) == pytest.approx(10.0)
+        with pytest.raises(TypeError):
+            contexts[1].holdings[1] = Decimal("0")
@@ -0,0 +1,100 @@
+"""Tests for the NumPy-backed, rolling and streaming metrics"""
+
+import statistics
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.backtesting.metrics import (
+    StreamingMetrics,
+    calculate_max_drawdown_array,
+    calculate_rolling_drawdown,
+    calculate_rolling_metrics,
+    calculate_sharpe,
+    calculate_sharpe_array,
+    calculate_volatility,
+    calculate_volatility_array,
+)
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0.0005, 0.01, 300)
+    values = 1000 * np.cumprod(1 + returns)
+    dates = [date(2024, 1, 1) + timedelta(days=i) for i in range(len(values))]
+    return dates, values, returns
+
+
+def test_decimal_wrappers_match_statistics(series):
+    _, _, returns = series
+    decimal_returns = [Decimal(str(r)) for r in returns]
+    std_dev = statistics.stdev(decimal_returns)
+    mean = statistics.mean(decimal_returns)
+
+    expected_sharpe = (mean - Decimal("0.04") / 252) / std_dev * Decimal(252**0.5)
+    expected_volatility = std_dev * Decimal(252) ** Decimal("0.5")
+
+    assert float(calculate_sharpe(decimal_returns)) == pytest.approx(
+        float(expected_sharpe), rel=1e-9
+    )
+    assert float(calculate_volatility(decimal_returns)) == pytest.approx(
+        float(expected_volatility), rel=1e-9
+    )
+
+
+def test_rolling_windows_match_scalar_metrics(series):
+    dates, values, returns = series
+    window = 20
+
+    rolling = calculate_rolling_metrics(returns, values, window)
+
+    assert np.isnan(rolling.sharpe[: window - 1]).all()
+    for end in (window, 150, len(returns)):
+        chunk = returns[end - window : end]
+        assert rolling.sharpe[end - 1] == pytest.approx(calculate_sharpe_array(chunk))
+        assert rolling.volatility[end - 1] == pytest.approx(
+            calculate_volatility_array(chunk)
+        )
+        peak = values[end - window : end].max()
+        assert rolling.drawdown[end - 1] == pytest.approx(values[end - 1] / peak - 1)
+
+
+def test_rolling_constant_returns_are_zero():
+    rolling = calculate_rolling_metrics(np.full(5, 0.001), np.ones(5), window=3)
+
+    assert rolling.volatility[2:].tolist() == [0.0, 0.0, 0.0]
+    assert rolling.sharpe[2:].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_rolling_drawdown_shorter_than_window():
+    assert np.isnan(calculate_rolling_drawdown(np.array([1.0, 2.0]), 5)).all()
+
+
+def test_streaming_matches_batch(series):
+    dates, values, returns = series
+    streaming = StreamingMetrics()
+
+    for i, (day, value) in enumerate(zip(dates, values)):
+        streaming.update(day, value, returns[i] if i > 0 else None)
+
+    max_drawdown, duration = calculate_max_drawdown_array(dates, values)
+    assert streaming.sharpe == pytest.approx(calculate_sharpe_array(returns[1:]))
+    assert streaming.volatility == pytest.approx(
+        calculate_volatility_array(returns[1:])
+    )
+    assert streaming.max_drawdown == pytest.approx(max_drawdown)
+    assert streaming.max_drawdown_duration == duration
+
+
+def test_streaming_needs_two_returns():
+    streaming = StreamingMetrics()
+    streaming.update(date(2024, 1, 1), 100.0)
+    streaming.update(date(2024, 1, 2), 90.0, -0.1)
+
+    assert streaming.sharpe == 0.0
+    assert streaming.volatility == 0.0
+    assert streaming.max_drawdown == pytest.approx(-0.1)
+    assert streaming.max_drawdown_duration == 1
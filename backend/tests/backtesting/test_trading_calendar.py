@@ -0,0 +1,114 @@
+"""Tests for TradingCalendar period boundaries and schedules"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.backtesting.strategies.dca import DCAStrategy
+from app.backtesting.trading_calendar import CalendarPeriod, TradingCalendar
+from app.services.price_service import PriceService
+from tests.backtesting.helpers import create_business_days
+
+
+class TestPeriodBoundaries:
+    """First/last trading day checks"""
+
+    def test_first_trading_day_of_month_skips_holidays(self):
+        """Jan 1st is not a trading day, so Jan 2nd starts the month"""
+        calendar = TradingCalendar(
+            [date(2024, 1, 2), date(2024, 1, 3), date(2024, 2, 1), date(2024, 2, 2)]
+        )
+
+        assert calendar.is_first_trading_day_of_month(date(2024, 1, 2))
+        assert not calendar.is_first_trading_day_of_month(date(2024, 1, 3))
+        assert calendar.is_first_trading_day_of_month(date(2024, 2, 1))
+        assert not calendar.is_first_trading_day_of_month(date(2024, 1, 1))
+
+    def test_last_trading_day_of_month(self):
+        calendar = TradingCalendar(
+            [date(2024, 1, 30), date(2024, 1, 31), date(2024, 2, 1)]
+        )
+
+        assert calendar.is_last_trading_day_of_month(date(2024, 1, 31))
+        assert not calendar.is_last_trading_day_of_month(date(2024, 1, 30))
+        assert calendar.is_last_trading_day_of_month(date(2024, 2, 1))
+
+    def test_week_and_quarter_boundaries(self):
+        days = create_business_days(date(2024, 3, 25), 10)
+        calendar = TradingCalendar(days)
+
+        # Mon 25th Mar to Fri 5th Apr
+        assert calendar.is_first_trading_day_of_week(date(2024, 3, 25))
+        assert calendar.is_last_trading_day_of_week(date(2024, 3, 29))
+        assert calendar.is_first_trading_day_of_week(date(2024, 4, 1))
+        assert calendar.is_last_trading_day_of_quarter(date(2024, 3, 29))
+        assert calendar.is_first_trading_day_of_quarter(date(2024, 4, 1))
+        assert not calendar.is_first_trading_day_of_quarter(date(2024, 4, 2))
+
+    def test_unsorted_and_duplicate_days(self):
+        calendar = TradingCalendar(
+            [date(2024, 1, 3), date(2024, 1, 2), date(2024, 1, 3)]
+        )
+
+        assert list(calendar) == [date(2024, 1, 2), date(2024, 1, 3)]
+        assert calendar.is_first_trading_day_of_month(date(2024, 1, 2))
+
+    def test_empty_calendar(self):
+        calendar = TradingCalendar([])
+
+        assert len(calendar) == 0
+        assert not calendar.is_first_trading_day_of_month(date(2024, 1, 1))
+        assert calendar.period_start_mask(CalendarPeriod.MONTH).shape == (0,)
+        assert calendar.every_n_days(7) == []
+
+    def test_matches_price_service(self):
+        """Agrees with the list-scanning PriceService check on every day"""
+        days = create_business_days(date(2023, 11, 1), 120)
+        calendar = TradingCalendar(days)
+
+        for day in days:
+            assert calendar.is_first_trading_day_of_month(
+                day
+            ) == PriceService.is_first_trading_day_of_month(day, days)
+
+
+class TestMasksAndLookups:
+    def test_period_start_mask(self):
+        days = create_business_days(date(2024, 1, 29), 10)
+        calendar = TradingCalendar(days)
+
+        mask = calendar.period_start_mask(CalendarPeriod.MONTH)
+
+        assert [days[i] for i in np.flatnonzero(mask)] == [
+            date(2024, 1, 29),
+            date(2024, 2, 1),
+        ]
+
+    def test_index_and_index_on_or_after(self):
+        calendar = TradingCalendar(create_business_days(date(2024, 1, 1), 10))
+
+        assert calendar.index(date(2024, 1, 8)) == 5
+        # Saturday 6th rolls forward to Monday 8th
+        assert calendar.index_on_or_after(date(2024, 1, 6)) == 5
+        assert calendar.index_on_or_after(date(2025, 1, 1)) == len(calendar)
+        assert date(2024, 1, 6) not in calendar
+        with pytest.raises(ValueError):
+            calendar.index(date(2024, 1, 6))
+
+
+class TestEveryNDays:
+    def test_matches_dca_weekly_rule(self):
+        """Same schedule as DCAStrategy's 7-day gap rule, including holidays"""
+        days = create_business_days(date(2024, 1, 1), 60)
+        del days[5]  # Monday holiday pushes that week's purchase to Tuesday
+        calendar = TradingCalendar(days)
+
+        expected = []
+        last_investment = None
+        for i, day in enumerate(days):
+            if DCAStrategy._is_investment_day("weekly", day, last_investment):
+                expected.append(i)
+                last_investment = day
+
+        assert calendar.every_n_days(7) == expected
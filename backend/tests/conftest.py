@@ -1,9 +1,65 @@
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import (
+    Asset,
+    CorporateAction,
+    LatestPrice,
+    PortfolioValuation,
+    Position,
+    PriceUpdate,
+    Timeseries,
+    Transaction,
+    User,
+)
+from app.monte_carlo.model_cache import return_model_cache
 from app.schemas import PortfolioValueHistory
+from app.services.price_cache import price_cache
 from datetime import date
 from decimal import Decimal
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """The price and return model caches are process-wide, so start every test empty"""
+    price_cache.invalidate()
+    price_cache.reset_stats()
+    return_model_cache.invalidate()
+    return_model_cache.reset_stats()
+    yield
+    price_cache.invalidate()
+    return_model_cache.invalidate()
+
+
+@pytest.fixture
+def sqlite_session_factory():
+    """In-memory SQLite database with the price, transaction and user tables"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            Asset.__table__,
+            Timeseries.__table__,
+            PriceUpdate.__table__,
+            CorporateAction.__table__,
+            LatestPrice.__table__,
+            Transaction.__table__,
+            PortfolioValuation.__table__,
+            Position.__table__,
+            User.__table__,
+        ],
+    )
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
 @pytest.fixture
 def simple_drawdown_case():
     """Portfolio with one clear drawdown: +20%, -15%, +10%"""
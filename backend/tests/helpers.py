@@ -0,0 +1,28 @@
+"""Shared test utilities for price ingestion tests"""
+
+import pandas as pd
+
+
+def create_history(
+    dates: list[str],
+    start_price: float = 100.0,
+    splits: dict[str, float] | None = None,
+    dividends: dict[str, float] | None = None,
+) -> pd.DataFrame:
+    """Daily price frame in the PriceDataSource layout, rising by 1 per day"""
+    prices = [start_price + i for i in range(len(dates))]
+    splits = splits or {}
+    dividends = dividends or {}
+    return pd.DataFrame(
+        {
+            "date": pd.to_datetime(dates),
+            "open": prices,
+            "high": prices,
+            "low": prices,
+            "close": prices,
+            "adj_close": prices,
+            "volume": [1000] * len(dates),
+            "stock_splits": [splits.get(d, 0.0) for d in dates],
+            "dividends": [dividends.get(d, 0.0) for d in dates],
+        }
+    )
@@ -0,0 +1,201 @@
+"""Tests for BacktestService batch runs"""
+
+from datetime import date
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.schemas import BacktestRequest, BatchBacktestRequest
+from app.services.backtest_service import MAX_BATCH_CONFIGURATIONS, BacktestService
+from app.services.price_service import PriceService
+from tests.backtesting.helpers import create_business_days, create_random_walk_prices
+
+TRADING_DAYS = create_business_days(date(2021, 1, 4), 300)
+PRICE_LOOKUP = create_random_walk_prices([1], TRADING_DAYS, seed=5)
+
+
+@pytest.fixture
+def service():
+    """BacktestService with price data served from memory"""
+    with patch.object(PriceService, "update_prices"):
+        backtest_service = BacktestService(Mock())
+    backtest_service.price_service.get_trading_days = Mock(return_value=TRADING_DAYS)
+    backtest_service.price_service.get_price_lookup = Mock(return_value=PRICE_LOOKUP)
+    return backtest_service
+
+
+def make_batch_request(strategy, parameter_grid, parameters=None, **kwargs):
+    return BatchBacktestRequest(
+        strategy=strategy,
+        asset_ids=[1],
+        tickers=["TEST"],
+        start_date=TRADING_DAYS[0],
+        end_date=TRADING_DAYS[-1],
+        initial_cash=Decimal("1000"),
+        parameters=parameters or {},
+        parameter_grid=parameter_grid,
+        **kwargs,
+    )
+
+
+DCA_GRID = make_batch_request(
+    "dollar_cost_averaging",
+    {"amount_per_period": [100, 250], "frequency": ["weekly", "monthly"]},
+)
+
+
+class TestExpandParameterGrid:
+    """Test cartesian expansion of the parameter grid"""
+
+    def test_expands_cartesian_product_in_order(self):
+        configurations = BacktestService.expand_parameter_grid(DCA_GRID)
+
+        assert [c.parameters for c in configurations] == [
+            {"amount_per_period": 100, "frequency": "weekly"},
+            {"amount_per_period": 100, "frequency": "monthly"},
+            {"amount_per_period": 250, "frequency": "weekly"},
+            {"amount_per_period": 250, "frequency": "monthly"},
+        ]
+        assert all(isinstance(c, BacktestRequest) for c in configurations)
+        assert all(c.start_date == TRADING_DAYS[0] for c in configurations)
+
+    def test_grid_values_override_base_parameters(self):
+        request = make_batch_request(
+            "dollar_cost_averaging",
+            {"amount_per_period": [50]},
+            parameters={"frequency": "daily", "amount_per_period": 10},
+        )
+
+        configurations = BacktestService.expand_parameter_grid(request)
+
+        assert configurations[0].parameters == {
+            "frequency": "daily",
+            "amount_per_period": 50,
+        }
+
+
+class TestRunMany:
+    """Test running a parameter sweep"""
+
+    def test_loads_prices_once(self, service):
+        service.run_many(DCA_GRID, max_workers=1)
+
+        service.price_service.get_trading_days.assert_called_once()
+        service.price_service.get_price_lookup.assert_called_once()
+
+    def test_matches_individual_backtests(self, service):
+        summaries = service.run_many(DCA_GRID, max_workers=1)
+
+        for configuration, summary in zip(
+            BacktestService.expand_parameter_grid(DCA_GRID), summaries
+        ):
+            single = service.run_backtest(configuration, "user", save_backtest=False)
+            assert summary.parameters == configuration.parameters
+            assert summary.final_value == single.final_value
+            assert summary.total_invested == single.total_invested
+            assert summary.metrics == single.metrics
+
+    def test_process_pool_matches_serial(self, service):
+        request = make_batch_request(
+            "value_averaging", {"target_increment_amount": [100, 200, 300]}
+        )
+
+        serial = service.run_many(request, max_workers=1)
+        parallel = service.run_many(request, max_workers=2)
+
+        assert parallel == serial
+
+    def test_history_only_when_requested(self, service):
+        compact = service.run_many(DCA_GRID, max_workers=1)
+        full = service.run_many(
+            DCA_GRID.model_copy(update={"include_history": True}), max_workers=1
+        )
+
+        assert all(summary.history is None for summary in compact)
+        assert all(len(summary.history) == len(TRADING_DAYS) for summary in full)
+
+
+class TestRunBacktestColumnar:
+    """Test the columnar history used by columnar responses"""
+
+    def test_matches_snapshot_history(self, service):
+        request = BacktestRequest(
+            **DCA_GRID.model_dump(exclude={"parameter_grid", "include_history"})
+            | {"parameters": {"amount_per_period": 100, "frequency": "weekly"}}
+        )
+
+        result = service.run_backtest(request, "user", save_backtest=False)
+        columnar, columns = service.run_backtest_columnar(
+            request, "user", save_backtest=False
+        )
+
+        assert columnar.history == []
+        assert columnar.metrics == result.metrics
+        assert columns["date"].tolist() == [s.date for s in result.history]
+        assert columns["value"].tolist() == [float(s.value) for s in result.history]
+        assert columns["holdings_1"][-1] == float(result.history[-1].holdings[1])
+
+
+class TestValidateBatchRequest:
+    """Test batch-specific validation"""
+
+    @pytest.fixture(autouse=True)
+    def skip_asset_and_date_validation(self, service):
+        service._validate_assets_and_dates = Mock()
+
+    def test_rejects_empty_grid(self, service):
+        with pytest.raises(HTTPException) as exc_info:
+            service.validate_batch_request(
+                make_batch_request("dollar_cost_averaging", {}), Mock()
+            )
+        assert exc_info.value.status_code == 400
+
+    def test_rejects_empty_grid_entry(self, service):
+        with pytest.raises(HTTPException) as exc_info:
+            service.validate_batch_request(
+                make_batch_request("dollar_cost_averaging", {"frequency": []}), Mock()
+            )
+        assert "frequency" in exc_info.value.detail
+
+    def test_rejects_oversized_grid(self, service):
+        request = make_batch_request(
+            "dollar_cost_averaging",
+            {
+                "amount_per_period": list(range(MAX_BATCH_CONFIGURATIONS)),
+                "frequency": ["weekly", "monthly"],
+            },
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.validate_batch_request(request, Mock())
+        assert exc_info.value.status_code == 400
+
+    def test_accepts_valid_grid(self, service):
+        service.validate_batch_request(DCA_GRID, Mock())
+        service._validate_assets_and_dates.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "parameter_grid",
+        [
+            {"amount_per_period": [100, -5], "frequency": ["weekly"]},
+            {"amount_per_period": [100], "frequency": ["weekly", "yearly"]},
+            {"amount_per_period": ["100"], "frequency": ["weekly"]},
+        ],
+    )
+    def test_rejects_invalid_grid_values(self, service, parameter_grid):
+        with pytest.raises(HTTPException) as exc_info:
+            service.validate_batch_request(
+                make_batch_request("dollar_cost_averaging", parameter_grid), Mock()
+            )
+        assert exc_info.value.status_code == 400
+
+    def test_grid_can_complete_base_parameters(self, service):
+        request = make_batch_request(
+            "value_averaging",
+            {"target_increment_amount": [100, 200]},
+            parameters={"unused": True},
+        )
+
+        service.validate_batch_request(request, Mock())
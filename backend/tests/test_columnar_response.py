@@ -0,0 +1,124 @@
+"""Tests for the opt-in columnar (JSON columns / Arrow IPC) response formats"""
+
+import io
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import polars as pl
+import pytest
+
+from app.backtesting.columnar import ColumnarHistory
+from app.monte_carlo.monte_carlo_engine import MonteCarloEngine
+from app.schemas.monte_carlo import MonteCarloConfig
+from app.utils.columnar_response import (
+    ARROW_MEDIA_TYPE,
+    METADATA_HEADER,
+    ColumnarPayload,
+    ResponseFormat,
+    columnar_response,
+    get_response_format,
+)
+
+
+@pytest.fixture(scope="module")
+def simulation_results():
+    rng = np.random.default_rng(5)
+    dates = [date(2018, 1, 1) + timedelta(days=i) for i in range(1_500)]
+    prices = 100 * np.cumprod(1 + rng.normal(0.0004, 0.01, len(dates)))
+    engine = MonteCarloEngine(pl.DataFrame({"timestamp": dates, "close": prices}))
+    return engine.simulate_dca_strategy(
+        MonteCarloConfig(investment_months=24, num_simulations=500, seed=1),
+        max_workers=1,
+    )
+
+
+def make_history() -> ColumnarHistory:
+    history = ColumnarHistory.allocate(
+        [date(2024, 1, 1) + timedelta(days=i) for i in range(4)], [7, 9]
+    )
+    history.cash_flows[:] = [100.0, 0.0, 50.0, 0.0]
+    history.holdings[:] = [[1.0, 0.0], [1.0, 0.0], [1.0, 0.5], [1.0, 0.5]]
+    history.held[:] = history.holdings != 0
+    history.values[:] = [100.0, 104.0, 160.0, 150.0]
+    return history
+
+
+@pytest.mark.parametrize(
+    "query, accept, expected",
+    [
+        (None, None, ResponseFormat.JSON),
+        (None, "application/json", ResponseFormat.JSON),
+        (None, ARROW_MEDIA_TYPE, ResponseFormat.ARROW),
+        (None, "application/vnd.columns+json", ResponseFormat.COLUMNS),
+        (ResponseFormat.COLUMNS, ARROW_MEDIA_TYPE, ResponseFormat.COLUMNS),
+    ],
+)
+def test_response_format_from_query_then_accept_header(query, accept, expected):
+    assert get_response_format(query, accept) == expected
+
+
+def test_simulation_columns_match_json_results(simulation_results):
+    payload = simulation_results.to_columnar()
+    as_dict = simulation_results.to_dict()
+
+    for key in ("month", "invested", "p5", "p50", "p95"):
+        assert payload.table[key].tolist() == [
+            row[key] for row in as_dict["chart_data"]
+        ]
+    for i, path in enumerate(as_dict["sample_paths"]):
+        assert payload.table[f"sample_{i}"].tolist() == path
+    histogram = payload.metadata["histogram"]
+    assert histogram["count"] == [b["count"] for b in as_dict["histogram"]]
+    assert histogram["min"] == [b["min"] for b in as_dict["histogram"]]
+    assert payload.metadata["risk_metrics"] == pytest.approx(as_dict["risk_metrics"])
+
+
+def test_columns_response_is_column_oriented_json(simulation_results):
+    payload = simulation_results.to_columnar()
+
+    response = columnar_response(payload, ResponseFormat.COLUMNS)
+
+    body = json.loads(response.body)
+    assert response.media_type == "application/json"
+    assert body["total_invested"] == simulation_results.total_invested
+    assert body["columns"]["p50"] == payload.table["p50"].tolist()
+    assert len(body["columns"]["month"]) == 25
+
+
+def test_arrow_response_round_trips(simulation_results):
+    payload = simulation_results.to_columnar()
+
+    response = columnar_response(payload, ResponseFormat.ARROW)
+
+    frame = pl.read_ipc_stream(io.BytesIO(response.body))
+    assert response.media_type == ARROW_MEDIA_TYPE
+    assert frame.columns == list(payload.table)
+    np.testing.assert_array_equal(frame["p95"].to_numpy(), payload.table["p95"])
+    metadata = json.loads(response.headers[METADATA_HEADER])
+    assert metadata["histogram"] == payload.metadata["histogram"]
+
+
+def test_history_columns_match_snapshots():
+    history = make_history()
+
+    columns = history.to_columns()
+    snapshots = history.to_snapshots()
+
+    assert columns["date"].tolist() == [s.date for s in snapshots]
+    for key in ("value", "cash_flow", "daily_return_pct", "daily_return_abs"):
+        assert columns[key].tolist() == [float(getattr(s, key)) for s in snapshots]
+    assert columns["holdings_9"].tolist() == [
+        float(s.holdings.get(9, 0)) for s in snapshots
+    ]
+
+
+def test_history_arrow_and_json_keep_dates():
+    columns = make_history().to_columns()
+
+    arrow = columnar_response(ColumnarPayload(columns), ResponseFormat.ARROW)
+    as_json = columnar_response(ColumnarPayload(columns), ResponseFormat.COLUMNS)
+
+    frame = pl.read_ipc_stream(io.BytesIO(arrow.body))
+    assert frame["date"].dtype == pl.Date
+    assert json.loads(as_json.body)["columns"]["date"][0] == "2024-01-01"
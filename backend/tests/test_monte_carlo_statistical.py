@@ -1,11 +1,26 @@
 from datetime import date, timedelta
+from decimal import Decimal
 
 import numpy as np
 import polars as pl
 import pytest
 
-from app.monte_carlo.monte_carlo_engine import MonteCarloEngine
-from app.schemas.monte_carlo import MonteCarloConfig, MonteCarloSimulationMethods
+from app.backtesting.engine import BacktestEngine
+from app.backtesting.strategies.base import BacktestStrategy
+from app.backtesting.strategies.buy_hold import BuyAndHoldStrategy
+from app.backtesting.strategies.dca import DCAStrategy
+from app.backtesting.strategies.va import VAStrategy
+from app.monte_carlo.monte_carlo_engine import (
+    MonteCarloEngine,
+    ReturnModel,
+    simulation_calendar,
+)
+from app.monte_carlo.streaming import QuantileSketch
+from app.schemas.monte_carlo import (
+    MonteCarloConfig,
+    MonteCarloSimulationMethods,
+    SimulationResolution,
+)
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -23,6 +38,18 @@ def _business_days(start: date, n: int) -> list[date]:
     return days
 
 
+def _month_end_prices(monthly_returns: np.ndarray, start_year: int) -> pl.DataFrame:
+    """One month-end close per month whose monthly returns are *monthly_returns*."""
+    import calendar
+
+    dates: list[date] = []
+    for i in range(len(monthly_returns) + 1):
+        year, month = start_year + i // 12, i % 12 + 1
+        dates.append(date(year, month, calendar.monthrange(year, month)[1]))
+    prices = 100.0 * np.cumprod(np.concatenate(([1.0], 1 + monthly_returns)))
+    return pl.DataFrame({"timestamp": dates, "close": prices})
+
+
 def _make_config(
     method: MonteCarloSimulationMethods,
     monthly_investment: float = 500.0,
@@ -156,7 +183,7 @@ def test_bootstrap_returns_drawn_from_historical_data(engine_normal_growth):
     config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=500)
     returns = engine_normal_growth.generate_returns(config)
 
-    assert returns.shape == (config.num_simulations, config.investment_months)
+    assert returns.shape == (config.num_simulations, config.investment_months, 1)
     assert np.all(np.isin(returns, engine_normal_growth.historical_returns)), (
         "Bootstrap return matrix contains values not found in historical_returns"
     )
@@ -252,3 +279,380 @@ def test_total_invested_is_exact(engine_normal_growth):
     assert results.total_invested == expected, (
         f"total_invested={results.total_invested} != {expected}"
     )
+
+
+# ---------------------------------------------------------------------------
+# Test 7 — vectorised max drawdown matches the per-path definition
+# ---------------------------------------------------------------------------
+
+
+def test_max_drawdowns_match_per_path_loop():
+    """
+    The chunked calculation must give each path's worst fall from its running
+    maximum, whatever the chunk size.
+    """
+    rng = np.random.default_rng(11)
+    paths = np.zeros((1_003, 25))
+    paths[:, 1:] = np.cumsum(rng.normal(100, 300, (1_003, 24)), axis=1)
+
+    expected = []
+    for path in paths:
+        running_max = np.maximum.accumulate(path)
+        expected.append(np.min((path - running_max) / np.maximum(running_max, 1)))
+
+    for chunk_rows in (1, 100, 4_096):
+        drawdowns = MonteCarloEngine.calculate_max_drawdowns(paths, chunk_rows)
+        np.testing.assert_allclose(drawdowns, expected)
+
+
+def test_max_drawdown_percentiles_are_reported(engine_fat_tails):
+    results = engine_fat_tails.simulate_dca_strategy(
+        _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=1_000)
+    )
+
+    percentiles = results.max_drawdown_percentiles
+    assert list(percentiles) == [5, 10, 25, 50, 75, 90, 95]
+    assert all(
+        a <= b <= 0
+        for a, b in zip(percentiles.values(), list(percentiles.values())[1:])
+    )
+    assert percentiles[5] <= results.risk_metrics["max_drawdown"] <= percentiles[95]
+    assert results.to_dict()["max_drawdown_percentiles"] == percentiles
+
+
+# ---------------------------------------------------------------------------
+# Test 8 — streaming mode agrees with the in-memory mode
+# ---------------------------------------------------------------------------
+
+
+def test_quantile_sketch_matches_numpy_percentiles():
+    rng = np.random.default_rng(3)
+    values = np.column_stack(
+        [rng.lognormal(10, 0.5, 20_000), rng.normal(0, 1_000, 20_000)]
+    )
+    sketch = QuantileSketch(columns=2)
+    for chunk in np.array_split(values, 7):
+        sketch.add(chunk)
+
+    levels = [1, 5, 25, 50, 75, 95, 99]
+    expected = np.percentile(values, levels, axis=0)
+    np.testing.assert_allclose(sketch.quantiles(levels), expected, rtol=0.03)
+    assert sketch.count == 20_000
+    assert sketch.histogram(50, column=0)[0].sum() == 20_000
+
+
+def test_streaming_mode_matches_in_memory_results(engine_fat_tails):
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=20_000)
+    config.seed = 21
+    in_memory = engine_fat_tails.simulate_dca_strategy(config, max_workers=1)
+    config.chunk_size = 1_500
+    streaming = engine_fat_tails.simulate_dca_strategy(config, max_workers=1)
+
+    assert streaming.total_invested == in_memory.total_invested
+    for level, value in in_memory.final_percentiles.items():
+        assert streaming.final_percentiles[level] == pytest.approx(value, rel=0.05)
+    for key in ("probability_of_loss", "mean_return", "max_drawdown"):
+        assert streaming.risk_metrics[key] == pytest.approx(
+            in_memory.risk_metrics[key], abs=0.02
+        )
+    assert len(streaming.chart_data) == len(in_memory.chart_data)
+    assert len(streaming.sample_paths) == 20
+    assert sum(b["count"] for b in streaming.histogram) == 20_000
+
+
+# ---------------------------------------------------------------------------
+# Test 9 — a seed reproduces results whatever the number of workers
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("chunk_size", [None, 2_000])
+@pytest.mark.parametrize(
+    "method",
+    [
+        MonteCarloSimulationMethods.BOOTSTRAP,
+        MonteCarloSimulationMethods.T_STUDENT,
+    ],
+)
+def test_seed_gives_identical_results_across_worker_counts(
+    engine_fat_tails, method, chunk_size
+):
+    config = _make_config(method, num_simulations=12_000)
+    config.seed = 1234
+    config.chunk_size = chunk_size
+
+    serial = engine_fat_tails.simulate_dca_strategy(config, max_workers=1)
+    parallel = engine_fat_tails.simulate_dca_strategy(config, max_workers=3)
+
+    assert parallel.to_dict() == serial.to_dict()
+
+    config.seed = 4321
+    other_seed = engine_fat_tails.simulate_dca_strategy(config, max_workers=1)
+    assert other_seed.risk_metrics["mean_return"] != serial.risk_metrics["mean_return"]
+
+
+# ---------------------------------------------------------------------------
+# Test 10 — any strategy with a batched plan can be simulated
+# ---------------------------------------------------------------------------
+
+
+def test_value_averaging_simulation_matches_backtester(engine_fat_tails):
+    """Every simulated path must end where the backtester would take it."""
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=50)
+    config.seed = 8
+    config.initial_price = 100.0
+    calendar = simulation_calendar(config.investment_months)
+    strategy = VAStrategy(0, Decimal("1000"), Decimal("400"), calendar)
+
+    returns = engine_fat_tails.generate_returns(config, 5)
+    portfolio_paths, invested_paths, _ = engine_fat_tails._simulate_paths(
+        config, strategy, calendar, returns
+    )
+    prices = config.initial_price * np.cumprod(1 + returns[..., 0], axis=1)
+
+    for path in range(5):
+        backtest = BacktestEngine.simulate_columnar(
+            VAStrategy(0, Decimal("1000"), Decimal("400"), calendar),
+            calendar,
+            {(0, day): float(prices[path, i]) for i, day in enumerate(calendar)},
+            calendar[0],
+            calendar[-1],
+            Decimal("0"),
+        )
+        assert portfolio_paths[path, -1] == pytest.approx(float(backtest.final_value))
+        assert invested_paths[path, -1] == pytest.approx(float(backtest.total_invested))
+
+    results = engine_fat_tails.simulate_strategy(strategy, config, max_workers=1)
+    assert results.total_invested > 1_000
+    assert len(results.chart_data) == config.investment_months + 1
+
+
+def test_buy_and_hold_simulation_invests_once(engine_normal_growth):
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=500)
+    strategy = BuyAndHoldStrategy({0: 1.0}, Decimal("10000"))
+
+    results = engine_normal_growth.simulate_strategy(strategy, config, max_workers=1)
+
+    invested = [point["invested"] for point in results.chart_data]
+    assert invested == [0.0] + [10_000.0] * config.investment_months
+    assert results.risk_metrics["probability_of_loss"] == 0.0
+
+
+def test_dca_simulation_uses_the_backtesting_strategy(engine_normal_growth):
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=500)
+    config.seed = 3
+    strategy = DCAStrategy(0, Decimal("500"), Decimal("500"), "monthly")
+
+    assert (
+        engine_normal_growth.simulate_strategy(strategy, config).to_dict()
+        == engine_normal_growth.simulate_dca_strategy(config).to_dict()
+    )
+
+
+def test_simulation_rejects_unsupported_strategies(engine_normal_growth):
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=10)
+
+    with pytest.raises(ValueError, match="not part of the simulation"):
+        engine_normal_growth.simulate_strategy(
+            BuyAndHoldStrategy({1: 0.5, 2: 0.5}, Decimal("1000")), config
+        )
+
+    class OnDayOnlyStrategy(BacktestStrategy):
+        def on_day(self, context):
+            return []
+
+        def get_parameters(self):
+            return {}
+
+        def get_asset_ids(self):
+            return [0]
+
+    with pytest.raises(ValueError, match="no batched plan"):
+        engine_normal_growth.simulate_strategy(OnDayOnlyStrategy(), config)
+
+
+# ---------------------------------------------------------------------------
+# Test 11 — several assets are simulated jointly
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def asset_models():
+    """
+    Three assets with ~0.8 correlated monthly returns; asset 3 starts two
+    years later, so only its 96 months overlap with the others.
+    """
+    rng = np.random.default_rng(17)
+    shocks = rng.multivariate_normal(
+        [0.0, 0.0, 0.0], [[1, 0.8, 0.8], [0.8, 1, 0.8], [0.8, 0.8, 1]], 120
+    )
+    returns = 0.006 + 0.04 * shocks
+    return {
+        1: ReturnModel.from_timeseries(_month_end_prices(returns[:, 0], 2010)),
+        2: ReturnModel.from_timeseries(_month_end_prices(returns[:, 1], 2010)),
+        3: ReturnModel.from_timeseries(_month_end_prices(returns[24:, 2], 2012)),
+    }
+
+
+def test_assets_are_aligned_on_common_months(asset_models):
+    engine = MonteCarloEngine(models=asset_models)
+
+    assert engine.historical_returns.shape == (96, 3)
+    np.testing.assert_array_equal(
+        engine.historical_returns[:, 0], asset_models[1].historical_returns[24:]
+    )
+    np.testing.assert_array_equal(
+        engine.historical_returns[:, 2], asset_models[3].historical_returns
+    )
+
+
+def test_joint_bootstrap_resamples_whole_months(asset_models):
+    engine = MonteCarloEngine(models=asset_models)
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=200)
+
+    returns = engine.generate_returns(config)
+
+    assert returns.shape == (200, config.investment_months, 3)
+    history = {tuple(row) for row in engine.historical_returns}
+    assert all(tuple(row) in history for row in returns.reshape(-1, 3))
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        MonteCarloSimulationMethods.BLOCK_BOOTSTRAP,
+        MonteCarloSimulationMethods.STATIONARY_BOOTSTRAP,
+    ],
+)
+def test_block_bootstraps_keep_runs_of_consecutive_months(asset_models, method):
+    engine = MonteCarloEngine(models=asset_models)
+    config = _make_config(method, investment_months=60, num_simulations=1_000)
+    config.block_length = 6
+
+    returns = engine.generate_returns(config)
+
+    row_of = {value: i for i, value in enumerate(engine.historical_returns[:, 0])}
+    rows = np.vectorize(row_of.__getitem__)(returns[..., 0])
+    consecutive = (rows[:, 1:] - rows[:, :-1]) % len(row_of) == 1
+    # A new block starts, on average, once every block_length months
+    assert np.mean(consecutive) == pytest.approx(1 - 1 / config.block_length, abs=0.02)
+    if method == MonteCarloSimulationMethods.BLOCK_BOOTSTRAP:
+        assert np.all(consecutive[:, np.arange(59) % 6 != 5])
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        MonteCarloSimulationMethods.NORMAL_DISTRIBUTION,
+        MonteCarloSimulationMethods.T_STUDENT,
+    ],
+)
+def test_parametric_draws_keep_the_historical_correlation(asset_models, method):
+    engine = MonteCarloEngine(models=asset_models)
+    config = _make_config(method, num_simulations=5_000)
+    config.seed = 5
+
+    returns = engine.generate_returns(config).reshape(-1, 3)
+
+    np.testing.assert_allclose(
+        np.corrcoef(returns, rowvar=False),
+        np.corrcoef(engine.historical_returns, rowvar=False),
+        atol=0.05,
+    )
+
+
+def test_multi_asset_buy_and_hold_simulation(asset_models):
+    engine = MonteCarloEngine(models=asset_models)
+    config = _make_config(
+        MonteCarloSimulationMethods.STATIONARY_BOOTSTRAP, num_simulations=6_000
+    )
+    config.seed = 99
+    strategy = BuyAndHoldStrategy({3: 0.25, 1: 0.75}, Decimal("10000"))
+
+    in_memory = engine.simulate_strategy(strategy, config, max_workers=1)
+    config.chunk_size = 1_000
+    serial = engine.simulate_strategy(strategy, config, max_workers=1)
+    parallel = engine.simulate_strategy(strategy, config, max_workers=3)
+
+    assert in_memory.total_invested == pytest.approx(10_000.0)
+    assert parallel.to_dict() == serial.to_dict()
+    assert serial.risk_metrics["mean_return"] == pytest.approx(
+        in_memory.risk_metrics["mean_return"], abs=0.02
+    )
+
+
+# ---------------------------------------------------------------------------
+# Test 12 — daily resolution
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def engine_daily():
+    """Engine backed by ~6 years of daily closes with 1% daily volatility."""
+    rng = np.random.default_rng(23)
+    dates = _business_days(date(2015, 1, 1), 1_500)
+    prices = 100.0 * np.cumprod(1 + rng.normal(0.0004, 0.01, len(dates)))
+    return MonteCarloEngine(pl.DataFrame({"timestamp": dates, "close": prices}))
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        MonteCarloSimulationMethods.BOOTSTRAP,
+        MonteCarloSimulationMethods.NORMAL_DISTRIBUTION,
+        MonteCarloSimulationMethods.T_STUDENT,
+    ],
+)
+def test_daily_returns_are_float32_trading_days(engine_daily, method):
+    config = _make_config(method, investment_months=12, num_simulations=100)
+    config.resolution = SimulationResolution.DAILY
+
+    returns = engine_daily.generate_returns(config)
+
+    assert returns.dtype == np.float32
+    assert returns.shape == (100, len(simulation_calendar(12, daily=True)), 1)
+    assert np.std(returns) == pytest.approx(0.01, rel=0.2)
+
+
+def test_daily_simulation_matches_monthly_schema(engine_daily):
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=3_000)
+    config.seed = 4
+    monthly = engine_daily.simulate_dca_strategy(config, max_workers=1)
+    config.resolution = SimulationResolution.DAILY
+    daily = engine_daily.simulate_dca_strategy(config, max_workers=1)
+
+    assert daily.to_dict().keys() == monthly.to_dict().keys()
+    assert len(daily.chart_data) == len(monthly.chart_data)
+    assert daily.total_invested == monthly.total_invested
+    assert daily.risk_metrics["mean_return"] == pytest.approx(
+        monthly.risk_metrics["mean_return"], abs=0.03
+    )
+    # Intramonth falls are invisible at month ends
+    assert daily.risk_metrics["max_drawdown"] < monthly.risk_metrics["max_drawdown"]
+
+
+def test_daily_simulation_is_chunked_and_reproducible(engine_daily, monkeypatch):
+    import app.monte_carlo.monte_carlo_engine as monte_carlo_engine
+
+    config = _make_config(MonteCarloSimulationMethods.BOOTSTRAP, num_simulations=600)
+    config.resolution = SimulationResolution.DAILY
+    config.seed = 12
+    config.chunk_size = 300
+    serial = engine_daily.simulate_dca_strategy(config, max_workers=1)
+
+    days = len(simulation_calendar(config.investment_months, daily=True))
+    monkeypatch.setattr(monte_carlo_engine, "DAILY_CHUNK_CELLS", 100 * days)
+    rows = []
+    simulate_paths = MonteCarloEngine._simulate_paths
+
+    def recording_simulate_paths(self, config, strategy, calendar, return_scenarios):
+        rows.append(len(return_scenarios))
+        return simulate_paths(self, config, strategy, calendar, return_scenarios)
+
+    monkeypatch.setattr(MonteCarloEngine, "_simulate_paths", recording_simulate_paths)
+    capped = engine_daily.simulate_dca_strategy(config, max_workers=1)
+
+    assert rows == [100] * 6
+    assert capped.total_invested == serial.total_invested
+    assert capped.risk_metrics["mean_return"] == pytest.approx(
+        serial.risk_metrics["mean_return"], abs=0.02
+    )
@@ -1,6 +1,19 @@
+from datetime import date, datetime
 from decimal import Decimal
 
+import pytest
+from fastapi import HTTPException
+
+from app import crud, models, schemas
+from app.api.endpoints.transaction import create_transaction
 from app.backtesting.metrics import calculate_max_drawdown, calculate_sharpe
+from app.services.portfolio_engine import (
+    calculate_holdings,
+    calculate_portfolio_history,
+    calculate_portfolio_series,
+    get_portfolio_data_for_user,
+)
+from app.services.price_cache import PriceArray
 
 
 def test_max_drawdown_basic(simple_drawdown_case):
@@ -29,3 +42,258 @@ def test_sharpe_negative_returns(negative_sharpe_returns):
 def test_sharpe_zero_volatility(zero_volatility_returns):
     result = calculate_sharpe(zero_volatility_returns)
     assert result == 0.0
+
+
+def test_holdings_use_latest_prices_of_held_assets(sqlite_session_factory):
+    db = sqlite_session_factory()
+    now = datetime(2024, 1, 5)
+    db.add_all(
+        [
+            models.Asset(id=1, asset_name="Held", ticker="HELD"),
+            models.Asset(id=2, asset_name="Other", ticker="OTHER"),
+            models.LatestPrice(
+                asset_id=1, timestamp=now, latest_price=12.5, updated_at=now
+            ),
+            models.LatestPrice(
+                asset_id=2, timestamp=now, latest_price=99.0, updated_at=now
+            ),
+        ]
+    )
+    crud.position.apply_transaction_to_position(
+        db, "user-1", 1, "buy", Decimal("4"), Decimal("10")
+    )
+    db.commit()
+    positions = crud.position.get_positions(db, "user-1")
+
+    latest_prices = crud.timeseries.get_latest_prices(
+        db, {p.asset_id for p in positions}
+    )
+    holdings = calculate_holdings(positions, latest_prices, db)
+
+    assert list(latest_prices) == [1]
+    assert holdings["1"].current_price == Decimal("12.5")
+    assert holdings["1"].net_value == Decimal("50.0")
+    assert holdings["1"].unrealised_gain_loss == Decimal("10.0")
+    db.close()
+
+
+def add_position_transaction(db, type, quantity, price) -> models.Transaction:
+    transaction = models.Transaction(
+        user_id="user-1",
+        portfolio_name="Main",
+        asset_id=1,
+        type=type,
+        quantity=Decimal(quantity),
+        price=Decimal(price),
+        timestamp=datetime(2024, 1, 2),
+    )
+    db.add(transaction)
+    crud.position.apply_transaction_to_position(
+        db, "user-1", 1, type, Decimal(quantity), Decimal(price)
+    )
+    db.commit()
+    return transaction
+
+
+def test_position_keeps_running_average_cost(sqlite_session_factory):
+    db = sqlite_session_factory()
+    add_position_transaction(db, "buy", "10", "10")
+    add_position_transaction(db, "buy", "10", "20")
+    add_position_transaction(db, "sell", "5", "30")
+
+    position = crud.position.get_position(db, "user-1", 1)
+
+    assert position.net_quantity == Decimal("15")
+    assert position.average_cost_basis == Decimal("15")
+    assert position.total_cost == Decimal("225")
+    db.close()
+
+
+def test_deleting_a_transaction_replays_the_position(sqlite_session_factory):
+    db = sqlite_session_factory()
+    first = add_position_transaction(db, "buy", "10", "10")
+    add_position_transaction(db, "buy", "10", "20")
+    add_position_transaction(db, "sell", "5", "30")
+
+    crud.transaction.delete_transaction(db, first.id)
+
+    position = crud.position.get_position(db, "user-1", 1)
+    assert position.net_quantity == Decimal("5")
+    assert position.total_cost == Decimal("100")
+    assert position.average_cost_basis == Decimal("20")
+
+    for transaction in db.query(models.Transaction).all():
+        crud.transaction.delete_transaction(db, transaction.id)
+    assert crud.position.get_positions(db, "user-1") == []
+    db.close()
+
+
+def create_user_transaction(db, type, quantity, price):
+    return create_transaction(
+        portfolio_name="Main",
+        asset_id=1,
+        type=type,
+        quantity=quantity,
+        price=price,
+        purchase_date=datetime(2024, 1, 2, 12),
+        user_timezone="UTC",
+        current_user="user-1",
+        db=db,
+    )
+
+
+def test_created_transactions_apply_stored_values(sqlite_session_factory):
+    db = sqlite_session_factory()
+    db.add_all(
+        [
+            models.User(id="user-1"),
+            models.Asset(id=1, asset_name="Asset 1", ticker="AAA"),
+        ]
+    )
+    db.commit()
+    create_user_transaction(db, "buy", 3.123456789, 10.005)
+    create_user_transaction(db, "buy", 2, 20.333)
+    create_user_transaction(db, "sell", 1.5, 30.999)
+
+    position = crud.position.get_position(db, "user-1", 1)
+    applied = (
+        position.net_quantity,
+        position.total_cost,
+        position.average_cost_basis,
+    )
+    crud.position.rebuild_position(db, "user-1", 1)
+    db.commit()
+    rebuilt = crud.position.get_position(db, "user-1", 1)
+
+    assert [t.price for t in db.query(models.Transaction)] == [
+        Decimal("10.01"),
+        Decimal("20.33"),
+        Decimal("31.00"),
+    ]
+    assert applied == (
+        rebuilt.net_quantity,
+        rebuilt.total_cost,
+        rebuilt.average_cost_basis,
+    )
+
+    with pytest.raises(HTTPException) as error:
+        create_user_transaction(db, "sell", 3.7, 30)
+    assert error.value.status_code == 400
+    db.close()
+
+
+HISTORY_DAYS = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4), date(2024, 1, 5)]
+
+
+def history_transaction(asset_id, type, quantity, price, timestamp):
+    return models.Transaction(
+        asset_id=asset_id,
+        type=type,
+        quantity=Decimal(quantity),
+        price=Decimal(price),
+        timestamp=timestamp,
+    )
+
+
+def test_portfolio_history_from_arrays():
+    price_arrays = {
+        1: PriceArray.from_rows(list(zip(HISTORY_DAYS, [10.0, 11.0, 12.0, 12.5]))),
+        # Asset 2 has no price on Jan 4, so it is valued at zero that day
+        2: PriceArray.from_rows(
+            [(HISTORY_DAYS[0], 5.0), (HISTORY_DAYS[1], 5.0), (HISTORY_DAYS[3], 6.0)]
+        ),
+    }
+    transactions = [
+        # Placed on a non-trading day, so it lands on the next trading day
+        history_transaction(1, "buy", "2", "10.50", datetime(2024, 1, 1, 15)),
+        history_transaction(1, "sell", "1", "12", datetime(2024, 1, 4, 10)),
+    ]
+
+    history = calculate_portfolio_history(
+        transactions, HISTORY_DAYS, price_arrays, {2: Decimal("10")}
+    )
+
+    assert [h.value for h in history] == [
+        Decimal("70.00"),
+        Decimal("72.00"),
+        Decimal("12.00"),
+        Decimal("72.50"),
+    ]
+    assert [h.cash_flow for h in history] == [
+        Decimal("21.00"),
+        Decimal("0.00"),
+        Decimal("-12.00"),
+        Decimal("0.00"),
+    ]
+    assert [h.daily_return_val for h in history] == [
+        Decimal("0"),
+        Decimal("2.00"),
+        Decimal("-48.00"),
+        Decimal("60.50"),
+    ]
+    assert history[1].daily_return_pct == Decimal("0.028571")
+
+
+def test_portfolio_series_ignores_transactions_after_last_day():
+    price_arrays = {1: PriceArray.from_rows([(d, 10.0) for d in HISTORY_DAYS])}
+    transactions = [history_transaction(1, "buy", "1", "10", datetime(2024, 1, 8))]
+
+    series = calculate_portfolio_series(transactions, HISTORY_DAYS, price_arrays)
+
+    assert series.values.tolist() == [0.0, 0.0, 0.0, 0.0]
+    assert series.cash_flows.tolist() == [0.0, 0.0, 0.0, 0.0]
+    assert str(series.to_history()[0].value) == "0.00"
+
+
+def add_portfolio(db):
+    db.add(models.Asset(id=1, asset_name="Held", ticker="HELD"))
+    db.add_all(
+        models.Timeseries(
+            asset_id=1,
+            timestamp=datetime.combine(day, datetime.min.time()),
+            open=10.0,
+            high=10.0,
+            low=10.0,
+            close=10.0 + i,
+            adj_close=10.0 + i,
+        )
+        for i, day in enumerate(HISTORY_DAYS)
+    )
+    db.add(
+        models.Transaction(
+            user_id="user-1",
+            portfolio_name="Main",
+            asset_id=1,
+            type=schemas.TransactionType.buy,
+            quantity=Decimal("2"),
+            price=Decimal("10"),
+            timestamp=datetime(2024, 1, 2, 12),
+        )
+    )
+    db.commit()
+
+
+def test_portfolio_data_follows_new_transactions(sqlite_session_factory):
+    db = sqlite_session_factory()
+    add_portfolio(db)
+
+    _, history = get_portfolio_data_for_user("user-1", db)
+    assert history[-1].value == Decimal("26.00")
+
+    db.add(
+        models.Transaction(
+            user_id="user-1",
+            portfolio_name="Main",
+            asset_id=1,
+            type=schemas.TransactionType.buy,
+            quantity=Decimal("1"),
+            price=Decimal("12"),
+            timestamp=datetime(2024, 1, 4, 12),
+        )
+    )
+    db.commit()
+    transactions, history = get_portfolio_data_for_user("user-1", db)
+
+    assert len(transactions) == 2
+    assert history[-1].value == Decimal("39.00")
+    db.close()
@@ -0,0 +1,195 @@
+"""Tests for the persisted, incrementally updated portfolio valuations"""
+
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app import crud, models, schemas
+from app.api.endpoints.portfolio import get_portfolio_metrics, get_portfolio_over_time
+from app.core.data_ingestion.data_sources import InMemoryDataSource
+from app.core.data_ingestion.update_timeseries import update_all_assets
+from app.services.portfolio_engine import (
+    calculate_metrics,
+    get_portfolio_data_for_user,
+)
+from app.services.portfolio_valuation import (
+    get_portfolio_history,
+    update_portfolio_valuations,
+)
+from app.services.price_cache import price_cache
+from tests.helpers import create_history
+
+USER_ID = "user-1"
+DAYS = [
+    date(2024, 1, 1) + timedelta(days=i)
+    for i in range(60)
+    if (date(2024, 1, 1) + timedelta(days=i)).weekday() < 5
+]
+
+
+@pytest.fixture
+def db(sqlite_session_factory):
+    session = sqlite_session_factory()
+    session.add_all(
+        models.Asset(id=asset_id, asset_name=f"Asset {asset_id}", ticker=f"A{asset_id}")
+        for asset_id in (1, 2, 3)
+    )
+    session.commit()
+    yield session
+    session.close()
+
+
+def add_prices(db, days: list[date], seed: int = 7):
+    rng = random.Random(seed)
+    db.add_all(
+        models.Timeseries(
+            asset_id=asset_id,
+            timestamp=datetime.combine(day, datetime.min.time()),
+            open=0.0,
+            high=0.0,
+            low=0.0,
+            close=0.0,
+            adj_close=round(rng.uniform(20, 40), 4),
+        )
+        for day in days
+        for asset_id in (1, 2, 3)
+    )
+    db.commit()
+
+
+def add_transaction(db, asset_id, type, quantity, price, timestamp) -> int:
+    transaction = models.Transaction(
+        user_id=USER_ID,
+        portfolio_name="Main",
+        asset_id=asset_id,
+        type=type,
+        quantity=Decimal(quantity),
+        price=Decimal(price),
+        timestamp=timestamp,
+    )
+    db.add(transaction)
+    crud.portfolio_valuation.delete_portfolio_valuations(
+        db, USER_ID, from_date=timestamp.date()
+    )
+    db.commit()
+    return transaction.id
+
+
+def full_recompute(db) -> list[schemas.PortfolioValueHistory]:
+    # Prices are added directly rather than through ingestion, which would
+    # clear this cache
+    price_cache.invalidate()
+    _, history = get_portfolio_data_for_user(USER_ID, db)
+    return history
+
+
+def stored_dates(db) -> list[date]:
+    return [
+        v.date for v in crud.portfolio_valuation.get_portfolio_valuations(db, USER_ID)
+    ]
+
+
+def add_sample_transactions(db):
+    add_transaction(db, 1, "buy", "10", "30", datetime(2024, 1, 2, 15))
+    add_transaction(db, 2, "buy", "5", "25", datetime(2024, 1, 6, 10))
+    add_transaction(db, 1, "sell", "4", "32", datetime(2024, 1, 17, 10))
+    add_transaction(db, 3, "buy", "2.5", "35", datetime(2024, 2, 1, 10))
+
+
+class TestIncrementalValuations:
+    def test_matches_full_recompute_as_prices_arrive(self, db):
+        add_sample_transactions(db)
+
+        # Prices arrive a few days at a time, as with daily refreshes
+        for i in range(0, len(DAYS), 7):
+            add_prices(db, DAYS[i : i + 7], seed=i)
+            update_portfolio_valuations(db, USER_ID)
+
+        assert get_portfolio_history(db, USER_ID) == full_recompute(db)
+
+    def test_only_new_days_are_valued(self, db):
+        add_sample_transactions(db)
+        add_prices(db, DAYS[:20])
+        first = update_portfolio_valuations(db, USER_ID)
+
+        add_prices(db, DAYS[20:22], seed=20)
+
+        assert update_portfolio_valuations(db, USER_ID) == 2
+        assert update_portfolio_valuations(db, USER_ID) == 0
+        assert len(stored_dates(db)) == first + 2
+
+    def test_back_dated_transaction_recomputes_from_its_date(self, db):
+        add_sample_transactions(db)
+        add_prices(db, DAYS)
+        update_portfolio_valuations(db, USER_ID)
+
+        add_transaction(db, 2, "buy", "3", "28", datetime(2024, 2, 10, 9))
+
+        assert stored_dates(db)[-1] < date(2024, 2, 10)
+        written = update_portfolio_valuations(db, USER_ID)
+        assert written == len([d for d in DAYS if d >= date(2024, 2, 10)])
+        assert get_portfolio_history(db, USER_ID) == full_recompute(db)
+
+    def test_range_starts_without_a_return(self, db):
+        add_sample_transactions(db)
+        add_prices(db, DAYS)
+
+        history = get_portfolio_history(db, USER_ID, start_date=date(2024, 2, 1))
+
+        assert history[0].date == date(2024, 2, 1)
+        assert history[0].daily_return_pct == Decimal("0")
+        assert history[0].daily_return_val == Decimal("0")
+        assert history[1].daily_return_val != Decimal("0")
+
+    def test_no_transactions(self, db):
+        with pytest.raises(HTTPException) as error:
+            get_portfolio_history(db, USER_ID)
+
+        assert error.value.status_code == 404
+
+
+class TestIngestionInvalidatesValuations:
+    def test_late_prices_revalue_holders(self, db):
+        add_sample_transactions(db)
+        add_prices(db, DAYS[:20])
+        update_portfolio_valuations(db, USER_ID)
+        # Asset 1's last price row was missing when that day was valued
+        last_day = datetime.combine(DAYS[19], datetime.min.time())
+        db.query(models.Timeseries).filter(
+            models.Timeseries.asset_id == 1, models.Timeseries.timestamp == last_day
+        ).delete()
+        db.commit()
+        crud.portfolio_valuation.delete_portfolio_valuations(db, USER_ID, DAYS[19])
+        update_portfolio_valuations(db, USER_ID)
+
+        history = create_history([DAYS[18].isoformat(), DAYS[19].isoformat()])
+        update_all_assets(db, InMemoryDataSource({"A1": history}))
+
+        assert stored_dates(db)[-1] == DAYS[18]
+        assert get_portfolio_history(db, USER_ID) == full_recompute(db)
+
+
+def test_metrics_use_the_stored_series(db):
+    # Recent days, since both endpoints look at the last year
+    today = date.today()
+    days = [
+        today - timedelta(days=i)
+        for i in range(400, 0, -1)
+        if (today - timedelta(days=i)).weekday() < 5
+    ]
+    add_prices(db, days)
+    add_transaction(db, 1, "buy", "10", "30", datetime.combine(days[0], time(10)))
+    add_transaction(db, 2, "buy", "5", "25", datetime.combine(days[-30], time(10)))
+
+    history = get_portfolio_over_time(current_user=USER_ID, db=db)
+    metrics = get_portfolio_metrics(current_user=USER_ID, db=db)
+
+    transactions = crud.transaction.get_transactions_by_user(db, USER_ID)
+    assert history[0].date > days[0]
+    assert metrics == calculate_metrics(transactions, history)
+    assert metrics.start_date == history[0].date
+    assert metrics.end_date == days[-1]
+    assert metrics.current_value == history[-1].value
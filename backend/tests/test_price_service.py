@@ -1,10 +1,13 @@
 """Tests for PriceService"""
 
 from datetime import date, datetime
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import pytest
 
+from app import crud
+from app.models import Asset, Timeseries
+from app.services.price_cache import PriceArray, PriceCache, price_cache
 from app.services.price_service import PriceService
 
 
@@ -270,3 +273,118 @@ class TestGetLatestPrice:
         result = service.get_latest_price(999)
 
         assert result is None
+
+
+class TestPriceCache:
+    """Test the shared price array cache behind get_price_lookup"""
+
+    @staticmethod
+    def add_prices(db, days: list[int], price: float = 100.0):
+        """Prices for asset 1 on the given days of January, as ingestion stores them"""
+        db.merge(Asset(id=1, asset_name="Asset 1", ticker="AAA"))
+        db.add_all(
+            Timeseries(
+                asset_id=1,
+                timestamp=datetime(2024, 1, day),
+                open=price,
+                high=price,
+                low=price,
+                close=price,
+                adj_close=price + day,
+            )
+            for day in days
+        )
+        crud.refresh_latest_prices(db, [1])
+        db.commit()
+
+    def test_second_lookup_is_served_from_cache(self, sqlite_session_factory):
+        """Different services and date ranges share one cached load"""
+        db = sqlite_session_factory()
+        self.add_prices(db, [2, 1, 3])
+
+        first = PriceService(db, autorun=False).get_price_lookup(
+            [1], date(2024, 1, 1), date(2024, 1, 3)
+        )
+        second = PriceService(db, autorun=False).get_price_lookup(
+            [1], date(2024, 1, 2), datetime(2024, 1, 3, 12, 0)
+        )
+
+        assert len(first) == 3
+        assert second == {(1, date(2024, 1, 2)): 102.0, (1, date(2024, 1, 3)): 103.0}
+        stats = price_cache.stats()
+        assert (stats.hits, stats.misses) == (1, 1)
+        db.close()
+
+    def test_assets_without_prices_are_cached(self, sqlite_session_factory):
+        db = sqlite_session_factory()
+        service = PriceService(db, autorun=False)
+
+        assert service.get_price_lookup([7], date(2024, 1, 1), date(2024, 1, 2)) == {}
+        assert service.get_price_lookup([7], date(2024, 1, 1), date(2024, 1, 2)) == {}
+        assert price_cache.stats().hits == 1
+        db.close()
+
+    def test_prices_ingested_elsewhere_are_reloaded(self, sqlite_session_factory):
+        """Another process's ingestion changes the version, not this cache"""
+        db = sqlite_session_factory()
+        self.add_prices(db, [1])
+        service = PriceService(db, autorun=False)
+        service.get_price_lookup([1], date(2024, 1, 1), date(2024, 1, 5))
+
+        self.add_prices(db, [2])
+
+        prices = service.get_price_lookup([1], date(2024, 1, 1), date(2024, 1, 5))
+        assert list(prices.values()) == [101.0, 102.0]
+        assert price_cache.stats().hits == 0
+        db.close()
+
+    def test_prices_ingested_during_a_load_are_not_cached(self, sqlite_session_factory):
+        db = sqlite_session_factory()
+        self.add_prices(db, [1])
+        service = PriceService(db, autorun=False)
+        load_price_arrays = service.load_price_arrays
+
+        def load_then_ingest(asset_ids):
+            arrays = load_price_arrays(asset_ids)
+            self.add_prices(db, [2])
+            return arrays
+
+        with patch.object(service, "load_price_arrays", load_then_ingest):
+            service.get_price_lookup([1], date(2024, 1, 1), date(2024, 1, 5))
+
+        assert price_cache.stats().entries == 0
+        db.close()
+
+    def test_mark_prices_as_refreshed_invalidates(self, sqlite_session_factory):
+        db = sqlite_session_factory()
+        self.add_prices(db, [1])
+        service = PriceService(db, autorun=False)
+        service.get_price_lookup([1], date(2024, 1, 1), date(2024, 1, 1))
+
+        crud.mark_prices_as_refreshed(db)
+
+        assert price_cache.stats().entries == 0
+        db.close()
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        entry = PriceArray.from_rows([(date(2024, 1, 1), 1.0)])
+        cache = PriceCache(max_bytes=2 * entry.nbytes)
+
+        version = datetime(2024, 1, 1)
+        cache.put(1, version, entry)
+        cache.put(2, version, entry)
+        cache.get(1, version)  # 2 is now least recently used
+        cache.put(3, version, entry)
+
+        assert cache.get(2, version) is None
+        assert cache.get(1, version) is entry
+        assert cache.get(3, version) is entry
+        stats = cache.stats()
+        assert stats.evictions == 1
+        assert stats.nbytes == 2 * entry.nbytes
+
+    def test_cached_arrays_are_read_only(self):
+        entry = PriceArray.from_rows([(date(2024, 1, 1), 1.0)])
+
+        with pytest.raises(ValueError):
+            entry.prices[0] = 2.0
@@ -0,0 +1,134 @@
+"""Tests for the background price refresh scheduler"""
+
+import threading
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from app.core.data_ingestion.data_sources import InMemoryDataSource
+from app.core.data_ingestion.refresh_scheduler import (
+    PriceRefreshScheduler,
+    RefreshOutcome,
+)
+from app.models import Asset, Timeseries
+from app.services.price_cache import PriceArray, price_cache
+from app.services.price_service import PriceService
+from tests.helpers import create_history
+
+
+class TestSingleFlight:
+    def test_concurrent_refreshes_ingest_once(self):
+        """Only one of several simultaneous triggers runs ingestion"""
+        scheduler = PriceRefreshScheduler(session_factory=Mock)
+        started = threading.Event()
+        release = threading.Event()
+        ingest_calls = []
+
+        def slow_ingest(db):
+            ingest_calls.append(db)
+            started.set()
+            release.wait(5)
+
+        scheduler._ingest = slow_ingest
+        outcomes = []
+        first = threading.Thread(
+            target=lambda: outcomes.append(scheduler.refresh(force=True))
+        )
+        first.start()
+        started.wait(5)
+
+        others = [scheduler.refresh(force=True) for _ in range(4)]
+        release.set()
+        first.join(5)
+
+        assert len(ingest_calls) == 1
+        assert others == [RefreshOutcome.IN_PROGRESS] * 4
+        assert outcomes == [RefreshOutcome.REFRESHED]
+        assert not scheduler.is_refreshing
+
+    def test_fresh_prices_are_not_ingested(self):
+        scheduler = PriceRefreshScheduler(session_factory=Mock)
+        scheduler._ingest = Mock()
+
+        with patch(
+            "app.core.data_ingestion.refresh_scheduler.crud.check_prices_stale",
+            return_value=False,
+        ):
+            outcome = scheduler.refresh()
+
+        assert outcome == RefreshOutcome.FRESH
+        scheduler._ingest.assert_not_called()
+
+    def test_failed_refresh_releases_lock(self):
+        scheduler = PriceRefreshScheduler(session_factory=Mock)
+        scheduler._ingest = Mock(side_effect=RuntimeError("download failed"))
+
+        try:
+            scheduler.refresh(force=True)
+        except RuntimeError:
+            pass
+
+        assert not scheduler.is_refreshing
+        assert scheduler.last_refreshed is None
+
+
+class TestOfflineRefresh:
+    def test_refresh_ingests_from_data_source(self, sqlite_session_factory):
+        """End to end refresh against SQLite with an in-memory data source"""
+        db = sqlite_session_factory()
+        db.add(Asset(id=1, asset_name="Test Asset", ticker="TEST"))
+        db.commit()
+        price_cache.put(1, None, PriceArray.from_rows([]))
+
+        data_source = InMemoryDataSource(
+            {"TEST": create_history(["2024-01-02", "2024-01-03", "2024-01-04"])}
+        )
+        scheduler = PriceRefreshScheduler(
+            session_factory=sqlite_session_factory, data_source=data_source
+        )
+
+        outcome = scheduler.refresh(force=True)
+
+        rows = db.query(Timeseries).order_by(Timeseries.timestamp).all()
+        assert outcome == RefreshOutcome.REFRESHED
+        assert [tickers for tickers, _ in data_source.requested] == [["TEST"]]
+        assert [row.adj_close for row in rows] == [100.0, 101.0, 102.0]
+        assert rows[0].timestamp == datetime(2024, 1, 2)
+        # Readers see the new rows rather than the stale cached array
+        assert price_cache.stats().entries == 0
+        db.close()
+
+    def test_failed_downloads_are_reported(self, sqlite_session_factory):
+        db = sqlite_session_factory()
+        db.add_all(
+            [
+                Asset(id=1, asset_name="Test Asset", ticker="TEST"),
+                Asset(id=2, asset_name="Missing Asset", ticker="BAD"),
+            ]
+        )
+        db.commit()
+
+        class FailingDataSource(InMemoryDataSource):
+            def get_histories(self, tickers, start):
+                if "BAD" in tickers:
+                    raise ConnectionError("rate limited")
+                return super().get_histories(tickers, start)
+
+        scheduler = PriceRefreshScheduler(
+            session_factory=sqlite_session_factory,
+            data_source=FailingDataSource({"TEST": create_history(["2024-01-02"])}),
+        )
+        outcome = scheduler.refresh(force=True)
+
+        assert outcome == RefreshOutcome.PARTIAL
+        assert scheduler.last_refreshed is None
+        assert db.query(Timeseries).count() == 0
+        db.close()
+
+    def test_request_path_does_not_refresh(self):
+        """Building a PriceService never triggers ingestion"""
+        with patch(
+            "app.core.data_ingestion.refresh_scheduler.price_refresh_scheduler"
+        ) as scheduler:
+            PriceService(Mock())
+
+        scheduler.refresh.assert_not_called()
@@ -0,0 +1,175 @@
+"""Tests for the per-asset Monte Carlo return model cache"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from app import crud, models
+from app.api.endpoints.monte_carlo import get_return_model, monte_carlo
+from app.core.data_ingestion.data_sources import InMemoryDataSource
+from app.core.data_ingestion.update_timeseries import update_all_assets
+from app.monte_carlo.model_cache import return_model_cache
+from app.monte_carlo.monte_carlo_engine import MonteCarloEngine
+from app.schemas.monte_carlo import (
+    MonteCarloConfig,
+    MonteCarloSimulationMethods,
+    SimulationResolution,
+)
+from app.utils.columnar_response import ResponseFormat
+from tests.helpers import create_history
+
+# Recent enough to fall inside the 8-year window the endpoint loads
+START = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(
+    days=3 * 365
+)
+DAYS = [
+    START + timedelta(days=i)
+    for i in range(3 * 365)
+    if (START + timedelta(days=i)).weekday() < 5
+]
+
+
+@pytest.fixture
+def db(sqlite_session_factory):
+    session = sqlite_session_factory()
+    session.add(models.Asset(id=1, asset_name="Asset 1", ticker="AAA"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def add_prices(db, days: list[datetime], seed: int = 3):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, len(days)))
+    db.add_all(
+        models.Timeseries(
+            asset_id=1,
+            timestamp=day,
+            open=close,
+            high=close,
+            low=close,
+            close=close,
+            adj_close=close,
+        )
+        for day, close in zip(days, closes)
+    )
+    db.flush()
+    crud.timeseries.refresh_latest_prices(db, [1])
+    db.commit()
+
+
+@pytest.fixture
+def count_timeseries_loads(monkeypatch):
+    calls = []
+    load = crud.timeseries.get_latest_timeseries_for_asset
+
+    def counting_load(asset_id, db):
+        calls.append(asset_id)
+        return load(asset_id, db)
+
+    monkeypatch.setattr(
+        crud.timeseries, "get_latest_timeseries_for_asset", counting_load
+    )
+    return calls
+
+
+class TestReturnModelCache:
+    def test_repeat_requests_skip_setup(self, db, count_timeseries_loads):
+        add_prices(db, DAYS)
+
+        first = get_return_model(1, db)
+        second = get_return_model(1, db)
+
+        assert second is first
+        assert count_timeseries_loads == [1]
+        stats_ = return_model_cache.stats()
+        assert (stats_.hits, stats_.misses, stats_.entries) == (1, 1, 1)
+
+    def test_newer_price_rebuilds_model(self, db, count_timeseries_loads):
+        add_prices(db, DAYS[:-1])
+        first = get_return_model(1, db)
+
+        add_prices(db, DAYS[-1:], seed=4)
+        second = get_return_model(1, db)
+
+        assert second is not first
+        assert count_timeseries_loads == [1, 1]
+        assert second.last_price == db.get(models.LatestPrice, 1).latest_price
+
+    def test_ingestion_invalidates_asset(self, db):
+        add_prices(db, DAYS)
+        get_return_model(1, db)
+        next_day = (DAYS[-1] + timedelta(days=1)).strftime("%Y-%m-%d")
+
+        update_all_assets(db, InMemoryDataSource({"AAA": create_history([next_day])}))
+
+        assert return_model_cache.stats().entries == 0
+
+    def test_t_fit_runs_once_per_model(self, db, monkeypatch):
+        add_prices(db, DAYS)
+        fits = []
+        fit = stats.t.fit
+
+        def counting_fit(data):
+            fits.append(len(data))
+            return fit(data)
+
+        monkeypatch.setattr(stats.t, "fit", counting_fit)
+        config = MonteCarloConfig(
+            investment_months=12,
+            num_simulations=500,
+            simulation_method=MonteCarloSimulationMethods.T_STUDENT,
+            seed=9,
+        )
+
+        results = [
+            MonteCarloEngine(model=get_return_model(1, db))
+            .simulate_dca_strategy(config, max_workers=1)
+            .to_dict()
+            for _ in range(2)
+        ]
+
+        assert len(fits) == 1
+        assert results[0] == results[1]
+
+    def test_cached_model_matches_fresh_engine(self, db):
+        add_prices(db, DAYS)
+        config = MonteCarloConfig(investment_months=24, num_simulations=1_000, seed=5)
+
+        fresh = MonteCarloEngine(
+            crud.timeseries.get_latest_timeseries_for_asset(1, db)
+        ).simulate_dca_strategy(config, max_workers=1)
+        config.initial_price = None
+        cached = MonteCarloEngine(model=get_return_model(1, db)).simulate_dca_strategy(
+            config, max_workers=1
+        )
+
+        assert cached.to_dict() == fresh.to_dict()
+
+
+def test_requests_simulate_without_a_process_pool(db):
+    """Daily resolution splits the endpoint's simulations into several chunks"""
+    add_prices(db, DAYS)
+
+    with (
+        patch("app.monte_carlo.monte_carlo_engine.os.cpu_count", return_value=4),
+        patch(
+            "app.monte_carlo.monte_carlo_engine.ProcessPoolExecutor",
+            side_effect=AssertionError("process pool started"),
+        ),
+    ):
+        results = monte_carlo(
+            ticker_id=1,
+            monthly_investment=100.0,
+            investment_months=12,
+            simulation_method=MonteCarloSimulationMethods.BOOTSTRAP,
+            seed=3,
+            resolution=SimulationResolution.DAILY,
+            response_format=ResponseFormat.JSON,
+            db=db,
+        )
+
+    assert len(results["chart_data"]) == 13
@@ -0,0 +1,378 @@
+"""Tests for the batched timeseries ingestion pipeline"""
+
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pandas as pd
+import polars as pl
+import pytest
+
+from app import crud
+from app.core.data_ingestion.data_sources import (
+    FileDataSource,
+    IncompleteDownloadError,
+    InMemoryDataSource,
+    YFinanceDataSource,
+)
+from app.core.data_ingestion.update_timeseries import (
+    insert_timeseries,
+    plan_downloads,
+    to_timeseries_rows,
+    update_all_assets,
+)
+from app.models import Asset, CorporateAction, LatestPrice, PriceUpdate, Timeseries
+from tests.helpers import create_history
+
+
+@pytest.fixture
+def db(sqlite_session_factory):
+    session = sqlite_session_factory()
+    yield session
+    session.close()
+
+
+def add_assets(db, tickers: list[str]) -> list[Asset]:
+    assets = [
+        Asset(id=i + 1, asset_name=ticker, ticker=ticker)
+        for i, ticker in enumerate(tickers)
+    ]
+    db.add_all(assets)
+    db.commit()
+    return assets
+
+
+def add_prices(db, asset_id: int, dates: list[str], price: float = 50.0):
+    db.add_all(
+        Timeseries(
+            asset_id=asset_id,
+            timestamp=datetime.fromisoformat(d),
+            open=price,
+            high=price,
+            low=price,
+            close=price,
+            adj_close=price,
+        )
+        for d in dates
+    )
+    db.commit()
+
+
+def stored_prices(db, asset_id: int) -> list[tuple[date, float]]:
+    rows = (
+        db.query(Timeseries)
+        .filter(Timeseries.asset_id == asset_id)
+        .order_by(Timeseries.timestamp)
+        .all()
+    )
+    return [(row.timestamp.date(), row.adj_close) for row in rows]
+
+
+class TestPlanDownloads:
+    def test_batches_assets_sharing_a_start_date(self, db):
+        assets = add_assets(db, ["A", "B", "C", "D", "E"])
+        latest = {
+            1: datetime(2024, 1, 5),
+            2: datetime(2024, 1, 5),
+            3: datetime(2024, 1, 5),
+            4: datetime(2024, 1, 3),
+        }
+
+        downloads = plan_downloads(assets, latest, batch_size=2)
+
+        as_tickers = [(start, [a.ticker for a in batch]) for start, batch in downloads]
+        assert as_tickers[0][0] < date(2024, 1, 1)  # E has no history yet
+        assert as_tickers[0][1] == ["E"]
+        assert as_tickers[1:] == [
+            (date(2024, 1, 3), ["D"]),
+            (date(2024, 1, 5), ["A", "B"]),
+            (date(2024, 1, 5), ["C"]),
+        ]
+
+
+class TestUpdateAllAssets:
+    def test_downloads_only_missing_range(self, db):
+        add_assets(db, ["AAA", "BBB"])
+        add_prices(db, 1, ["2024-01-02", "2024-01-03"])
+        add_prices(db, 2, ["2024-01-02", "2024-01-03"])
+        dates = ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]
+        data_source = InMemoryDataSource(
+            {"AAA": create_history(dates), "BBB": create_history(dates, 200.0)}
+        )
+
+        update_all_assets(db, data_source, batch_size=10, max_workers=2)
+
+        # One batch for both tickers, starting at the latest stored day
+        assert data_source.requested == [(["AAA", "BBB"], date(2024, 1, 3))]
+        assert stored_prices(db, 1) == [
+            (date(2024, 1, 2), 50.0),
+            (date(2024, 1, 3), 50.0),
+            (date(2024, 1, 4), 102.0),
+            (date(2024, 1, 5), 103.0),
+        ]
+        assert len(stored_prices(db, 2)) == 4
+
+    def test_failed_batch_does_not_mark_refreshed(self, db):
+        add_assets(db, ["AAA", "BAD"])
+        last_updated = datetime(2024, 1, 1)
+        db.add(PriceUpdate(id=uuid.uuid4(), last_updated=last_updated))
+        db.commit()
+
+        class FailingDataSource(InMemoryDataSource):
+            def get_histories(self, tickers, start):
+                if "BAD" in tickers:
+                    raise ConnectionError("rate limited")
+                return super().get_histories(tickers, start)
+
+        data_source = FailingDataSource({"AAA": create_history(["2024-01-02"])})
+
+        failed_batches = update_all_assets(db, data_source, batch_size=1)
+
+        assert failed_batches == 1
+        assert stored_prices(db, 1) == [(date(2024, 1, 2), 100.0)]
+        assert db.query(PriceUpdate).first().last_updated == last_updated
+
+    def test_incomplete_batch_stores_downloaded_tickers(self, db):
+        add_assets(db, ["AAA", "BAD"])
+        last_updated = datetime(2024, 1, 1)
+        db.add(PriceUpdate(id=uuid.uuid4(), last_updated=last_updated))
+        db.commit()
+
+        class PartialDataSource(InMemoryDataSource):
+            def get_histories(self, tickers, start):
+                histories = super().get_histories(tickers, start)
+                raise IncompleteDownloadError(["BAD"], histories)
+
+        data_source = PartialDataSource({"AAA": create_history(["2024-01-02"])})
+
+        failed_batches = update_all_assets(db, data_source)
+
+        assert failed_batches == 1
+        assert stored_prices(db, 1) == [(date(2024, 1, 2), 100.0)]
+        assert db.query(PriceUpdate).first().last_updated == last_updated
+
+
+def yfinance_frame(histories: dict[str, list[float]]) -> pd.DataFrame:
+    """yf.download output for one ticker per key, NaN prices for failed ones"""
+    index = pd.DatetimeIndex(["2024-01-02", "2024-01-03"], name="Date")
+    fields = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    return pd.concat(
+        {
+            ticker: pd.DataFrame(
+                {field: prices for field in fields}
+                | {"Dividends": 0.0, "Stock Splits": 0.0},
+                index=index,
+            )
+            for ticker, prices in histories.items()
+        },
+        axis=1,
+        names=["Ticker", "Price"],
+    )
+
+
+class TestYFinanceDataSource:
+    def test_tickers_without_prices_are_failed_downloads(self):
+        nan = float("nan")
+
+        def download(tickers, **kwargs):
+            # yfinance reports errors through module globals reset per call
+            from yfinance import shared
+
+            shared._ERRORS = {"ERR": "YFRateLimitError()"}
+            return yfinance_frame(
+                {"AAA": [10.0, 11.0], "NAN": [nan, nan], "ERR": [nan, nan]}
+            )
+
+        with patch("yfinance.download", side_effect=download):
+            with pytest.raises(IncompleteDownloadError) as error:
+                YFinanceDataSource().get_histories(
+                    ["AAA", "NAN", "ERR", "GONE"], date(2024, 1, 2)
+                )
+
+        assert error.value.failed_tickers == ["NAN", "ERR", "GONE"]
+        assert list(error.value.histories) == ["AAA"]
+        assert error.value.histories["AAA"]["adj_close"].tolist() == [10.0, 11.0]
+
+    def test_downloads_run_one_at_a_time(self):
+        running = []
+        overlapped = []
+
+        def download(tickers, **kwargs):
+            running.append(tickers)
+            overlapped.append(len(running) > 1)
+            time.sleep(0.01)
+            running.remove(tickers)
+            return yfinance_frame({ticker: [10.0, 11.0] for ticker in tickers})
+
+        data_source = YFinanceDataSource()
+        with patch("yfinance.download", side_effect=download):
+            threads = [
+                threading.Thread(
+                    target=data_source.get_histories,
+                    args=([f"T{i}"], date(2024, 1, 2)),
+                )
+                for i in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        assert overlapped == [False] * 4
+
+
+class TestFileDataSource:
+    @pytest.mark.parametrize("file_format", ["csv", "parquet"])
+    def test_reads_from_start_date(self, tmp_path, file_format):
+        history = create_history(["2024-01-02", "2024-01-03", "2024-01-04"])
+        if file_format == "csv":
+            history.to_csv(tmp_path / "AAA.csv", index=False)
+        else:
+            pl.from_dict(
+                {col: history[col].to_numpy() for col in history.columns}
+            ).write_parquet(tmp_path / "AAA.parquet")
+
+        data_source = FileDataSource(tmp_path, file_format)
+        histories = data_source.get_histories(["AAA", "MISSING"], date(2024, 1, 3))
+
+        assert list(histories) == ["AAA"]
+        assert histories["AAA"]["adj_close"].tolist() == [101.0, 102.0]
+
+
+class TestInsertTimeseries:
+    def test_skips_existing_rows_without_scanning(self, db):
+        add_assets(db, ["AAA"])
+        add_prices(db, 1, ["2024-01-02"])
+        history = create_history(["2024-01-02", "2024-01-03"])
+        history.loc[1, "volume"] = None
+
+        inserted = insert_timeseries(db, to_timeseries_rows(1, history))
+        db.commit()
+
+        assert inserted == 1
+        assert stored_prices(db, 1) == [
+            (date(2024, 1, 2), 50.0),
+            (date(2024, 1, 3), 101.0),
+        ]
+        new_row = db.query(Timeseries).filter(Timeseries.adj_close == 101.0).one()
+        assert new_row.volume is None
+
+    def test_drops_todays_incomplete_bar(self):
+        today = datetime.now().date().isoformat()
+        history = create_history(["2024-01-02", today])
+
+        rows = to_timeseries_rows(1, history)
+
+        assert rows["timestamp"].tolist() == [pd.Timestamp("2024-01-02")]
+
+
+class TestCorporateActions:
+    def test_split_rescales_stored_rows(self, db):
+        """A 2:1 split halves stored prices and doubles volume, without a reload"""
+        add_assets(db, ["AAA"])
+        add_prices(db, 1, ["2024-01-02", "2024-01-03"], price=100.0)
+        history = create_history(
+            ["2024-01-03", "2024-01-04"], start_price=50.0, splits={"2024-01-04": 2.0}
+        )
+        data_source = InMemoryDataSource({"AAA": history})
+
+        update_all_assets(db, data_source)
+
+        assert len(data_source.requested) == 1
+        assert stored_prices(db, 1) == [
+            (date(2024, 1, 2), 50.0),
+            (date(2024, 1, 3), 50.0),
+            (date(2024, 1, 4), 51.0),
+        ]
+        action = db.query(CorporateAction).one()
+        assert (action.action_type, action.value) == ("split", 2.0)
+        assert action.adjustment_factor == 0.5
+
+    def test_events_are_applied_once(self, db):
+        """The next run downloads the ex-date again but must not rescale twice"""
+        add_assets(db, ["AAA"])
+        add_prices(db, 1, ["2024-01-02"], price=100.0)
+        history = create_history(
+            ["2024-01-02", "2024-01-03"], start_price=50.0, splits={"2024-01-03": 2.0}
+        )
+        data_source = InMemoryDataSource({"AAA": history})
+
+        update_all_assets(db, data_source)
+        update_all_assets(db, data_source)
+
+        assert stored_prices(db, 1) == [
+            (date(2024, 1, 2), 50.0),
+            (date(2024, 1, 3), 51.0),
+        ]
+        assert db.query(CorporateAction).count() == 1
+
+    def test_dividend_adjusts_adj_close_only(self, db):
+        add_assets(db, ["AAA"])
+        add_prices(db, 1, ["2024-01-02"], price=100.0)
+        history = create_history(
+            ["2024-01-02", "2024-01-03"], dividends={"2024-01-03": 2.0}
+        )
+
+        update_all_assets(db, InMemoryDataSource({"AAA": history}))
+
+        stored = (
+            db.query(Timeseries)
+            .filter(Timeseries.timestamp == datetime(2024, 1, 2))
+            .one()
+        )
+        # Factor is 1 - dividend / previous close = 1 - 2 / 100
+        assert stored.adj_close == pytest.approx(98.0)
+        assert stored.close == 100.0
+
+
+class TestLatestPrices:
+    def test_ingestion_refreshes_snapshot(self, db):
+        add_assets(db, ["AAA", "NEW"])
+        add_prices(db, 1, ["2024-01-02"], price=100.0)
+        data_source = InMemoryDataSource(
+            {
+                "AAA": create_history(["2024-01-03", "2024-01-04"], start_price=110.0),
+                "NEW": create_history(["2024-01-04"]),
+            }
+        )
+
+        update_all_assets(db, data_source)
+
+        snapshot = db.get(LatestPrice, 1)
+        assert snapshot.timestamp == datetime(2024, 1, 4)
+        assert (snapshot.latest_price, snapshot.previous_close) == (111.0, 110.0)
+        assert snapshot.price_change == pytest.approx(1.0)
+        assert snapshot.percentage_change == pytest.approx(100 / 110)
+        assert db.get(LatestPrice, 2).previous_close is None
+
+        # Assets without a previous close are left out, as before the snapshot
+        latest = crud.timeseries.get_latest_price_and_changes(db)
+        assert latest["asset_id"].to_list() == [1]
+        assert latest["latest_price"].to_list() == [111.0]
+
+    def test_refresh_overwrites_existing_snapshot(self, db):
+        add_assets(db, ["AAA"])
+        add_prices(db, 1, ["2024-01-02", "2024-01-03"], price=100.0)
+        crud.timeseries.refresh_latest_prices(db, [1])
+        add_prices(db, 1, ["2024-01-04"], price=90.0)
+
+        crud.timeseries.refresh_latest_prices(db, [1])
+        db.commit()
+
+        snapshot = db.query(LatestPrice).one()
+        assert snapshot.timestamp == datetime(2024, 1, 4)
+        assert snapshot.percentage_change == pytest.approx(-10.0)
+
+    def test_empty_snapshot_keeps_schema(self, db):
+        latest = crud.timeseries.get_latest_price_and_changes(db)
+
+        assert latest.is_empty()
+        assert latest.columns == [
+            "asset_id",
+            "latest_price",
+            "price_change",
+            "percentage_change",
+            "timestamp",
+        ]